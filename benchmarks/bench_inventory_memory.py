@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: discovered VMs as API dicts vs the slotted models of prerequisites/inventory.py.
+
+Builds a synthetic inventory of VMs spread over several sites as the JSON the ZVM returns,
+decodes it, and measures with tracemalloc how much memory the decoded dicts and the models
+converted from them hold, plus the time of the conversion in both directions.
+
+The memory figures only depend on the Python version; the timings also depend on the machine
+and its load, so the first line of the output names both.
+
+Usage:
+    python benchmarks/bench_inventory_memory.py [--vms 100000] [--sites 15] [--repeat 3]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from prerequisites.inventory import from_api_list, to_api_list
+
+
+def make_payloads(vm_count, site_count):
+    """The JSON bodies of GET /v1/virtualizationsites/{site}/vms for vm_count VMs over site_count sites."""
+    payloads = []
+    for site in range(site_count):
+        site_id = f'{site:08x}-5f3c-4a8e-9d1b-0c2e7a6b4f{site:02x}'
+        vms = [
+            {'VmIdentifier': f'{site_id}.vm-{1000 + n}', 'VmName': f'Site{site:02d}-App-VM-{n:06d}'}
+            for n in range(site, vm_count, site_count)
+        ]
+        payloads.append(json.dumps(vms).encode('utf-8'))
+    return payloads
+
+
+def measure(build):
+    """(result, bytes held by the result, seconds) of build()."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, held, elapsed
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def describe_machine():
+    """Python version, CPU and core count of this machine, for comparing results."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open('/proc/cpuinfo') as f:
+            cpu = next(line.split(':', 1)[1].strip() for line in f if line.startswith('model name'))
+    except (OSError, StopIteration):
+        pass
+    return (f"Python {platform.python_version()} ({platform.python_implementation()}) on "
+            f"{platform.system()} {platform.machine()}, {cpu}, {os.cpu_count()} CPUs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inventory memory: dicts vs slotted models")
+    parser.add_argument("--vms", type=int, default=100000, help="VMs in total (default: 100000)")
+    parser.add_argument("--sites", type=int, default=15, help="Sites the VMs are spread over (default: 15)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per conversion, best is reported (default: 3)")
+    args = parser.parse_args()
+
+    print(describe_machine())
+    payloads = make_payloads(args.vms, args.sites)
+    print(f"{args.vms} VMs on {args.sites} sites, {sum(map(len, payloads)) / 1e6:.1f} MB of JSON")
+
+    dicts, dict_bytes, _ = measure(lambda: [json.loads(payload) for payload in payloads])
+    # Decode again so the models do not share the strings of the dicts measured above
+    models, model_bytes, _ = measure(
+        lambda: [from_api_list('vms', json.loads(payload)) for payload in payloads]
+    )
+
+    to_models = best_time(lambda: [from_api_list('vms', site) for site in dicts], args.repeat)
+    to_dicts = best_time(lambda: [to_api_list(site) for site in models], args.repeat)
+
+    print(f"{'Representation':<16} {'MB':>8} {'Bytes/VM':>9}")
+    for label, held in [("API dicts", dict_bytes), ("slotted models", model_bytes)]:
+        print(f"{label:<16} {held / 1e6:>8.1f} {held / args.vms:>9.0f}")
+    print(f"Saved: {(dict_bytes - model_bytes) / 1e6:.1f} MB ({1 - model_bytes / dict_bytes:.0%})")
+    print(f"from_api: {to_models * 1000:8.1f} ms ({to_models / args.vms * 1e9:.0f} ns/VM)")
+    print(f"to_api:   {to_dicts * 1000:8.1f} ms ({to_dicts / args.vms * 1e9:.0f} ns/VM)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
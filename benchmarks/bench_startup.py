@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: cold-start time of each lab entry point.
+
+Every run starts a fresh interpreter with `python -X importtime` and either asks the script
+for --help or, for scripts without command line options, only executes its module level.
+Nothing connects to a ZVM. Reports the median wall-clock time, the median total import time
+and the heaviest top-level imports of each entry point.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 7] [--top 3] [--json results.json] [--compare old.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# (name, script, argv); argv None runs the module level only, without calling main()
+ENTRY_POINTS = [
+    ("python", None, None),
+    ("auth", "exercises/02_authentication/solution/auth.py", None),
+    ("sites", "exercises/03_site_discovery/solution/sites.py", None),
+    ("resources", "exercises/04_resource_discovery/solution/resources.py", ["--help"]),
+    ("create_vpg", "exercises/05_vpg_operations/solution/create_vpg.py", ["--help"]),
+    ("failover", "exercises/06_failover_test/solution/failover.py", ["--help"]),
+    ("export_nics", "exercises/07_bulk_operations/export_vpg_settings_nics_to_csv.py", ["--help"]),
+    ("import_nics", "exercises/07_bulk_operations/import_vpg_settings_nics_from_csv.py", ["--help"]),
+    ("mock_zvm", "prerequisites/mock_zvm.py", ["--help"]),
+]
+
+DRIVER = "import runpy, sys; sys.argv = {argv!r}; runpy.run_path({path!r}, run_name={run_name!r})"
+
+
+def command_for(script, argv):
+    if script is None:
+        return [sys.executable, "-X", "importtime", "-c", "import runpy"]
+    path = str(ROOT / script)
+    code = DRIVER.format(
+        argv=[path] + (argv or []), path=path, run_name="__main__" if argv is not None else "__startup__"
+    )
+    return [sys.executable, "-X", "importtime", "-c", code]
+
+
+def parse_importtime(stderr):
+    """Return (total import us, {top-level module: cumulative us}) from -X importtime output."""
+    total = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        total += int(self_us)
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative_us)
+    return total, top_level
+
+
+def measure(script, argv, repeat):
+    """Run one entry point repeat times after a warm-up run (which also writes .pyc files)."""
+    command = command_for(script, argv)
+    subprocess.run(command, cwd=str(ROOT), capture_output=True)
+    walls, imports = [], []
+    top_level, returncode = {}, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        completed = subprocess.run(command, cwd=str(ROOT), capture_output=True, text=True)
+        walls.append(time.perf_counter() - started)
+        total, top_level = parse_importtime(completed.stderr)
+        imports.append(total)
+        returncode = completed.returncode
+    return {
+        "wall_ms": statistics.median(walls) * 1000,
+        "import_ms": statistics.median(imports) / 1000,
+        "top_imports_ms": {
+            name: us / 1000 for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:10]
+        },
+        "returncode": returncode,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-start time of the lab entry points")
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per entry point, median is reported (default: 7)")
+    parser.add_argument("--top", type=int, default=3, help="Heaviest top-level imports to list (default: 3)")
+    parser.add_argument("--only", help="Comma-separated entry point names to run")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    only = set(args.only.split(",")) if args.only else None
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    results = {}
+    print(f"{'entry point':<12} {'wall ms':>8} {'import ms':>10} {'vs before':>10}  heaviest imports")
+    for name, script, argv in ENTRY_POINTS:
+        if only and name not in only and name != "python":
+            continue
+        result = measure(script, argv, args.repeat)
+        results[name] = result
+        before = previous.get(name)
+        delta = f"{result['wall_ms'] - before['wall_ms']:+.1f}" if before else ""
+        heaviest = ", ".join(
+            f"{module} {ms:.1f}" for module, ms in list(result["top_imports_ms"].items())[:args.top]
+        )
+        note = f"  (exit {result['returncode']})" if result["returncode"] else ""
+        print(f"{name:<12} {result['wall_ms']:8.1f} {result['import_ms']:10.1f} {delta:>10}  {heaviest}{note}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
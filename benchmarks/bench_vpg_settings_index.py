@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: applying NIC changes to a VPG settings document.
+
+Compares the previous per-change linear scan over vpg_settings['Vms'] and vm['Nics']
+with VpgSettingsIndex from import_vpg_settings_nics_from_csv.py on synthetic VPGs.
+
+Usage:
+    python benchmarks/bench_vpg_settings_index.py [--vms 500] [--nics 2] [--repeat 5]
+"""
+
+import argparse
+import copy
+import importlib.util
+import logging
+import sys
+import time
+from pathlib import Path
+
+BULK_DIR = Path(__file__).parent.parent / "exercises" / "07_bulk_operations"
+
+
+def load_importer():
+    """Load the import script as a module without running its main()."""
+    spec = importlib.util.spec_from_file_location(
+        "import_vpg_settings_nics_from_csv", BULK_DIR / "import_vpg_settings_nics_from_csv.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_vpg_settings(vm_count, nics_per_vm):
+    """Build a synthetic VPG settings document with vm_count VMs."""
+    return {
+        'Basic': {'Name': 'BenchVpg'},
+        'Vms': [
+            {
+                'VmIdentifier': f'vm-{vm}',
+                'Nics': [
+                    {'NicIdentifier': f'Network adapter {nic}', 'Failover': None, 'FailoverTest': None}
+                    for nic in range(nics_per_vm)
+                ]
+            }
+            for vm in range(vm_count)
+        ]
+    }
+
+
+def make_changes(vm_count, nics_per_vm):
+    """One Failover IP change for every NIC of the VPG."""
+    return [
+        {
+            'VPG Name': 'BenchVpg',
+            'VM Identifier': f'vm-{vm}',
+            'NIC Identifier': f'Network adapter {nic}',
+            'VM Name': f'vm-{vm}',
+            'changes': {'Failover IP': {'current': '', 'updated': f'10.0.{vm % 256}.{nic}'}}
+        }
+        for vm in range(vm_count)
+        for nic in range(nics_per_vm)
+    ]
+
+
+def find_linear(vpg_settings, change):
+    """The lookup update_vpg_settings used before VpgSettingsIndex."""
+    vm = next((v for v in vpg_settings['Vms'] if v['VmIdentifier'] == change['VM Identifier']), None)
+    if not vm:
+        return None
+    return next((n for n in vm['Nics'] if n['NicIdentifier'] == change['NIC Identifier']), None)
+
+
+def lookup_linear(importer, vpg_settings, changes):
+    for change in changes:
+        find_linear(vpg_settings, change)
+
+
+def lookup_indexed(importer, vpg_settings, changes):
+    index = importer.VpgSettingsIndex(vpg_settings)
+    for change in changes:
+        index.get_nic(change['VM Identifier'], change['NIC Identifier'])
+
+
+def apply_linear(importer, vpg_settings, changes):
+    for change in changes:
+        nic = find_linear(vpg_settings, change)
+        if nic:
+            importer.apply_nic_change(nic, change)
+
+
+def apply_indexed(importer, vpg_settings, changes):
+    importer.VpgSettingsIndex(vpg_settings).apply_changes(changes)
+
+
+def best_of(func, importer, template, changes, repeat):
+    """Best wall-clock time of repeat runs, each on a fresh copy of the settings."""
+    timings = []
+    for _ in range(repeat):
+        vpg_settings = copy.deepcopy(template)
+        started = time.perf_counter()
+        func(importer, vpg_settings, changes)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark VPG settings NIC lookup")
+    parser.add_argument("--vms", type=int, default=500, help="VMs per VPG (default: 500)")
+    parser.add_argument("--nics", type=int, default=2, help="NICs per VM (default: 2)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant, best is reported (default: 5)")
+    args = parser.parse_args()
+
+    importer = load_importer()
+    logging.disable(logging.CRITICAL)
+
+    template = make_vpg_settings(args.vms, args.nics)
+    changes = make_changes(args.vms, args.nics)
+
+    print(f"VPG with {args.vms} VMs x {args.nics} NICs, {len(changes)} changes")
+    for label, linear_func, indexed_func in [
+        ("NIC lookup only", lookup_linear, lookup_indexed),
+        ("lookup + apply", apply_linear, apply_indexed)
+    ]:
+        linear = best_of(linear_func, importer, template, changes, args.repeat)
+        indexed = best_of(indexed_func, importer, template, changes, args.repeat)
+        print(f"{label}:")
+        print(f"  linear scan: {linear * 1000:9.2f} ms")
+        print(f"  indexed:     {indexed * 1000:9.2f} ms")
+        print(f"  speedup:     {linear / indexed:9.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
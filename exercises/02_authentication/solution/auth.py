@@ -20,17 +20,15 @@ import os
 import logging
 import json
 from pathlib import Path
-import urllib3
 
 # Add prerequisites to Python path
 prerequisites_path = Path(__file__).parent.parent.parent.parent / "prerequisites"
 sys.path.append(str(prerequisites_path))
+sys.path.append(str(prerequisites_path.parent))
 
-# Import the SDK modules
-from zvml import ZVMLClient
+# The zvml SDK is imported by create_client when the client is first created
+from prerequisites.client import create_client
 
-# Suppress SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Import configuration
 try:
@@ -63,7 +61,7 @@ def main():
     try:
         # Step 1: Create a ZVMLClient instance
         logging.info(f"Initializing ZVMLClient for ZVM at {ZVM_HOST}")
-        client = ZVMLClient(
+        client = create_client(
             zvm_address=ZVM_HOST,
             client_id=CLIENT_ID,
             client_secret=CLIENT_SECRET,
@@ -19,18 +19,21 @@ import sys
 import os
 import logging
 import json
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import urllib3
-
-# Suppress SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning) 
 
 # Add prerequisites to Python path
 prerequisites_path = Path(__file__).parent.parent.parent.parent / "prerequisites"
 sys.path.append(str(prerequisites_path))
+sys.path.append(str(prerequisites_path.parent))
 
-# Import the SDK modules
-from zvml import ZVMLClient
+# The zvml SDK is imported by create_client when the client is first created
+from prerequisites.client import create_client
+from prerequisites.discovery import (DEFAULT_MAX_WORKERS, PEER_RESOURCE_TYPES, discover_all_sites,
+                                     discover_resources, peer_sites)
+from prerequisites.vm_listing import iter_site_vms
 
 # Import configuration
 try:
@@ -53,6 +56,17 @@ def main():
     1. Discover local site resources
     2. Work with peer site resources
     """
+    parser = argparse.ArgumentParser(description='Discover local and peer site resources')
+    parser.add_argument('--all-peers', action='store_true',
+                        help='Discover every peer site instead of only the first one')
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'Maximum concurrent calls with --all-peers (default: {DEFAULT_MAX_WORKERS})')
+    parser.add_argument('--stream-vms', action='store_true',
+                        help='Stream the local VM list instead of loading it at once, for very large sites')
+    parser.add_argument('--show-vms', type=int, default=20,
+                        help='Number of local VMs to log in full with --stream-vms (default: 20)')
+    args = parser.parse_args()
+
     # Set up logging with timestamp
     logging.basicConfig(
         level=logging.INFO,
@@ -62,13 +76,17 @@ def main():
     try:
         # Step 1: Create a ZVMLClient instance
         logging.info(f"Initializing ZVMLClient for ZVM at {ZVM_HOST}")
-        client = ZVMLClient(
+        client = create_client(
             zvm_address=ZVM_HOST,
             client_id=CLIENT_ID,
             client_secret=CLIENT_SECRET,
             verify_certificate=ZVM_SSL_VERIFY
         )
         
+        if args.all_peers:
+            discover_every_site(client, args.max_workers)
+            return
+
         # Step 2: Identify local and peer sites
         # Step 2.1: List all available sites
         logging.info("Retrieving list of available sites...")
@@ -80,35 +98,60 @@ def main():
         logging.info(f"Local site identifier: {local_site_identifier}")
         
         # Get peer site identifier (first non-local site)
-        peer_site = next((site for site in sites if site.get('SiteIdentifier') != local_site_identifier), None)
+        peers = peer_sites(sites, local_site_identifier)
+        if len(peers) > 1:
+            logging.info(f"Found {len(peers)} peer sites, using the first one (run with --all-peers for all)")
+        peer_site = peers[0] if peers else None
             
         peer_site_identifier = peer_site.get('SiteIdentifier')
         logging.info(f"Peer site identifier: {peer_site_identifier}")
 
 
-        # Step 3: Get local site resources
-        # Step 3: Get local site vms
-        local_vms = client.virtualization_sites.get_virtualization_site_vms(site_identifier=local_site_identifier)
-        logging.info(f"Local Vms Info: {json.dumps(local_vms, indent=4)}")
-
-        peer_datastores = client.virtualization_sites.get_virtualization_site_datastores(site_identifier=peer_site_identifier)
-        logging.info(f"Peer Datastores Info: {json.dumps(peer_datastores, indent=4)}")
-
-        # Step 3.3: Get peer site hosts
-        peer_hosts = client.virtualization_sites.get_virtualization_site_hosts(site_identifier=peer_site_identifier)
-        logging.info(f"Peer Hosts Info: {json.dumps(peer_hosts, indent=4)}")
-
-        # Step 3.4: Get peer site folders
-        peer_folders = client.virtualization_sites.get_virtualization_site_folders(site_identifier=peer_site_identifier)
-        logging.info(f"Peer Folders Info: {json.dumps(peer_folders, indent=4)}")
-
-        # Step 3.5: Get peer site networks  
-        peer_networks = client.virtualization_sites.get_virtualization_site_networks(site_identifier=peer_site_identifier)
-        logging.info(f"Peer Networks Info: {json.dumps(peer_networks, indent=4)}")
+        # Step 3: Get local site VMs and peer site resources
+        if args.stream_vms:
+            # The peer resource calls are sent in the background while the local VMs are streamed;
+            # a large site's VM list is never held in memory at once
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                peer_future = executor.submit(discover_resources, client, {peer_site_identifier: PEER_RESOURCE_TYPES})
+                started = time.perf_counter()
+                vm_count = 0
+                for vm in iter_site_vms(client, local_site_identifier):
+                    vm_count += 1
+                    if vm_count <= args.show_vms:
+                        logging.info(f"Local VM: {json.dumps(vm)}")
+                logging.info(f"Local site has {vm_count} VMs (listed in {time.perf_counter() - started:.2f}s)")
+                discovered = [peer_future.result()[peer_site_identifier]]
+        else:
+            # The calls are independent, so they are all sent at once
+            inventory = discover_resources(client, {
+                local_site_identifier: ['vms'],
+                peer_site_identifier: PEER_RESOURCE_TYPES
+            })
+            discovered = [inventory[local_site_identifier], inventory[peer_site_identifier]]
+            logging.info(f"Local Vms Info: {json.dumps(discovered[0].vms, indent=4)}")
+        peer = discovered[-1]
+
+        logging.info(f"Peer Datastores Info: {json.dumps(peer.datastores, indent=4)}")
+        logging.info(f"Peer Hosts Info: {json.dumps(peer.hosts, indent=4)}")
+        logging.info(f"Peer Folders Info: {json.dumps(peer.folders, indent=4)}")
+        logging.info(f"Peer Networks Info: {json.dumps(peer.networks, indent=4)}")
+
+        for site in discovered:
+            timings = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in site.timings.items())
+            logging.info(f"Discovery time for site {site.site_identifier}: {timings}")
 
     except Exception as e:
         logging.error(f"Resource discovery failed: {str(e)}")
         sys.exit(1)
 
+def discover_every_site(client, max_workers):
+    """Discover the local VMs and the resources of all peer sites, and log a summary per site."""
+    inventory = discover_all_sites(client, max_workers=max_workers, models=True)
+    for site in inventory.values():
+        kind = "Local" if site.is_local else "Peer"
+        counts = ', '.join(f"{len(getattr(site, name))} {name}" for name in site.timings)
+        slowest = max(site.timings.values(), default=0.0)
+        logging.info(f"{kind} site {site.site_name} ({site.site_identifier}): {counts} (slowest call {slowest:.2f}s)")
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -22,25 +22,19 @@ This solution demonstrates:
 import sys
 import os
 import logging
-# Set up logging with timestamp
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 import json
 import argparse
 from pathlib import Path
-import urllib3
-
-# Suppress SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Add prerequisites to Python path
 prerequisites_path = Path(__file__).parent.parent.parent.parent / "prerequisites"
 sys.path.append(str(prerequisites_path))
+sys.path.append(str(prerequisites_path.parent))
 
-# Import the SDK modules
-from zvml import ZVMLClient
+# The zvml SDK is imported by create_client when the client is first created
+from prerequisites.client import create_client
+from prerequisites.discovery import PEER_RESOURCE_TYPES, discover_resources, peer_sites
+from prerequisites.inventory_index import NameIndex
 
 # Import configuration
 try:
@@ -67,17 +61,25 @@ def main():
     """
     
     try:
-        # Step 1: Create a ZVMLClient instance
-        logging.info(f"Initializing ZVMLClient for ZVM at {ZVM_HOST}")
+        # Step 1: Parse command line arguments
         parser = argparse.ArgumentParser(description='Create VPG and add specified VMs')
         parser.add_argument('--vm-name', default="CRM-03",
                         help='VM name to add to the VPG')
         parser.add_argument('--vpg-name', default="Test-VPG-Python",
                         help='Name of the VPG to create (default: Test-VPG-Python)')
+        parser.add_argument('--peer-site',
+                        help='Name of the recovery site (default: the first peer site)')
         args = parser.parse_args()
 
-# Step 2: Create a ZVMLClient instance
-        client = ZVMLClient(
+        # Set up logging with timestamp
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+
+        # Step 2: Create a ZVMLClient instance
+        logging.info(f"Initializing ZVMLClient for ZVM at {ZVM_HOST}")
+        client = create_client(
             zvm_address=ZVM_HOST,
             client_id=CLIENT_ID,
             client_secret=CLIENT_SECRET,
@@ -89,29 +91,34 @@ def main():
         sites = client.virtualization_sites.get_virtualization_sites()
         local_site = client.localsite.get_local_site()
         local_site_identifier = local_site.get('SiteIdentifier')
-        peer_site = next((site for site in sites if site.get('SiteIdentifier') != local_site_identifier), None)
-        peer_site_identifier = peer_site.get('SiteIdentifier')
-    
-        
+        peers = peer_sites(sites, local_site_identifier)
+        if not peers:
+            raise ValueError("No peer site found to recover to")
+        if args.peer_site:
+            # KeyError if no peer site has that name, AmbiguousNameError if several do
+            peer_index = NameIndex.from_api(peers, 'SiteIdentifier', 'VirtualizationSiteName', 'peer sites')
+            peer_site_identifier = peer_index.identifier(args.peer_site)
+        else:
+            peer_site_identifier = peers[0].get('SiteIdentifier')
+
+
         # Step 3: Get peer site resources for VPG configuration
         logging.info("\nRetrieving peer site resources for VPG configuration...")
         
-        # Step 4: Get peer resources
-        peer_datastores = client.virtualization_sites.get_virtualization_site_datastores(site_identifier=peer_site_identifier)
-        logging.info(f"Peer datastores: {json.dumps(peer_datastores, indent=4)}")
-        target_datastore = peer_datastores[0]  # Use first available
-        
-        peer_folders = client.virtualization_sites.get_virtualization_site_folders(site_identifier=peer_site_identifier)
-        logging.info(f"Peer folders: {json.dumps(peer_folders, indent=4)}")
-        target_folder = peer_folders[0]  # Use first available
-        
-        peer_networks = client.virtualization_sites.get_virtualization_site_networks(site_identifier=peer_site_identifier)
-        logging.info(f"Peer networks: {json.dumps(peer_networks, indent=4)}")
-        target_network = peer_networks[0]  # Use first available
-        
-        peer_hosts = client.virtualization_sites.get_virtualization_site_hosts(site_identifier=peer_site_identifier)
-        logging.info(f"Peer hosts: {json.dumps(peer_hosts, indent=4)}")
-        target_host = peer_hosts[0]  # Use first available
+        # Step 4: Get peer resources (fetched concurrently)
+        peer = discover_resources(client, {peer_site_identifier: PEER_RESOURCE_TYPES})[peer_site_identifier]
+
+        logging.info(f"Peer datastores: {json.dumps(peer.datastores, indent=4)}")
+        target_datastore = peer.datastores[0]  # Use first available
+
+        logging.info(f"Peer folders: {json.dumps(peer.folders, indent=4)}")
+        target_folder = peer.folders[0]  # Use first available
+
+        logging.info(f"Peer networks: {json.dumps(peer.networks, indent=4)}")
+        target_network = peer.networks[0]  # Use first available
+
+        logging.info(f"Peer hosts: {json.dumps(peer.hosts, indent=4)}")
+        target_host = peer.hosts[0]  # Use first available
 
         # Step 5: Create VPG configuration
         logging.info("\nCreating VPG configuration...")
@@ -163,6 +170,9 @@ def main():
         if response in ['yes', 'y']:
             client.vpgs.delete_vpg(args.vpg_name)
          
+    except KeyError as e:
+        logging.error(f"VPG operation failed: {e.args[0]}")
+        sys.exit(1)
     except Exception as e:
         logging.error(f"VPG operation failed: {str(e)}")
         sys.exit(1)
@@ -26,17 +26,14 @@ import json
 import argparse
 import time
 from pathlib import Path
-import urllib3
-
-# Suppress SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # Add prerequisites to Python path
 prerequisites_path = Path(__file__).parent.parent.parent.parent / "prerequisites"
 sys.path.append(str(prerequisites_path))
+sys.path.append(str(prerequisites_path.parent))
 
-# Import the SDK modules
-from zvml import ZVMLClient
+# The zvml SDK is imported by create_client when the client is first created
+from prerequisites.client import create_client
 
 # Import configuration
 try:
@@ -56,22 +53,22 @@ def main():
     """
     Main function to demonstrate failover testing.
     """
-    # Set up logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
-    
     try:
         # Step 1: Parse command line arguments
         parser = argparse.ArgumentParser(description='Perform failover test on a VPG')
         parser.add_argument('--vpg-name', default="CRM",
                         help='Name of the VPG to test')
         args = parser.parse_args()
+
+        # Set up logging
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
         
         # Step 2: Create ZVMLClient instance
         logging.info(f"Initializing ZVMLClient for ZVM at {ZVM_HOST}")
-        client = ZVMLClient(
+        client = create_client(
             zvm_address=ZVM_HOST,
             client_id=CLIENT_ID,
             client_secret=CLIENT_SECRET,
@@ -10,29 +10,30 @@
 # information, or other pecuniary loss) arising out of the use of or the inability to use the sample 
 # scripts or documentation, even if the author or Zerto has been advised of the possibility of such damages. 
 # The entire risk arising out of the use or performance of the sample scripts and documentation remains with you.
+from __future__ import annotations
+
 import argparse
 import logging
 import json
 import csv
 import sys
 import os
-from pathlib import Path
-import urllib3
-from typing import List, Dict
-import codecs
+from typing import TYPE_CHECKING, List, Dict, Iterable, Iterator, Tuple
+import hashlib
+import math
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
 
-# Add parent directory to path to import zvml
+# Add parent directory to path to import prerequisites
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from zvml import ZVMLClient
-
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from prerequisites.client import create_client, DEFAULT_POOL_MAXSIZE
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# zvml is only imported once create_client() runs, so --help stays fast
+if TYPE_CHECKING:
+    from zvml import ZVMLClient
 
 
 """
@@ -67,6 +68,10 @@ Required Arguments:
     --client_secret: Keycloak client secret
     --ignore_ssl: Ignore SSL certificate verification (optional)
     --vpg_names: Comma-separated list of VPG names to export (optional)
+    --output_dir: Directory to save exported files (optional)
+    --shards: Number of concurrent exports to split the VPGs across (optional, default 1)
+    --read_batch: Number of exported VPGs to read at a time (optional, default 50)
+    --previous: Previous ExportedSettings_[timestamp].json for an incremental export (optional)
 
 Example Usage:
     python export_vpg_settings_nics_to_csv.py \
@@ -79,6 +84,7 @@ Example Usage:
 Output Files:
     - ExportedSettings_[timestamp].json: Full VPG settings in JSON format
     - ExportedSettings_[timestamp].csv: NIC settings in CSV format
+    - ExportedSettings_[timestamp].manifest.json: Per-VPG content hashes used by --previous
 
 Note: This script is part of a pair with import_vpg_settings_nics_from_csv.py, allowing for
 export and import of VPG NIC settings in bulk. The CSV format is designed to be easily
@@ -87,62 +93,369 @@ editable in spreadsheet applications.
 
 def setup_client(args):
     """Initialize and return Zerto client"""
-    client = ZVMLClient(
+    client = create_client(
         zvm_address=args.zvm_address,
         client_id=args.client_id,
         client_secret=args.client_secret,
-        verify_certificate=not args.ignore_ssl
+        verify_certificate=not args.ignore_ssl,
+        pool_maxsize=max(DEFAULT_POOL_MAXSIZE, args.shards * 2),
+        token_refresh=True,
+        max_concurrency=args.shards if args.shards > 1 else None
     )
     return client
 
+CSV_FIELDNAMES = [
+    'VPG Name', 'VM Identifier', 'NIC Identifier',
+    'Failover Network', 'Failover ShouldReplaceIpConfiguration', 'Failover DHCP',
+    'Failover IP', 'Failover Subnet', 'Failover Gateway',
+    'Failover DNS1', 'Failover DNS2',
+    'Failover Test Network', 'Failover Test ShouldReplaceIpConfiguration', 'Failover Test DHCP',
+    'Failover Test IP', 'Failover Test Subnet',
+    'Failover Test Gateway', 'Failover Test DNS1', 'Failover Test DNS2'
+]
+
 def extract_nic_settings(json_data):
     """Extract NIC settings from VPG JSON data."""
     nic_settings = []
-    
     for vpg in json_data:
-        vpg_name = vpg['Basic']['Name']
+        nic_settings.extend(iter_nic_settings(vpg))
+    return nic_settings
+
+def iter_nic_settings(vpg: Dict) -> Iterator[Dict]:
+    """Yield one CSV row per NIC of a single VPG."""
+    vpg_name = vpg['Basic']['Name']
+    
+    for vm in vpg['Vms']:
+        vm_id = vm['VmIdentifier']
         
-        for vm in vpg['Vms']:
-            vm_id = vm['VmIdentifier']
+        for nic in vm['Nics']:
+            nic_id = nic['NicIdentifier']
             
-            for nic in vm['Nics']:
-                nic_id = nic['NicIdentifier']
-                
-                # Extract failover settings
-                failover = nic['Failover']['Hypervisor'] if nic['Failover'] and nic['Failover']['Hypervisor'] else {}
-                failover_network = failover.get('NetworkIdentifier', '')
-                failover_ip_config = failover.get('IpConfig', {}) or {}
-                
-                # Extract failover test settings
-                failover_test = nic['FailoverTest']['Hypervisor'] if nic['FailoverTest'] and nic['FailoverTest']['Hypervisor'] else {}
-                failover_test_network = failover_test.get('NetworkIdentifier', '')
-                failover_test_ip_config = failover_test.get('IpConfig', {}) or {}
-                
-                # Create a row for each NIC
-                row = {
-                    'VPG Name': vpg_name,
-                    'VM Identifier': vm_id,
-                    'NIC Identifier': nic_id,
-                    'Failover Network': failover_network,
-                    'Failover ShouldReplaceIpConfiguration': str(failover.get('ShouldReplaceIpConfiguration', False)),
-                    'Failover DHCP': str(failover_ip_config.get('IsDhcp', False)),
-                    'Failover IP': failover_ip_config.get('StaticIp', ''),
-                    'Failover Subnet': failover_ip_config.get('SubnetMask', ''),
-                    'Failover Gateway': failover_ip_config.get('Gateway', ''),
-                    'Failover DNS1': failover_ip_config.get('PrimaryDns', ''),
-                    'Failover DNS2': failover_ip_config.get('SecondaryDns', ''),
-                    'Failover Test Network': failover_test_network,
-                    'Failover Test ShouldReplaceIpConfiguration': str(failover_test.get('ShouldReplaceIpConfiguration', False)),
-                    'Failover Test DHCP': str(failover_test_ip_config.get('IsDhcp', False)),
-                    'Failover Test IP': failover_test_ip_config.get('StaticIp', ''),
-                    'Failover Test Subnet': failover_test_ip_config.get('SubnetMask', ''),
-                    'Failover Test Gateway': failover_test_ip_config.get('Gateway', ''),
-                    'Failover Test DNS1': failover_test_ip_config.get('PrimaryDns', ''),
-                    'Failover Test DNS2': failover_test_ip_config.get('SecondaryDns', '')
-                }
-                nic_settings.append(row)
-    
-    return nic_settings
+            # Extract failover settings
+            failover = nic['Failover']['Hypervisor'] if nic['Failover'] and nic['Failover']['Hypervisor'] else {}
+            failover_network = failover.get('NetworkIdentifier', '')
+            failover_ip_config = failover.get('IpConfig', {}) or {}
+            
+            # Extract failover test settings
+            failover_test = nic['FailoverTest']['Hypervisor'] if nic['FailoverTest'] and nic['FailoverTest']['Hypervisor'] else {}
+            failover_test_network = failover_test.get('NetworkIdentifier', '')
+            failover_test_ip_config = failover_test.get('IpConfig', {}) or {}
+            
+            # Create a row for each NIC
+            row = {
+                'VPG Name': vpg_name,
+                'VM Identifier': vm_id,
+                'NIC Identifier': nic_id,
+                'Failover Network': failover_network,
+                'Failover ShouldReplaceIpConfiguration': str(failover.get('ShouldReplaceIpConfiguration', False)),
+                'Failover DHCP': str(failover_ip_config.get('IsDhcp', False)),
+                'Failover IP': failover_ip_config.get('StaticIp', ''),
+                'Failover Subnet': failover_ip_config.get('SubnetMask', ''),
+                'Failover Gateway': failover_ip_config.get('Gateway', ''),
+                'Failover DNS1': failover_ip_config.get('PrimaryDns', ''),
+                'Failover DNS2': failover_ip_config.get('SecondaryDns', ''),
+                'Failover Test Network': failover_test_network,
+                'Failover Test ShouldReplaceIpConfiguration': str(failover_test.get('ShouldReplaceIpConfiguration', False)),
+                'Failover Test DHCP': str(failover_test_ip_config.get('IsDhcp', False)),
+                'Failover Test IP': failover_test_ip_config.get('StaticIp', ''),
+                'Failover Test Subnet': failover_test_ip_config.get('SubnetMask', ''),
+                'Failover Test Gateway': failover_test_ip_config.get('Gateway', ''),
+                'Failover Test DNS1': failover_test_ip_config.get('PrimaryDns', ''),
+                'Failover Test DNS2': failover_test_ip_config.get('SecondaryDns', '')
+            }
+            yield row
+
+def vpg_content_hash(vpg: Dict) -> str:
+    """Return a stable SHA-256 of a VPG's exported settings."""
+    return hashlib.sha256(json.dumps(vpg, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def write_export_files(vpgs: Iterable[Dict], json_file_name: str, csv_file_name: str,
+                       hashes: Dict[str, str] = None) -> Tuple[int, int]:
+    """Write VPG settings to the JSON file and their NIC rows to the CSV file in a single pass.
+
+    Each VPG is written to both files as soon as it is received, so only one VPG needs to
+    be held in memory. The JSON output matches json.dump(vpgs, f, indent=2).
+    If hashes is given it is filled with the content hash of every VPG written.
+    Returns the number of VPGs and NIC rows written.
+    """
+    vpg_count = 0
+    nic_count = 0
+    # Create CSV file with Windows line endings
+    with open(json_file_name, 'w') as json_file, open(csv_file_name, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(
+            csv_file,
+            fieldnames=CSV_FIELDNAMES,
+            delimiter=',',
+            quoting=csv.QUOTE_ALL,
+            quotechar='"',
+            lineterminator='\r\n'
+        )
+        writer.writeheader()
+        json_file.write('[')
+        for vpg in vpgs:
+            json_file.write(',\n  ' if vpg_count else '\n  ')
+            json_file.write(json.dumps(vpg, indent=2).replace('\n', '\n  '))
+            vpg_count += 1
+            if hashes is not None:
+                hashes[vpg['Basic']['Name']] = vpg_content_hash(vpg)
+            for row in iter_nic_settings(vpg):
+                # Ensure all fields are present and properly formatted
+                for field in CSV_FIELDNAMES:
+                    if field not in row:
+                        row[field] = ''
+                    # No need to convert boolean values since they're already strings
+                writer.writerow(row)
+                nic_count += 1
+        json_file.write('\n]' if vpg_count else ']')
+    return vpg_count, nic_count
+
+def split_shards(vpg_names: List[str], shards: int) -> List[List[str]]:
+    """Split VPG names into at most `shards` contiguous batches of similar size."""
+    if not vpg_names:
+        return []
+    size = math.ceil(len(vpg_names) / max(1, shards))
+    return [vpg_names[i:i + size] for i in range(0, len(vpg_names), size)]
+
+# VPGs read per read_exported_vpg_settings call; only this many exported VPGs are held in memory
+DEFAULT_READ_BATCH = 50
+
+def export_shard(client: ZVMLClient, shard_index: int, vpg_names: List[str]) -> str:
+    """Run export_vpg_settings for one shard and return its timestamp."""
+    started = time.monotonic()
+    export_result = client.vpgs.export_vpg_settings(vpg_names)
+    if not export_result or 'TimeStamp' not in export_result:
+        raise Exception(f"Failed to export VPG settings (shard {shard_index})")
+    logging.info(f"Shard {shard_index}: {len(vpg_names)} VPGs exported in {time.monotonic() - started:.2f}s")
+    return export_result['TimeStamp']
+
+def read_shard(client: ZVMLClient, shard_index: int, timestamp: str, vpg_names: List[str],
+               read_batch: int = DEFAULT_READ_BATCH) -> Iterator[Dict]:
+    """Yield the exported settings of a shard in vpg_names order, reading `read_batch` VPGs at a time."""
+    reading = 0.0
+    count = 0
+    for i in range(0, len(vpg_names), read_batch):
+        batch = vpg_names[i:i + read_batch]
+        started = time.monotonic()
+        export_settings = client.vpgs.read_exported_vpg_settings(timestamp, batch)
+        reading += time.monotonic() - started
+        vpgs = {vpg['Basic']['Name']: vpg for vpg in (export_settings or {}).get('ExportedVpgSettingsApi') or []}
+        for name in batch:
+            vpg = vpgs.pop(name, None)
+            if vpg is None:
+                logging.warning(f"VPG {name} is missing from export {timestamp}")
+                continue
+            count += 1
+            yield vpg
+    # Only the read calls are timed, not the time spent waiting for the VPGs to be written
+    logging.info(f"Shard {shard_index}: {count} VPGs read in {reading:.2f}s")
+
+# Ends a shard's VPGs in its queue
+SHARD_DONE = object()
+
+def run_shard(client: ZVMLClient, shard_index: int, vpg_names: List[str], read_batch: int,
+              output: queue.Queue, stop: threading.Event) -> None:
+    """Export and read one shard in a worker thread, handing the results over through `output`.
+
+    Puts the shard's timestamp, then its VPGs in order, then SHARD_DONE. An exception is put
+    in place of the remaining items. Returns early once `stop` is set.
+    """
+    def hand_over(item) -> bool:
+        while not stop.is_set():
+            try:
+                output.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        timestamp = export_shard(client, shard_index, vpg_names)
+        if not hand_over(timestamp):
+            return
+        for vpg in read_shard(client, shard_index, timestamp, vpg_names, read_batch):
+            if not hand_over(vpg):
+                return
+        hand_over(SHARD_DONE)
+    except Exception as e:
+        hand_over(e)
+
+def export_vpgs(client: ZVMLClient, vpg_names: List[str] = None, shards: int = 1,
+                read_batch: int = DEFAULT_READ_BATCH) -> Tuple[str, Iterator[Dict]]:
+    """Export VPG settings, optionally as `shards` concurrent export/read pairs.
+
+    Returns the timestamp of the first shard and an iterator over the exported VPGs. Each
+    shard is exported and read in its own worker, which reads `read_batch` VPGs at a time
+    and waits while `read_batch` of them are queued, so memory use does not grow with the
+    number of VPGs. The queues are drained in shard order, so the output order does not
+    depend on which shard finishes first.
+    """
+    if vpg_names is None:
+        vpg_names = [vpg['VpgName'] for vpg in client.vpgs.list_vpgs() or []]
+        logging.info(f"Found {len(vpg_names)} VPGs to export")
+    if not vpg_names:
+        logging.warning("No VPGs to export")
+        return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S'), iter([])
+
+    batches = split_shards(vpg_names, shards) if shards > 1 else [vpg_names]
+    if len(batches) == 1:
+        timestamp = export_shard(client, 1, vpg_names)
+        return timestamp, read_shard(client, 1, timestamp, vpg_names, read_batch)
+
+    logging.info(f"Exporting {len(vpg_names)} VPGs in {len(batches)} shards")
+    queues = [queue.Queue(maxsize=read_batch) for _ in batches]
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=len(batches))
+    for index, (batch, output) in enumerate(zip(batches, queues), 1):
+        executor.submit(run_shard, client, index, batch, read_batch, output, stop)
+
+    def take(output: queue.Queue):
+        item = output.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close():
+        stop.set()
+        executor.shutdown(wait=False)
+
+    try:
+        # Every export has to succeed before any file is written
+        timestamps = [take(output) for output in queues]
+    except BaseException:
+        close()
+        raise
+
+    def merged():
+        try:
+            for output in queues:
+                vpg = take(output)
+                while vpg is not SHARD_DONE:
+                    yield vpg
+                    vpg = take(output)
+        finally:
+            close()
+
+    return timestamps[0], merged()
+
+# Tasks started this long before the previous export are still treated as changes,
+# to allow for clock differences between this machine and the ZVM
+CLOCK_SKEW_MARGIN = timedelta(minutes=10)
+
+def get_manifest_filename(json_file_name: str) -> str:
+    """Return the manifest path that belongs to an ExportedSettings_<timestamp>.json file."""
+    return os.path.splitext(json_file_name)[0] + '.manifest.json'
+
+def write_manifest(json_file_name: str, timestamp: str, exported_at: datetime, hashes: Dict[str, str]) -> None:
+    """Save the per-VPG content hashes of an export next to its JSON file."""
+    manifest = {
+        'TimeStamp': timestamp,
+        'ExportedAt': exported_at.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S'),
+        'Vpgs': hashes
+    }
+    with open(get_manifest_filename(json_file_name), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def load_previous_export(json_file_name: str) -> Tuple[Dict[str, Dict], datetime]:
+    """Load a previous ExportedSettings_<timestamp>.json as VPG name -> settings.
+
+    VPGs whose content no longer matches the hash in the manifest (for example because the
+    JSON was edited by hand) are left out, so they are exported again. Without a manifest the
+    file modification time is used as the export time.
+    """
+    with open(json_file_name, 'r') as f:
+        vpgs = {vpg['Basic']['Name']: vpg for vpg in json.load(f)}
+
+    manifest_file_name = get_manifest_filename(json_file_name)
+    if not os.path.exists(manifest_file_name):
+        logging.warning(f"No manifest found for {json_file_name}, using the file time as export time")
+        return vpgs, datetime.fromtimestamp(os.path.getmtime(json_file_name), timezone.utc)
+
+    with open(manifest_file_name, 'r') as f:
+        manifest = json.load(f)
+    hashes = manifest.get('Vpgs', {})
+    for vpg_name in list(vpgs):
+        if hashes.get(vpg_name) != vpg_content_hash(vpgs[vpg_name]):
+            logging.warning(f"VPG {vpg_name} in {json_file_name} does not match its manifest hash, it will be re-exported")
+            del vpgs[vpg_name]
+    # ExportedAt is written in UTC without an offset
+    return vpgs, datetime.strptime(manifest['ExportedAt'], '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc)
+
+def get_changed_vpg_identifiers(client: ZVMLClient, since: datetime) -> set:
+    """Return identifiers of VPGs that ZVM tasks started after `since` relate to.
+
+    Returns None if the task history is empty or does not reach back to `since`, in
+    which case changes cannot be ruled out.
+    """
+    since_text = (since - CLOCK_SKEW_MARGIN).strftime('%Y-%m-%dT%H:%M:%S')
+    tasks = client.tasks.list_tasks() or []
+    if isinstance(tasks, dict):
+        tasks = [tasks]
+
+    started = [str(task.get('Started') or '')[:19] for task in tasks]
+    if not started or min(started) > since_text:
+        logging.warning("Task history does not cover the time since the previous export")
+        return None
+
+    changed = set()
+    for task, task_started in zip(tasks, started):
+        if task_started < since_text:
+            continue
+        for vpg in (task.get('RelatedEntities') or {}).get('Vpgs') or []:
+            changed.add(vpg.get('identifier') or vpg.get('Identifier') if isinstance(vpg, dict) else vpg)
+    return changed
+
+
+def export_vpgs_incremental(client: ZVMLClient, previous_json: str, vpg_names: List[str] = None,
+                            shards: int = 1, read_batch: int = DEFAULT_READ_BATCH) -> Tuple[str, Iterator[Dict]]:
+    """Export only VPGs that changed since a previous export and reuse the rest from it.
+
+    A VPG is exported again if it is not in the previous export, if a ZVM task started
+    after the previous export relates to it, or if its previous content fails the manifest
+    hash check. Returns the timestamp and the VPGs in list_vpgs order, like export_vpgs;
+    refreshed VPGs are read while the iterator is consumed.
+    """
+    previous, exported_at = load_previous_export(previous_json)
+
+    current = client.vpgs.list_vpgs() or []
+    if vpg_names:
+        wanted = set(vpg_names)
+        current = [vpg for vpg in current if vpg['VpgName'] in wanted]
+    names = [vpg['VpgName'] for vpg in current]
+
+    changed_ids = get_changed_vpg_identifiers(client, exported_at)
+    if changed_ids is None:
+        refresh = names
+    else:
+        refresh = [
+            vpg['VpgName'] for vpg in current
+            if vpg['VpgName'] not in previous or vpg['VpgIdentifier'] in changed_ids
+        ]
+    logging.info(f"Incremental export: {len(refresh)} of {len(names)} VPGs to refresh, "
+                 f"{len(names) - len(refresh)} reused from {previous_json}")
+
+    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+    fresh = iter([])
+    if refresh:
+        timestamp, fresh = export_vpgs(client, refresh, shards, read_batch)
+
+    def merged():
+        # refresh is in list_vpgs order and export_vpgs keeps that order, so the refreshed
+        # VPGs are merged in as they are read instead of being collected first
+        pending = next(fresh, None)
+        refreshed = unchanged = 0
+        for name in names:
+            vpg = previous.pop(name, None)
+            if pending is not None and pending['Basic']['Name'] == name:
+                refreshed += 1
+                if vpg is not None and vpg_content_hash(pending) == vpg_content_hash(vpg):
+                    unchanged += 1
+                vpg, pending = pending, next(fresh, None)
+            if vpg is not None:
+                yield vpg
+        if refresh:
+            logging.info(f"Incremental export: {refreshed - unchanged} refreshed VPGs changed, {unchanged} unchanged")
+
+    return timestamp, merged()
 
 def get_safe_filename(timestamp):
     """Convert timestamp to a URL-safe filename."""
@@ -158,6 +471,10 @@ def setup_argparse() -> argparse.ArgumentParser:
     parser.add_argument("--ignore_ssl", action="store_true", help="Ignore SSL certificate verification")
     parser.add_argument("--vpg_names", help="Comma-separated list of VPG names to export (optional)")
     parser.add_argument("--output_dir", default='.', help="Directory to save exported files (default: current directory)")
+    parser.add_argument("--shards", type=int, default=1, help="Number of concurrent exports to split the VPGs across (default: 1)")
+    parser.add_argument("--read_batch", type=int, default=DEFAULT_READ_BATCH,
+                        help=f"Number of exported VPGs to read and hold in memory at a time (default: {DEFAULT_READ_BATCH})")
+    parser.add_argument("--previous", help="Previous ExportedSettings_<timestamp>.json to reuse unchanged VPGs from (optional)")
     return parser
 
 def ensure_output_dir(output_dir: str) -> None:
@@ -169,6 +486,14 @@ def ensure_output_dir(output_dir: str) -> None:
 def main():
     parser = setup_argparse()
     args = parser.parse_args()
+    if args.read_batch < 1:
+        parser.error("--read_batch must be at least 1")
+
+    # Setup logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
 
     try:
         # Ensure output directory exists
@@ -185,62 +510,25 @@ def main():
         else:
             logging.info("No VPG names provided, exporting all VPGs")
 
-        # Export VPG settings
+        # Export VPG settings and get the exported settings
         print("\nExporting VPG settings...")
-        export_result = client.vpgs.export_vpg_settings(vpg_names)
-        
-        if not export_result or 'TimeStamp' not in export_result:
-            logging.error("Failed to export VPG settings")
-            sys.exit(1)
-
-        timestamp = export_result['TimeStamp']
+        exported_at = datetime.now(timezone.utc)
+        if args.previous:
+            timestamp, vpgs = export_vpgs_incremental(client, args.previous, vpg_names, args.shards,
+                                                       args.read_batch)
+        else:
+            timestamp, vpgs = export_vpgs(client, vpg_names, args.shards, args.read_batch)
         safe_timestamp = get_safe_filename(timestamp)
         print(f"Export completed successfully. Timestamp: {timestamp}")
 
-        # Get the exported settings
-        export_settings = client.vpgs.read_exported_vpg_settings(timestamp, vpg_names)
-        
-        # Save the JSON export
+        # Save the JSON export and the CSV in one pass over the VPGs
         json_file_name = os.path.join(args.output_dir, f"ExportedSettings_{safe_timestamp}.json")
-        with open(json_file_name, 'w') as f:
-            json.dump(export_settings['ExportedVpgSettingsApi'], f, indent=2)
-        print(f"\nJSON export saved to: {json_file_name}")
-
-        # Convert to CSV
-        nic_settings = extract_nic_settings(export_settings['ExportedVpgSettingsApi'])
-        
-        # Create CSV file with Windows line endings
         csv_file_name = os.path.join(args.output_dir, f"ExportedSettings_{safe_timestamp}.csv")
-        fieldnames = [
-            'VPG Name', 'VM Identifier', 'NIC Identifier',
-            'Failover Network', 'Failover ShouldReplaceIpConfiguration', 'Failover DHCP',
-            'Failover IP', 'Failover Subnet', 'Failover Gateway',
-            'Failover DNS1', 'Failover DNS2',
-            'Failover Test Network', 'Failover Test ShouldReplaceIpConfiguration', 'Failover Test DHCP',
-            'Failover Test IP', 'Failover Test Subnet',
-            'Failover Test Gateway', 'Failover Test DNS1', 'Failover Test DNS2'
-        ]
-        
-        # Write CSV content directly
-        with open(csv_file_name, 'w', newline='') as f:
-            writer = csv.DictWriter(
-                f,
-                fieldnames=fieldnames,
-                delimiter=',',
-                quoting=csv.QUOTE_ALL,
-                quotechar='"',
-                lineterminator='\r\n'
-            )
-            writer.writeheader()
-            for row in nic_settings:
-                # Ensure all fields are present and properly formatted
-                for field in fieldnames:
-                    if field not in row:
-                        row[field] = ''
-                    # No need to convert boolean values since they're already strings
-                writer.writerow(row)
-        
-        print(f"CSV file created: {csv_file_name}")
+        hashes = {}
+        vpg_count, nic_count = write_export_files(vpgs, json_file_name, csv_file_name, hashes)
+        write_manifest(json_file_name, timestamp, exported_at, hashes)
+        print(f"\nJSON export saved to: {json_file_name} ({vpg_count} VPGs)")
+        print(f"CSV file created: {csv_file_name} ({nic_count} NICs)")
 
     except Exception as e:
         logging.exception("Error occurred:")
@@ -10,27 +10,28 @@
 # information, or other pecuniary loss) arising out of the use of or the inability to use the sample 
 # scripts or documentation, even if the author or Zerto has been advised of the possibility of such damages. 
 # The entire risk arising out of the use or performance of the sample scripts and documentation remains with you.
+from __future__ import annotations
+
 import argparse
 import logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 import json
 import csv
 import sys
 import os
 from pathlib import Path
-import urllib3
-from typing import List, Dict, Tuple
-from datetime import datetime
+from typing import TYPE_CHECKING, List, Dict, Tuple
+import collections
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-# Add parent directory to path to import zvml
+# Add parent directory to path to import prerequisites
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from zvml import ZVMLClient
+from prerequisites.client import create_client, DEFAULT_POOL_MAXSIZE
+from prerequisites.inventory_index import AmbiguousNameError, InventoryIndex
 
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# zvml is only imported once create_client() runs, so --help stays fast
+if TYPE_CHECKING:
+    from zvml import ZVMLClient
 
 
 """
@@ -65,7 +66,12 @@ Required Arguments:
     --client_secret: Keycloak client secret
     --ignore_ssl: Ignore SSL certificate verification (optional)
     --csv_file: Path to the CSV file with updated settings
-    --vpg_names: Comma-separated list of VPG names to update (optional)
+    --vpg_names: Comma-separated list of VPG names to update (optional, defaults to the VPGs in the CSV)
+    --max_workers: Number of VPGs to update in parallel (optional, default 1)
+    --max_per_site: Maximum parallel VPG updates per recovery site (optional)
+    --commit_timeout: Seconds to wait for commit tasks to finish (optional, default 1800)
+    --export_chunk_size: Maximum VPGs per settings export (optional, default 50)
+    --baseline: ExportedSettings_<timestamp>.json to compare against offline (optional)
 
 Example Usage:
     python import_vpg_settings_nics_from_csv.py \
@@ -89,37 +95,138 @@ prevent unintended changes.
 
 def setup_client(args):
     """Initialize and return Zerto client"""
-    client = ZVMLClient(
+    client = create_client(
         zvm_address=args.zvm_address,
         client_id=args.client_id,
         client_secret=args.client_secret,
-        verify_certificate=not args.ignore_ssl
+        verify_certificate=not args.ignore_ssl,
+        pool_maxsize=max(DEFAULT_POOL_MAXSIZE, args.max_workers * 2),
+        token_refresh=True,
+        max_concurrency=args.max_workers if args.max_workers > 1 else None
     )
     return client
 
-def read_csv_settings(csv_path: str) -> List[Dict]:
-    """Read settings from CSV file."""
+class VmNameCache:
+    """Identifier -> VM name index shared by validation, diffing and display.
+
+    The protected VM list is fetched once with a single client.vms.list_vms() call.
+    Identifiers missing from that list fall back to a per-VM lookup whose result is
+    remembered, so every VM is resolved over the API at most once per run.
+    Without a client (offline baseline mode) names are not resolved and None is returned.
+    """
+
+    def __init__(self, client: ZVMLClient = None):
+        self.client = client
+        self.names = {}
+        self.loaded = False
+        self.lookups = 0
+        self.api_calls = 0
+
+    def load(self):
+        """Fetch all protected VMs in one call and index them by identifier."""
+        vms = self.client.vms.list_vms()
+        self.api_calls += 1
+        if isinstance(vms, dict):
+            vms = [vms]
+        for vm in vms or []:
+            # A VM protected by several VPGs is listed once per VPG, keep the first entry
+            self.names.setdefault(vm.get('VmIdentifier'), vm.get('VmName'))
+        self.loaded = True
+        logging.info(f"VmNameCache: indexed {len(self.names)} VM names with 1 API call")
+
+    def get_name(self, vm_id: str):
+        """Return the VM name for vm_id, hitting the API only on a cache miss."""
+        self.lookups += 1
+        if self.client is None:
+            return None
+        if not self.loaded:
+            self.load()
+        if vm_id not in self.names:
+            vm = self.client.vms.list_vms(vm_identifier=vm_id)
+            self.api_calls += 1
+            self.names[vm_id] = vm.get('VmName') if vm else None
+        return self.names[vm_id]
+
+    @property
+    def calls_saved(self) -> int:
+        """Number of list_vms calls avoided compared to one call per lookup."""
+        return max(self.lookups - self.api_calls, 0)
+
+    def log_summary(self):
+        if self.client is None:
+            logging.info(f"VmNameCache: offline, {self.lookups} VM name lookups not resolved")
+            return
+        logging.info(f"VmNameCache: {self.lookups} VM name lookups, {self.api_calls} API calls, "
+                     f"{self.calls_saved} API calls saved")
+
+def read_csv_settings(csv_path: str) -> Tuple[List[Dict], List[str]]:
+    """Read settings from CSV file.
+
+    Returns the rows and the distinct VPG names they reference, in CSV order.
+    """
     settings = []
+    vpg_names = {}
     with open(csv_path, 'r', newline='') as f:
         reader = csv.DictReader(f)
         for row in reader:
             settings.append(row)
-    return settings
-
-def get_current_settings(client: ZVMLClient, vpg_names: List[str] = None) -> Tuple[str, List[Dict]]:
-    """Get current VPG settings and convert to CSV format."""
-    # Export current settings
-    export_result = client.vpgs.export_vpg_settings(vpg_names)
-    if not export_result or 'TimeStamp' not in export_result:
-        raise Exception("Failed to export VPG settings")
-    
-    timestamp = export_result['TimeStamp']
-    export_settings = client.vpgs.read_exported_vpg_settings(timestamp, vpg_names)
-    # logging.info(f"get_current_settings: export_settings: {json.dumps(export_settings, indent=4)}")
-    # Convert to CSV format
+            vpg_names[row['VPG Name']] = None
+    return settings, list(vpg_names)
+
+def get_current_settings(client: ZVMLClient, vpg_names: List[str] = None,
+                         chunk_size: int = 50) -> Tuple[str, List[Dict]]:
+    """Get current VPG settings and convert to CSV format.
+
+    When vpg_names is given the export is limited to those VPGs and split into
+    exports of at most chunk_size VPGs each. The timestamp of the first export is returned.
+    """
+    if vpg_names and chunk_size:
+        chunks = [vpg_names[i:i + chunk_size] for i in range(0, len(vpg_names), chunk_size)]
+    else:
+        chunks = [vpg_names]
+
+    timestamp = None
     nic_settings = []
-    for vpg in export_settings['ExportedVpgSettingsApi']:
+    for index, chunk in enumerate(chunks, 1):
+        if len(chunks) > 1:
+            logging.info(f"get_current_settings: Exporting chunk {index}/{len(chunks)} ({len(chunk)} VPGs)")
+        # Export current settings
+        export_result = client.vpgs.export_vpg_settings(chunk)
+        if not export_result or 'TimeStamp' not in export_result:
+            raise Exception("Failed to export VPG settings")
+
+        chunk_timestamp = export_result['TimeStamp']
+        timestamp = timestamp or chunk_timestamp
+        export_settings = client.vpgs.read_exported_vpg_settings(chunk_timestamp, chunk)
+        # logging.info(f"get_current_settings: export_settings: {json.dumps(export_settings, indent=4)}")
+        nic_settings.extend(exported_settings_to_rows(export_settings['ExportedVpgSettingsApi']))
+    return timestamp, nic_settings
+
+def load_baseline_settings(json_path: str, vpg_names: List[str] = None) -> Tuple[str, List[Dict]]:
+    """Get VPG settings from an ExportedSettings_<timestamp>.json file and convert to CSV format.
+
+    The file is the one written by export_vpg_settings_nics_to_csv.py, so no call is
+    made to the ZVM. The timestamp is taken from the file name.
+    """
+    with open(json_path, 'r') as f:
+        exported_vpgs = json.load(f)
+    if isinstance(exported_vpgs, dict):
+        exported_vpgs = exported_vpgs.get('ExportedVpgSettingsApi', [])
+
+    timestamp = Path(json_path).stem
+    if timestamp.startswith('ExportedSettings_'):
+        timestamp = timestamp[len('ExportedSettings_'):]
+    logging.info(f"load_baseline_settings: Loaded {len(exported_vpgs)} VPG(s) from {json_path}")
+    return timestamp, exported_settings_to_rows(exported_vpgs, vpg_names)
+
+def exported_settings_to_rows(exported_vpgs: List[Dict], vpg_names: List[str] = None) -> List[Dict]:
+    """Convert ExportedVpgSettingsApi entries to CSV rows, optionally limited to vpg_names."""
+    wanted = set(vpg_names) if vpg_names else None
+    nic_settings = []
+    for vpg in exported_vpgs:
         vpg_name = vpg['Basic']['Name']
+        if wanted and vpg_name not in wanted:
+            continue
         for vm in vpg['Vms']:
             vm_id = vm['VmIdentifier']
             for nic in vm['Nics']:
@@ -158,7 +265,7 @@ def get_current_settings(client: ZVMLClient, vpg_names: List[str] = None) -> Tup
                 }
                 nic_settings.append(row)
     
-    return timestamp, nic_settings
+    return nic_settings
 
 def normalize_value(value):
     """Normalize values for comparison."""
@@ -175,9 +282,11 @@ def normalize_value(value):
             return 'false'
     return str(value)
 
-def compare_settings(client, current: List[Dict], updated: List[Dict]) -> List[Dict]:
+def compare_settings(client, current: List[Dict], updated: List[Dict], vm_names: VmNameCache = None) -> List[Dict]:
     """Compare current and updated settings and return changes."""
     changes = []
+    if vm_names is None:
+        vm_names = VmNameCache(client)
     
     # Create lookup dictionaries for faster comparison
     current_lookup = {
@@ -185,10 +294,15 @@ def compare_settings(client, current: List[Dict], updated: List[Dict]) -> List[D
         for row in current
     }
     
+    def describe_vm(vm_id: str) -> str:
+        # Offline (baseline mode) names are not resolved, so only the identifier is shown
+        vm_name = vm_names.get_name(vm_id)
+        if vm_name is None:
+            return f"VM ID '{vm_id}'"
+        return f"VM Name '{vm_name}', VM ID '{vm_id}'"
+
     def validate_dhcp_settings(client, row: Dict, vpg_name: str, vm_id: str, nic_id: str):
         """Validate that DHCP and IP settings are not conflicting."""
-        vm_name = client.vms.list_vms(vm_identifier=vm_id).get('VmName')
-
         def validate_ip_settings(prefix: str):
             should_replace = normalize_value(row.get(f'{prefix} ShouldReplaceIpConfiguration', '')) == 'true'
             dhcp = normalize_value(row.get(f'{prefix} DHCP', '')) == 'true'
@@ -196,21 +310,21 @@ def compare_settings(client, current: List[Dict], updated: List[Dict]) -> List[D
 
             if not should_replace and (dhcp or has_static_ip):
                 raise ValueError(
-                    f"Invalid configuration for VPG '{vpg_name}', VM Name '{vm_name}', VM ID '{vm_id}', NIC '{nic_id}': "
+                    f"Invalid configuration for VPG '{vpg_name}', {describe_vm(vm_id)}, NIC '{nic_id}': "
                     f"{prefix} ShouldReplaceIpConfiguration is False but IP settings are present. "
                     f"Set ShouldReplaceIpConfiguration to True to modify IP settings."
                 )
 
             if should_replace and not dhcp and not has_static_ip:
                 raise ValueError(
-                    f"Invalid configuration for VPG '{vpg_name}', VM Name '{vm_name}', VM ID '{vm_id}', NIC '{nic_id}': "
+                    f"Invalid configuration for VPG '{vpg_name}', {describe_vm(vm_id)}, NIC '{nic_id}': "
                     f"{prefix} ShouldReplaceIpConfiguration is True but no IP configuration is provided. "
                     f"Either set DHCP=True or provide IP configuration (IP, Subnet, Gateway, DNS1, DNS2)."
                 )
 
             if dhcp and has_static_ip:
                 raise ValueError(
-                    f"Invalid configuration for VPG '{vpg_name}', VM Name '{vm_name}', VM ID '{vm_id}', NIC '{nic_id}': "
+                    f"Invalid configuration for VPG '{vpg_name}', {describe_vm(vm_id)}, NIC '{nic_id}': "
                     f"Cannot have {prefix} DHCP=True and static IP settings. "
                     f"Please remove static IP settings or set DHCP=False."
                 )
@@ -251,7 +365,7 @@ def compare_settings(client, current: List[Dict], updated: List[Dict]) -> List[D
                     }
             
             if row_changes:
-                vm_name = client.vms.list_vms(vm_identifier=updated_row['VM Identifier']).get('VmName')
+                vm_name = vm_names.get_name(updated_row['VM Identifier'])
                 logging.info(f"compare_settings: vm_name {vm_name}")
 
                 changes.append({
@@ -264,8 +378,10 @@ def compare_settings(client, current: List[Dict], updated: List[Dict]) -> List[D
     
     return changes
 
-def display_changes(client, changes: List[Dict]):
+def display_changes(client, changes: List[Dict], vm_names: VmNameCache = None):
     """Display changes in a user-friendly format."""
+    if vm_names is None:
+        vm_names = VmNameCache(client)
     if not changes:
         print("\nNo changes found in the CSV file.")
         return
@@ -315,8 +431,11 @@ def display_changes(client, changes: List[Dict]):
             if not has_vm_changes:
                 continue
 
-            vm_name = client.vms.list_vms(vm_identifier=vm_id).get('VmName')
-            print(f"  VM name: {vm_name}, VM ID: {vm_id}")
+            vm_name = vm_names.get_name(vm_id)
+            if vm_name is None:
+                print(f"  VM ID: {vm_id}")
+            else:
+                print(f"  VM name: {vm_name}, VM ID: {vm_id}")
             
             for nic_id, changes in nic_changes.items():
                 # Skip NICs with no actual changes
@@ -336,182 +455,435 @@ def display_changes(client, changes: List[Dict]):
     print("=" * 80)
     print(f"\nTotal changes: {len(changes)} NIC(s) across {len(vpg_changes)} VPG(s)")
 
-def update_vpg_settings(client: ZVMLClient, changes: List[Dict]):
-    """Update VPG settings based on changes."""
-    # Group changes by VPG
-    vpg_changes = {}
-    for change in changes:
-        vpg_name = change['VPG Name']
-        if vpg_name not in vpg_changes:
-            vpg_changes[vpg_name] = []
-        vpg_changes[vpg_name].append(change)
-    
-    # Process each VPG
-    for vpg_name, vpg_change_list in vpg_changes.items():
-        logging.info(f"update_vpg_settings: Processing VPG: {vpg_name}")
-        logging.info(f"update_vpg_settings: VPG change list: {json.dumps(vpg_change_list, indent=4)}")
-        
-        # Get VPG identifier
+def apply_nic_change(nic: Dict, change: Dict):
+    """Apply the changed CSV fields of one NIC to its VPG settings NIC structure."""
+    # Initialize structures if needed
+    if not nic.get('Failover'):
+        nic['Failover'] = {'Hypervisor': {}}
+    if not nic.get('FailoverTest'):
+        nic['FailoverTest'] = {'Hypervisor': {}}
+
+    # Process each change for this NIC
+    for field, values in change['changes'].items():
+        # Handle Failover settings
+        if field in ['Failover Network', 'Failover ShouldReplaceIpConfiguration', 'Failover IP', 
+                   'Failover Subnet', 'Failover Gateway', 'Failover DNS1', 'Failover DNS2', 
+                   'Failover DHCP']:
+            if field == 'Failover ShouldReplaceIpConfiguration':
+                nic['Failover']['Hypervisor']['ShouldReplaceIpConfiguration'] = normalize_value(values['updated']) == 'true'
+            elif field == 'Failover Network':
+                nic['Failover']['Hypervisor']['NetworkIdentifier'] = values['updated']
+            elif field == 'Failover DHCP':
+                if not nic['Failover']['Hypervisor'].get('IpConfig'):
+                    nic['Failover']['Hypervisor']['IpConfig'] = {
+                        'StaticIp': None,
+                        'SubnetMask': None,
+                        'Gateway': None,
+                        'PrimaryDns': None,
+                        'SecondaryDns': None,
+                        'IsDhcp': False
+                    }
+                nic['Failover']['Hypervisor']['IpConfig']['IsDhcp'] = normalize_value(values['updated']) == 'true'
+                # If DHCP is enabled, clear other IP settings
+                if normalize_value(values['updated']) == 'true':
+                    nic['Failover']['Hypervisor']['IpConfig'].update({
+                        'StaticIp': None,
+                        'SubnetMask': None,
+                        'Gateway': None,
+                        'PrimaryDns': None,
+                        'SecondaryDns': None
+                    })
+            elif field in ['Failover IP', 'Failover Subnet', 'Failover Gateway', 
+                         'Failover DNS1', 'Failover DNS2']:
+                if not nic['Failover']['Hypervisor'].get('IpConfig'):
+                    nic['Failover']['Hypervisor']['IpConfig'] = {
+                        'StaticIp': None,
+                        'SubnetMask': None,
+                        'Gateway': None,
+                        'PrimaryDns': None,
+                        'SecondaryDns': None,
+                        'IsDhcp': False
+                    }
+                if field == 'Failover IP':
+                    nic['Failover']['Hypervisor']['IpConfig']['StaticIp'] = values['updated'] if values['updated'] else None
+                elif field == 'Failover Subnet':
+                    nic['Failover']['Hypervisor']['IpConfig']['SubnetMask'] = values['updated'] if values['updated'] else '255.255.255.0'
+                elif field == 'Failover Gateway':
+                    nic['Failover']['Hypervisor']['IpConfig']['Gateway'] = values['updated'] if values['updated'] else None
+                elif field == 'Failover DNS1':
+                    nic['Failover']['Hypervisor']['IpConfig']['PrimaryDns'] = values['updated'] if values['updated'] else None
+                elif field == 'Failover DNS2':
+                    nic['Failover']['Hypervisor']['IpConfig']['SecondaryDns'] = values['updated'] if values['updated'] else None
+
+        # Handle Failover Test settings
+        elif field in ['Failover Test Network', 'Failover Test ShouldReplaceIpConfiguration', 
+                     'Failover Test IP', 'Failover Test Subnet', 'Failover Test Gateway', 
+                     'Failover Test DNS1', 'Failover Test DNS2', 'Failover Test DHCP']:
+            if field == 'Failover Test ShouldReplaceIpConfiguration':
+                nic['FailoverTest']['Hypervisor']['ShouldReplaceIpConfiguration'] = normalize_value(values['updated']) == 'true'
+            elif field == 'Failover Test Network':
+                nic['FailoverTest']['Hypervisor']['NetworkIdentifier'] = values['updated']
+            elif field == 'Failover Test DHCP':
+                if not nic['FailoverTest']['Hypervisor'].get('IpConfig'):
+                    nic['FailoverTest']['Hypervisor']['IpConfig'] = {
+                        'StaticIp': None,
+                        'SubnetMask': None,
+                        'Gateway': None,
+                        'PrimaryDns': None,
+                        'SecondaryDns': None,
+                        'IsDhcp': False
+                    }
+                nic['FailoverTest']['Hypervisor']['IpConfig']['IsDhcp'] = normalize_value(values['updated']) == 'true'
+                # If DHCP is enabled, clear other IP settings
+                if normalize_value(values['updated']) == 'true':
+                    nic['FailoverTest']['Hypervisor']['IpConfig'].update({
+                        'StaticIp': None,
+                        'SubnetMask': None,
+                        'Gateway': None,
+                        'PrimaryDns': None,
+                        'SecondaryDns': None
+                    })
+            elif field in ['Failover Test IP', 'Failover Test Subnet', 'Failover Test Gateway', 
+                         'Failover Test DNS1', 'Failover Test DNS2']:
+                if not nic['FailoverTest']['Hypervisor'].get('IpConfig'):
+                    nic['FailoverTest']['Hypervisor']['IpConfig'] = {
+                        'StaticIp': None,
+                        'SubnetMask': None,
+                        'Gateway': None,
+                        'PrimaryDns': None,
+                        'SecondaryDns': None,
+                        'IsDhcp': False
+                    }
+                if field == 'Failover Test IP':
+                    nic['FailoverTest']['Hypervisor']['IpConfig']['StaticIp'] = values['updated'] if values['updated'] else None
+                elif field == 'Failover Test Subnet':
+                    nic['FailoverTest']['Hypervisor']['IpConfig']['SubnetMask'] = values['updated'] if values['updated'] else '255.255.255.0'
+                elif field == 'Failover Test Gateway':
+                    nic['FailoverTest']['Hypervisor']['IpConfig']['Gateway'] = values['updated'] if values['updated'] else None
+                elif field == 'Failover Test DNS1':
+                    nic['FailoverTest']['Hypervisor']['IpConfig']['PrimaryDns'] = values['updated'] if values['updated'] else None
+                elif field == 'Failover Test DNS2':
+                    nic['FailoverTest']['Hypervisor']['IpConfig']['SecondaryDns'] = values['updated'] if values['updated'] else None
+
+class VpgSettingsIndex:
+    """(VmIdentifier, NicIdentifier) -> NIC index over a VPG settings document.
+
+    The index is built with one pass over vpg_settings['Vms'] and references the
+    NIC dicts in place, so changes applied through it edit the settings document
+    that is later sent back with update_vpg_settings.
+    """
+
+    def __init__(self, vpg_settings: Dict):
+        self.vpg_settings = vpg_settings
+        self.vm_ids = set()
+        self.nics = {}
+        for vm in vpg_settings.get('Vms') or []:
+            self.vm_ids.add(vm['VmIdentifier'])
+            for nic in vm.get('Nics') or []:
+                self.nics[(vm['VmIdentifier'], nic['NicIdentifier'])] = nic
+
+    def get_nic(self, vm_id: str, nic_id: str) -> Dict:
+        """Return the NIC settings dict or None if the VM or NIC is not in the VPG."""
+        return self.nics.get((vm_id, nic_id))
+
+    def apply_changes(self, change_list: List[Dict]) -> Tuple[int, int]:
+        """Apply compare_settings changes of this VPG and return (applied, not found) counts."""
+        applied = 0
+        missing = 0
+        for change in change_list:
+            vm_id = change['VM Identifier']
+            nic_id = change['NIC Identifier']
+            nic = self.get_nic(vm_id, nic_id)
+            if nic is None:
+                if vm_id not in self.vm_ids:
+                    logging.error(f"update_vpg_settings: VM {vm_id} not found in VPG {change['VPG Name']}")
+                else:
+                    logging.error(f"update_vpg_settings: NIC {nic_id} not found in VM {vm_id}")
+                missing += 1
+                continue
+            logging.debug(f"update_vpg_settings: Found NIC: {nic_id} in VM {change.get('VM Name')} VPG {change['VPG Name']}")
+            apply_nic_change(nic, change)
+            applied += 1
+        return applied, missing
+
+def get_recovery_site_identifier(vpg_info: Dict) -> str:
+    """Return the recovery site identifier of a VPG as listed by client.vpgs.list_vpgs."""
+    recovery_site = vpg_info.get('RecoverySite')
+    if isinstance(recovery_site, dict):
+        return recovery_site.get('identifier') or recovery_site.get('Identifier')
+    return vpg_info.get('RecoverySiteIdentifier') or recovery_site
+
+class SiteScheduler:
+    """Hands out VPGs in CSV order, with at most max_per_site running per recovery site.
+
+    VPGs are queued per recovery site and only handed out while their site has a free
+    slot, so a worker never waits for a busy site while VPGs of other sites are queued.
+    """
+
+    def __init__(self, max_per_site: int = None):
+        if max_per_site is not None and max_per_site < 1:
+            raise ValueError("max_per_site must be at least 1")
+        self.max_per_site = max_per_site
+        self.queues = {}
+        self.running = {}
+        self.queued = 0
+
+    def add(self, site_identifier: str, vpg_name: str):
+        """Queue a VPG behind the earlier VPGs of its recovery site."""
+        self.queues.setdefault(site_identifier, collections.deque()).append((self.queued, vpg_name))
+        self.queued += 1
+
+    def next(self) -> Tuple[str, str]:
+        """Return the site and name of the earliest queued VPG whose site has a free slot, or None."""
+        ready = [
+            site for site, waiting in self.queues.items()
+            if waiting and (self.max_per_site is None or self.running.get(site, 0) < self.max_per_site)
+        ]
+        if not ready:
+            return None
+        site = min(ready, key=lambda site: self.queues[site][0][0])
+        self.running[site] = self.running.get(site, 0) + 1
+        return site, self.queues[site].popleft()[1]
+
+    def done(self, site_identifier: str):
+        """Free the slot of a VPG handed out by next()."""
+        self.running[site_identifier] -= 1
+
+def new_update_result(vpg_name: str) -> Dict:
+    """Return the result record of a VPG that has not been updated yet."""
+    return {'VPG Name': vpg_name, 'Status': 'Failed', 'Error': None, 'Task': None, 'Duration': 0.0,
+            'Commit Started': None, 'Commit Status': None, 'Commit Duration': None}
+
+def find_vpg(client: ZVMLClient, vpg_name: str, inventory: InventoryIndex = None) -> Dict:
+    """Return the list_vpgs entry of a VPG, or None if it does not exist.
+
+    The VPG is looked up in the inventory's VPG name index, which lists the VPGs once for
+    all of them; without an inventory, or for a VPG created since, it is looked up by name.
+    """
+    vpg_info = inventory.vpgs().find(vpg_name) if inventory else None
+    if not vpg_info:
         vpg_info = client.vpgs.list_vpgs(vpg_name=vpg_name)
-        if not vpg_info:
-            logging.error(f"update_vpg_settings: VPG {vpg_name} not found")
-            continue
-        vpg_identifier = vpg_info['VpgIdentifier']
-        
+    return vpg_info or None
+
+def update_single_vpg(client: ZVMLClient, vpg_name: str, vpg_info: Dict, vpg_change_list: List[Dict],
+                      result: Dict = None) -> Dict:
+    """Run the settings transaction (create, edit, update, commit) for one VPG and return its result."""
+    if result is None:
+        result = new_update_result(vpg_name)
+    started = time.monotonic()
+    logging.info(f"update_vpg_settings: Processing VPG: {vpg_name}")
+    logging.info(f"update_vpg_settings: VPG change list: {json.dumps(vpg_change_list, indent=4)}")
+
+    try:
         # Create new VPG settings
-        vpg_settings_id = client.vpgs.create_vpg_settings(vpg_identifier=vpg_identifier)
+        vpg_settings_id = client.vpgs.create_vpg_settings(vpg_identifier=vpg_info['VpgIdentifier'])
         vpg_settings = client.vpgs.get_vpg_settings_by_id(vpg_settings_id)
         logging.info(f"update_vpg_settings: VPG settings: {json.dumps(vpg_settings, indent=4)}")
 
-        # Process each NIC change
-        for change in vpg_change_list:
-            vm_id = change['VM Identifier']
-            nic_id = change['NIC Identifier']
-            vm_name = change['VM Name']
-            logging.info(f"update_vpg_settings: Processing NIC: {nic_id} for VM: {vm_name} VM ID: {vm_id}")
-            # Find the VM and NIC in the settings
-            vm = None
-            for v in vpg_settings['Vms']:
-                if v['VmIdentifier'] == vm_id:
-                    vm = v
-                    # logging.info(f"update_vpg_settings: Found VM: {vm_id} in VPG {vpg_name} vm={json.dumps(vm, indent=4)}")
-                    break
-            
-            if not vm:
-                logging.error(f"update_vpg_settings: VM {vm_id} not found in VPG {vpg_name}")
-                continue
-            
-            # Find the NIC
-            nic = None
-            for n in vm['Nics']:
-                if n['NicIdentifier'] == nic_id:
-                    nic = n
-                    logging.info(f"update_vpg_settings: Found NIC: {nic_id} in VM {vm_name} VPG {vpg_name} nic={json.dumps(nic, indent=4)}") 
-                    break
-            
-            if not nic:
-                logging.error(f"update_vpg_settings: NIC {nic_id} not found in VM {vm_id}")
-                continue
-            
-            # Initialize structures if needed
-            if not nic.get('Failover'):
-                nic['Failover'] = {'Hypervisor': {}}
-            if not nic.get('FailoverTest'):
-                nic['FailoverTest'] = {'Hypervisor': {}}
-
-            # Process each change for this NIC
-            for field, values in change['changes'].items():
-                # Handle Failover settings
-                if field in ['Failover Network', 'Failover ShouldReplaceIpConfiguration', 'Failover IP', 
-                           'Failover Subnet', 'Failover Gateway', 'Failover DNS1', 'Failover DNS2', 
-                           'Failover DHCP']:
-                    if field == 'Failover ShouldReplaceIpConfiguration':
-                        nic['Failover']['Hypervisor']['ShouldReplaceIpConfiguration'] = normalize_value(values['updated']) == 'true'
-                    elif field == 'Failover Network':
-                        nic['Failover']['Hypervisor']['NetworkIdentifier'] = values['updated']
-                    elif field == 'Failover DHCP':
-                        if not nic['Failover']['Hypervisor'].get('IpConfig'):
-                            nic['Failover']['Hypervisor']['IpConfig'] = {
-                                'StaticIp': None,
-                                'SubnetMask': None,
-                                'Gateway': None,
-                                'PrimaryDns': None,
-                                'SecondaryDns': None,
-                                'IsDhcp': False
-                            }
-                        nic['Failover']['Hypervisor']['IpConfig']['IsDhcp'] = normalize_value(values['updated']) == 'true'
-                        # If DHCP is enabled, clear other IP settings
-                        if normalize_value(values['updated']) == 'true':
-                            nic['Failover']['Hypervisor']['IpConfig'].update({
-                                'StaticIp': None,
-                                'SubnetMask': None,
-                                'Gateway': None,
-                                'PrimaryDns': None,
-                                'SecondaryDns': None
-                            })
-                    elif field in ['Failover IP', 'Failover Subnet', 'Failover Gateway', 
-                                 'Failover DNS1', 'Failover DNS2']:
-                        if not nic['Failover']['Hypervisor'].get('IpConfig'):
-                            nic['Failover']['Hypervisor']['IpConfig'] = {
-                                'StaticIp': None,
-                                'SubnetMask': None,
-                                'Gateway': None,
-                                'PrimaryDns': None,
-                                'SecondaryDns': None,
-                                'IsDhcp': False
-                            }
-                        if field == 'Failover IP':
-                            nic['Failover']['Hypervisor']['IpConfig']['StaticIp'] = values['updated'] if values['updated'] else None
-                        elif field == 'Failover Subnet':
-                            nic['Failover']['Hypervisor']['IpConfig']['SubnetMask'] = values['updated'] if values['updated'] else '255.255.255.0'
-                        elif field == 'Failover Gateway':
-                            nic['Failover']['Hypervisor']['IpConfig']['Gateway'] = values['updated'] if values['updated'] else None
-                        elif field == 'Failover DNS1':
-                            nic['Failover']['Hypervisor']['IpConfig']['PrimaryDns'] = values['updated'] if values['updated'] else None
-                        elif field == 'Failover DNS2':
-                            nic['Failover']['Hypervisor']['IpConfig']['SecondaryDns'] = values['updated'] if values['updated'] else None
-
-                # Handle Failover Test settings
-                elif field in ['Failover Test Network', 'Failover Test ShouldReplaceIpConfiguration', 
-                             'Failover Test IP', 'Failover Test Subnet', 'Failover Test Gateway', 
-                             'Failover Test DNS1', 'Failover Test DNS2', 'Failover Test DHCP']:
-                    if field == 'Failover Test ShouldReplaceIpConfiguration':
-                        nic['FailoverTest']['Hypervisor']['ShouldReplaceIpConfiguration'] = normalize_value(values['updated']) == 'true'
-                    elif field == 'Failover Test Network':
-                        nic['FailoverTest']['Hypervisor']['NetworkIdentifier'] = values['updated']
-                    elif field == 'Failover Test DHCP':
-                        if not nic['FailoverTest']['Hypervisor'].get('IpConfig'):
-                            nic['FailoverTest']['Hypervisor']['IpConfig'] = {
-                                'StaticIp': None,
-                                'SubnetMask': None,
-                                'Gateway': None,
-                                'PrimaryDns': None,
-                                'SecondaryDns': None,
-                                'IsDhcp': False
-                            }
-                        nic['FailoverTest']['Hypervisor']['IpConfig']['IsDhcp'] = normalize_value(values['updated']) == 'true'
-                        # If DHCP is enabled, clear other IP settings
-                        if normalize_value(values['updated']) == 'true':
-                            nic['FailoverTest']['Hypervisor']['IpConfig'].update({
-                                'StaticIp': None,
-                                'SubnetMask': None,
-                                'Gateway': None,
-                                'PrimaryDns': None,
-                                'SecondaryDns': None
-                            })
-                    elif field in ['Failover Test IP', 'Failover Test Subnet', 'Failover Test Gateway', 
-                                 'Failover Test DNS1', 'Failover Test DNS2']:
-                        if not nic['FailoverTest']['Hypervisor'].get('IpConfig'):
-                            nic['FailoverTest']['Hypervisor']['IpConfig'] = {
-                                'StaticIp': None,
-                                'SubnetMask': None,
-                                'Gateway': None,
-                                'PrimaryDns': None,
-                                'SecondaryDns': None,
-                                'IsDhcp': False
-                            }
-                        if field == 'Failover Test IP':
-                            nic['FailoverTest']['Hypervisor']['IpConfig']['StaticIp'] = values['updated'] if values['updated'] else None
-                        elif field == 'Failover Test Subnet':
-                            nic['FailoverTest']['Hypervisor']['IpConfig']['SubnetMask'] = values['updated'] if values['updated'] else '255.255.255.0'
-                        elif field == 'Failover Test Gateway':
-                            nic['FailoverTest']['Hypervisor']['IpConfig']['Gateway'] = values['updated'] if values['updated'] else None
-                        elif field == 'Failover Test DNS1':
-                            nic['FailoverTest']['Hypervisor']['IpConfig']['PrimaryDns'] = values['updated'] if values['updated'] else None
-                        elif field == 'Failover Test DNS2':
-                            nic['FailoverTest']['Hypervisor']['IpConfig']['SecondaryDns'] = values['updated'] if values['updated'] else None
-
-            logging.info(f"update_vpg_settings: Updated NIC structure: VPG {vpg_name} VM {vm_name} NIC {nic_id} nic={json.dumps(nic, indent=4)}")
-        
+        # Index the VMs and NICs once, then apply all of this VPG's changes through it
+        settings_index = VpgSettingsIndex(vpg_settings)
+        applied, missing = settings_index.apply_changes(vpg_change_list)
+        logging.info(f"update_vpg_settings: Applied {applied} NIC change(s) to VPG {vpg_name}, {missing} not found")
+
         # Update VPG settings with all changes
         logging.info(f"update_vpg_settings: Updating VPG settings for {vpg_name}")
         logging.info(f"update_vpg_settings: VPG settings: {json.dumps(vpg_settings, indent=4)}")
         client.vpgs.update_vpg_settings(vpg_settings_id, vpg_settings)
-        
+
         # Commit changes
         logging.info(f"update_vpg_settings: Committing changes for VPG: {vpg_name}")
-        client.vpgs.commit_vpg(vpg_settings_id, vpg_name, sync=False)
+        result['Commit Started'] = time.monotonic()
+        result['Task'] = client.vpgs.commit_vpg(vpg_settings_id, vpg_name, sync=False)
+        result['Status'] = 'Committed'
         logging.info(f"update_vpg_settings: Successfully updated VPG: {vpg_name}")
+    except Exception as e:
+        logging.exception(f"update_vpg_settings: Failed to update VPG: {vpg_name}")
+        result['Error'] = str(e)
+    finally:
+        result['Duration'] = time.monotonic() - started
+    return result
+
+def update_vpg_settings(client: ZVMLClient, changes: List[Dict], max_workers: int = 1,
+                        max_per_site: int = None) -> Dict[str, Dict]:
+    """Update VPG settings based on changes.
+
+    Each VPG is an independent settings transaction, so up to max_workers VPGs are
+    processed in parallel, with at most max_per_site of them targeting the same
+    recovery site. Returns the result of every VPG keyed by VPG name; a failing VPG
+    is recorded there instead of aborting the others.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    scheduler = SiteScheduler(max_per_site)
+
+    # Group changes by VPG
+    vpg_changes = {}
+    for change in changes:
+        vpg_name = change['VPG Name']
+        if vpg_name not in vpg_changes:
+            vpg_changes[vpg_name] = []
+        vpg_changes[vpg_name].append(change)
+
+    # Results are created up front so the summary matches the CSV order
+    inventory = InventoryIndex(client)
+    results = {}
+    vpg_infos = {}
+    for vpg_name in vpg_changes:
+        result = results[vpg_name] = new_update_result(vpg_name)
+        try:
+            vpg_infos[vpg_name] = find_vpg(client, vpg_name, inventory)
+        except AmbiguousNameError as e:
+            logging.error(f"update_vpg_settings: {e}")
+            result.update({'Status': 'Ambiguous', 'Error': str(e)})
+            continue
+        except Exception as e:
+            logging.exception(f"update_vpg_settings: Failed to look up VPG: {vpg_name}")
+            result['Error'] = str(e)
+            continue
+        if not vpg_infos[vpg_name]:
+            logging.error(f"update_vpg_settings: VPG {vpg_name} not found")
+            result.update({'Status': 'NotFound', 'Error': f"VPG {vpg_name} not found"})
+            continue
+        scheduler.add(get_recovery_site_identifier(vpg_infos[vpg_name]), vpg_name)
+
+    # Only VPGs whose recovery site has a free slot are submitted, so no worker is idle
+    # behind a busy site; when one finishes, the next VPG that may run is submitted
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while True:
+            while len(running) < max_workers:
+                scheduled = scheduler.next()
+                if scheduled is None:
+                    break
+                site_identifier, vpg_name = scheduled
+                future = executor.submit(update_single_vpg, client, vpg_name, vpg_infos[vpg_name],
+                                         vpg_changes[vpg_name], results[vpg_name])
+                running[future] = site_identifier
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                scheduler.done(running.pop(future))
+                future.result()
+    return results
+
+# Zerto task states as reported in task['Status']['State']
+TASK_STATES = {
+    0: 'InProgress',
+    1: 'WaitingForUserInput',
+    2: 'Paused',
+    3: 'Failed',
+    4: 'Stopped',
+    5: 'Cancelling',
+    6: 'Completed'
+}
+TASK_FINAL_STATES = {'Failed', 'Stopped', 'Completed'}
+
+class CommitTaskTracker:
+    """Tracks the tasks returned by non-blocking commit_vpg calls.
+
+    All pending tasks are polled together: every round lists the ZVM tasks once and
+    matches them against the tracked identifiers, so the number of requests does not
+    grow with the number of VPGs. The poll interval backs off while nothing changes
+    and drops back to the minimum as soon as a task finishes.
+    """
+
+    def __init__(self, client: ZVMLClient, min_interval: float = 1.0, max_interval: float = 15.0,
+                 backoff: float = 1.5, timeout: float = 1800.0):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.pending = {}
+        self.api_calls = 0
+
+    def track(self, result: Dict):
+        """Register the commit task of an update_single_vpg result."""
+        if result['Status'] != 'Committed':
+            return
+        if not result['Task']:
+            result['Commit Status'] = 'Untracked'
+            return
+        result['Commit Status'] = 'InProgress'
+        self.pending[result['Task']] = result
+
+    def poll_once(self) -> int:
+        """Refresh the state of all pending tasks and return how many of them finished."""
+        tasks = self.client.tasks.list_tasks()
+        self.api_calls += 1
+        if isinstance(tasks, dict):
+            tasks = [tasks]
+        by_id = {task.get('TaskIdentifier'): task for task in tasks or []}
+
+        finished = 0
+        for task_id, result in list(self.pending.items()):
+            task = by_id.get(task_id)
+            if task is None:
+                # Not in the listing (e.g. already rotated out), ask for it directly
+                task = self.client.tasks.list_tasks(task_identifier=task_id)
+                self.api_calls += 1
+            status = (task or {}).get('Status') or {}
+            state = TASK_STATES.get(status.get('State'), 'InProgress')
+            result['Commit Status'] = state
+            if state in TASK_FINAL_STATES:
+                result['Commit Duration'] = time.monotonic() - result['Commit Started']
+                del self.pending[task_id]
+                finished += 1
+                log = logging.info if state == 'Completed' else logging.error
+                log(f"CommitTaskTracker: VPG {result['VPG Name']} commit {state} "
+                    f"after {result['Commit Duration']:.1f}s")
+        return finished
+
+    def wait(self):
+        """Poll until every tracked task is final or the timeout expires.
+
+        A failed poll is logged and retried after the backoff, so one failing task listing
+        does not lose the state of commits that were already submitted. Tasks still pending
+        at the deadline are marked TimedOut, or Unknown if the last poll failed.
+        """
+        deadline = time.monotonic() + self.timeout
+        interval = self.min_interval
+        poll_failed = False
+        while self.pending:
+            try:
+                finished = self.poll_once()
+                poll_failed = False
+            except Exception as e:
+                logging.warning(f"CommitTaskTracker: polling commit tasks failed: {e}")
+                finished = 0
+                poll_failed = True
+            if finished:
+                interval = self.min_interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+            if not self.pending:
+                break
+            if time.monotonic() >= deadline:
+                for result in self.pending.values():
+                    result['Commit Status'] = 'Unknown' if poll_failed else 'TimedOut'
+                    logging.error(f"CommitTaskTracker: VPG {result['VPG Name']} commit did not finish "
+                                  f"within {self.timeout:.0f}s")
+                self.pending.clear()
+                break
+            logging.info(f"CommitTaskTracker: {len(self.pending)} commit(s) pending, next poll in {interval:.1f}s")
+            time.sleep(interval)
+        logging.info(f"CommitTaskTracker: finished with {self.api_calls} task API calls")
+
+def display_update_results(results: Dict[str, Dict]):
+    """Display the per-VPG outcome of update_vpg_settings."""
+    print("\nVPG update results:")
+    print("=" * 80)
+    for vpg_name, result in results.items():
+        line = f"  {vpg_name}: {result['Status']} ({result['Duration']:.1f}s)"
+        if result['Commit Status']:
+            line += f", commit {result['Commit Status']}"
+        if result['Commit Duration'] is not None:
+            line += f" ({result['Commit Duration']:.1f}s)"
+        if result['Error']:
+            line += f" - {result['Error']}"
+        print(line)
+    print("=" * 80)
 
 def main():
     parser = argparse.ArgumentParser(description="Import VPG settings from CSV")
@@ -521,40 +893,63 @@ def main():
     parser.add_argument("--ignore_ssl", action="store_true", help="Ignore SSL certificate verification")
     parser.add_argument("--csv_file", required=True, help="Path to the CSV file with updated settings")
     parser.add_argument("--vpg_names", help="Comma-separated list of VPG names to update (optional)")
+    parser.add_argument("--max_workers", type=int, default=1, help="Number of VPGs to update in parallel (default: 1)")
+    parser.add_argument("--max_per_site", type=int, help="Maximum parallel VPG updates per recovery site (optional)")
+    parser.add_argument("--commit_timeout", type=float, default=1800, help="Seconds to wait for commit tasks to finish (default: 1800)")
+    parser.add_argument("--export_chunk_size", type=int, default=50, help="Maximum VPGs per settings export (default: 50)")
+    parser.add_argument("--baseline", help="ExportedSettings_<timestamp>.json to diff against instead of exporting from the ZVM (optional)")
     args = parser.parse_args()
+    if args.max_workers < 1:
+        parser.error("--max_workers must be at least 1")
+    if args.max_per_site is not None and args.max_per_site < 1:
+        parser.error("--max_per_site must be at least 1")
+
+    # Setup logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
 
     try:
-        # Setup client
-        client = setup_client(args)
+        # With a baseline file validation, diffing and display run without connecting to the ZVM
+        client = None if args.baseline else setup_client(args)
 
-        # Process VPG names if provided
-        vpg_names = None
+        # Read updated settings from CSV
+        print("\nReading updated settings from CSV...")
+        updated_settings, csv_vpg_names = read_csv_settings(args.csv_file)
+        # logging.info(f"Updated settings: {updated_settings}")
+
+        # Process VPG names if provided, otherwise only export the VPGs the CSV references
         if args.vpg_names:
             vpg_names = [name.strip() for name in args.vpg_names.split(',')]
             logging.info(f"Updating settings for VPGs: {json.dumps(vpg_names, indent=4)}")
         else:
-            logging.info("No VPG names provided, will update all VPGs in the CSV file")
-
-        # Read updated settings from CSV
-        print("\nReading updated settings from CSV...")
-        updated_settings = read_csv_settings(args.csv_file)
-        # logging.info(f"Updated settings: {updated_settings}")
+            vpg_names = csv_vpg_names or None
+            logging.info(f"No VPG names provided, will update the {len(csv_vpg_names)} VPG(s) in the CSV file")
         
         # Get current settings
-        print("Getting current VPG settings...")
-        timestamp, current_settings = get_current_settings(client, vpg_names)
+        if args.baseline:
+            print(f"Reading current VPG settings from baseline {args.baseline}...")
+            timestamp, current_settings = load_baseline_settings(args.baseline, vpg_names)
+        else:
+            print("Getting current VPG settings...")
+            timestamp, current_settings = get_current_settings(client, vpg_names, args.export_chunk_size)
         
+        # VM names are resolved once and shared by validation, diffing and display
+        vm_names = VmNameCache(client)
+
         # Compare settings
         print("Comparing settings...")
         try:
-            changes = compare_settings(client, current_settings, updated_settings)
+            changes = compare_settings(client, current_settings, updated_settings, vm_names)
         except ValueError as e:
             print(f"\nError: {str(e)}")
             print("\nPlease fix the configuration in the CSV file and try again.")
             return
         
         # Display changes
-        display_changes(client, changes)
+        display_changes(client, changes, vm_names)
+        vm_names.log_summary()
         
         if not changes:
             print("\nNo changes to apply.")
@@ -572,8 +967,28 @@ def main():
                 print("Please answer 'yes' or 'no'.")
         
         # Apply changes
+        if client is None:
+            print(f"\nNote: changes were compared against baseline {timestamp}, "
+                  f"only the fields listed above are applied to the current VPG settings.")
+            client = setup_client(args)
         print("\nApplying changes...")
-        update_vpg_settings(client, changes)
+        results = update_vpg_settings(client, changes, args.max_workers, args.max_per_site)
+
+        # Wait for all commit tasks together
+        print("Waiting for commit tasks to finish...")
+        tracker = CommitTaskTracker(client, timeout=args.commit_timeout)
+        for result in results.values():
+            tracker.track(result)
+        tracker.wait()
+
+        display_update_results(results)
+        failed = [
+            name for name, result in results.items()
+            if result['Status'] != 'Committed' or result['Commit Status'] not in ['Completed', 'Untracked']
+        ]
+        if failed:
+            print(f"\n{len(failed)} of {len(results)} VPG(s) failed: {', '.join(failed)}")
+            sys.exit(1)
         print("\nAll changes have been applied successfully.")
 
     except Exception as e:
@@ -0,0 +1,116 @@
+"""
+asyncio facade over ZVMLClient.
+
+The zvml SDK is synchronous: each call blocks its thread until the ZVM answers. AsyncZVMLClient
+wraps one ZVMLClient and makes every SDK method awaitable, mirroring the SDK's layout:
+
+    async with await create_async_client(max_concurrency=8) as zvm:
+        local_site, sites = await asyncio.gather(
+            zvm.localsite.get_local_site(),
+            zvm.virtualization_sites.get_virtualization_sites()
+        )
+        vpg_id = await zvm.vpgs.create_vpg(basic=basic, journal=journal, recovery=recovery,
+                                           networks=networks, sync=True)
+
+Calls run on a private thread pool of max_concurrency threads, so the event loop is never
+blocked and at most max_concurrency calls are in flight at once; further calls wait for a
+free thread. All calls go through the same ZVMLClient and therefore share its Keycloak token,
+token refresh and connection pool (see client.py).
+
+create_async_client() is a coroutine: creating the client logs in to Keycloak, which runs on a
+worker thread as well.
+
+Cancelling an awaiting task does not interrupt an SDK call that is already running; its result
+is discarded when it completes.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable
+
+from .client import DEFAULT_POOL_MAXSIZE, create_client
+
+if TYPE_CHECKING:
+    from zvml import ZVMLClient
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class _AsyncAPI:
+    """Awaitable view of one SDK API group, e.g. client.vpgs."""
+
+    def __init__(self, owner: 'AsyncZVMLClient', api: Any):
+        self._owner = owner
+        self._api = api
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._api, name)
+        if not callable(attribute):
+            return attribute
+        method = self._owner._wrap(attribute)
+        # Cache on the instance so the wrapper is built once per method
+        setattr(self, name, method)
+        return method
+
+    def __repr__(self) -> str:
+        return f"<async {self._api!r}>"
+
+
+class AsyncZVMLClient:
+    """Awaitable ZVMLClient methods with at most max_concurrency calls in flight."""
+
+    def __init__(self, client: 'ZVMLClient', max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='zvml-async')
+        self._apis = {}
+
+    def __getattr__(self, name: str) -> _AsyncAPI:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        api = self._apis.get(name)
+        if api is None:
+            api = self._apis[name] = _AsyncAPI(self, getattr(self.client, name))
+        return api
+
+    def _wrap(self, method: Callable) -> Callable:
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        return call
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run any blocking func(*args, **kwargs) on the client's thread pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self, wait: bool = True) -> None:
+        """Shut down the thread pool; wait for calls already running if wait is True."""
+        self._executor.shutdown(wait=wait)
+
+    async def aclose(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self) -> 'AsyncZVMLClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+
+async def create_async_client(max_concurrency: int = DEFAULT_MAX_CONCURRENCY, **options) -> AsyncZVMLClient:
+    """
+    Create an AsyncZVMLClient over a new ZVMLClient; options are passed on to create_client(),
+    which runs (and logs in) on the event loop's default executor.
+    The connection pool is sized for max_concurrency callers, and the access token is refreshed
+    in the background since an async service usually outlives a single token.
+    """
+    options.setdefault('pool_maxsize', max(DEFAULT_POOL_MAXSIZE, max_concurrency * 2))
+    options.setdefault('token_refresh', True)
+    if max_concurrency > 1:
+        options.setdefault('max_concurrency', max_concurrency)
+    client = await asyncio.get_running_loop().run_in_executor(None, functools.partial(create_client, **options))
+    return AsyncZVMLClient(client, max_concurrency)
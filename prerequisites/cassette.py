@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Record and replay ZVM HTTP traffic.
+
+In record mode every request a script sends to the ZVM and the response it gets back are
+appended to a cassette: a gzip-compressed JSON file holding method, path, a hash of the request
+body, status, content type, response body and latency. Replay mode answers the same requests
+from the cassette without a network connection, either at full speed or with the recorded
+latencies. A discovery or bulk import recorded once against a real (or customer-sized) ZVM can
+then be replayed to benchmark the client-side code paths reproducibly.
+
+Requests are matched by method, path and query (the host is not stored, so a cassette can be
+replayed against any ZVM_HOST) and request body. Requests with the same key are answered in
+recorded order, and the last answer repeats once they run out (e.g. task polling). Without an
+exact body match the first unused answer for the method and path is used. Authorization
+headers and token request bodies are never stored, and tokens in recorded token responses
+are replaced with placeholders.
+
+While a cassette is active for a host, the on-disk token cache and the background token
+refresh are turned off for it: a cached token would keep the login out of the recording, and
+a replayed login would put the placeholder token into the cache.
+
+Enable it for the lab scripts with the ZERTO_CASSETTE environment variable:
+    ZERTO_CASSETTE=record:run.cassette        record to run.cassette
+    ZERTO_CASSETTE=replay:run.cassette        replay at full speed
+    ZERTO_CASSETTE=replay-timed:run.cassette  replay with the recorded latencies
+
+Compare the call counts of two cassettes to catch regressions:
+    python prerequisites/cassette.py summary run.cassette
+    python prerequisites/cassette.py diff before.cassette after.cassette
+"""
+
+import argparse
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+if __package__:
+    from . import transport
+    from .instrumentation import endpoint_template
+    from .token_cache import disable_token_cache
+    from .token_refresh import disable_token_refresh
+else:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from prerequisites import transport
+    from prerequisites.instrumentation import endpoint_template
+    from prerequisites.token_cache import disable_token_cache
+    from prerequisites.token_refresh import disable_token_refresh
+
+ENV_VAR = "ZERTO_CASSETTE"
+FORMAT_VERSION = 1
+REDACTED_FIELDS = ('access_token', 'refresh_token', 'id_token')
+
+logger = logging.getLogger(__name__)
+
+# normalized host -> (setting, Cassette), so later clients for a host keep using the same cassette
+_cassettes = {}
+
+
+def request_path(url: str) -> str:
+    """Path and query of a URL with the query parameters sorted."""
+    parsed = urlparse(url)
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return parsed.path + ('?' + query if query else '')
+
+
+def body_key(request) -> str:
+    """Stable hash of a request body; JSON and form bodies are compared by content, not layout."""
+    if transport.is_token_request(request):
+        return ''
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not body:
+        return ''
+    content_type = request.headers.get('Content-Type', '')
+    try:
+        if 'json' in content_type:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        elif 'form' in content_type:
+            body = urlencode(sorted(parse_qsl(body.decode('utf-8'), keep_blank_values=True))).encode('utf-8')
+    except ValueError:
+        pass
+    return hashlib.sha1(body).hexdigest()
+
+
+class CassetteMiss(Exception):
+    """
+    A replayed request that is not in the cassette. Not a requests exception, so retries and
+    error handling meant for network failures do not hide it.
+    """
+
+
+class Cassette:
+    """Recorded interactions and the transport hooks that record or replay them."""
+
+    def __init__(self, path: str, interactions: List[Dict] = None, timing: str = 'fast'):
+        self.path = path
+        self.interactions = interactions or []
+        self.timing = timing
+        self.recorded_at = time.time()
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._queues = None
+        self._used = set()
+        self._last = {}
+
+    @classmethod
+    def load(cls, path: str, timing: str = 'fast') -> 'Cassette':
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')} in {path}")
+        cassette = cls(path, data['interactions'], timing)
+        cassette.recorded_at = data.get('recorded_at', 0)
+        return cassette
+
+    def save(self, path: str = None) -> None:
+        path = path or self.path
+        with self._lock:
+            data = {'version': FORMAT_VERSION, 'recorded_at': self.recorded_at, 'interactions': list(self.interactions)}
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        logger.info(f"Cassette saved to {path} ({len(data['interactions'])} requests)")
+
+    # Recording
+
+    def record_hook(self, request, send, **kwargs):
+        started = time.perf_counter()
+        response = send(request, **kwargs)
+        elapsed = time.perf_counter() - started
+        content = response.content or b''
+        if transport.is_token_request(request) and response.status_code == 200:
+            try:
+                token = json.loads(content)
+                content = json.dumps(
+                    {key: f'cassette-{key}' if key in REDACTED_FIELDS else value for key, value in token.items()}
+                ).encode('utf-8')
+            except ValueError:
+                pass
+        try:
+            body, encoding = content.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+        interaction = {
+            'method': request.method,
+            'path': request_path(request.url),
+            'body_key': body_key(request),
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', ''),
+            'body': body,
+            'encoding': encoding,
+            'elapsed': round(elapsed, 4)
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+        return response
+
+    # Replay
+
+    def _index(self) -> None:
+        self._queues = defaultdict(deque)
+        for interaction in self.interactions:
+            self._queues[(interaction['method'], interaction['path'], interaction['body_key'])].append(interaction)
+            self._queues[(interaction['method'], interaction['path'], None)].append(interaction)
+
+    def _take(self, method: str, path: str, key: str) -> Optional[Dict]:
+        with self._lock:
+            if self._queues is None:
+                self._index()
+            for lookup in ((method, path, key), (method, path, None)):
+                queue = self._queues.get(lookup)
+                while queue:
+                    interaction = queue.popleft()
+                    if id(interaction) not in self._used:
+                        self._used.add(id(interaction))
+                        self._last[lookup] = interaction
+                        return interaction
+                if lookup in self._last:
+                    return self._last[lookup]
+        return None
+
+    def replay_hook(self, request, send, **kwargs):
+        path = request_path(request.url)
+        interaction = self._take(request.method, path, body_key(request))
+        if interaction is None:
+            self.misses += 1
+            raise CassetteMiss(f"No recorded response for {request.method} {path} in {self.path}")
+        if self.timing == 'original':
+            time.sleep(interaction['elapsed'])
+        if interaction['encoding'] == 'base64':
+            content = base64.b64decode(interaction['body'])
+        else:
+            content = interaction['body'].encode('utf-8')
+        headers = {'Content-Type': interaction['content_type']} if interaction['content_type'] else {}
+        return transport.make_response(request, interaction['status'], content, headers)
+
+    # Analysis
+
+    def call_counts(self) -> Counter:
+        return Counter(
+            f"{interaction['method']} {endpoint_template(interaction['path'])}" for interaction in self.interactions
+        )
+
+    def recorded_time(self) -> float:
+        return sum(interaction['elapsed'] for interaction in self.interactions)
+
+
+def diff_call_counts(before: Counter, after: Counter) -> List[Tuple[str, int, int]]:
+    """(endpoint, before, after) for every endpoint whose call count changed."""
+    return sorted(
+        (endpoint, before[endpoint], after[endpoint])
+        for endpoint in set(before) | set(after)
+        if before[endpoint] != after[endpoint]
+    )
+
+
+def enable_cassette(zvm_address: str, setting: Optional[str] = None) -> Optional[Cassette]:
+    """
+    Record or replay the traffic to zvm_address according to setting (default: ZERTO_CASSETTE).
+    Turns off the token cache and token refresh for zvm_address while the cassette is active.
+    Calling it again with the same setting returns the cassette already active for zvm_address.
+    Returns None if no cassette is configured.
+    """
+    if setting is None:
+        setting = os.environ.get(ENV_VAR, '')
+    setting = setting.strip()
+    mode, _, path = setting.partition(':')
+    if not mode:
+        return None
+    host = transport.normalize_host(zvm_address)
+    active = _cassettes.get(host)
+    if active and active[0] == setting:
+        return active[1]
+    if mode == 'record':
+        cassette = Cassette(path)
+        transport.add_hook(cassette.record_hook, host=zvm_address, order=90, name='cassette')
+        atexit.register(cassette.save)
+        logger.info(f"Recording HTTP traffic to {path}")
+    elif mode in ('replay', 'replay-timed'):
+        cassette = Cassette.load(path, 'original' if mode == 'replay-timed' else 'fast')
+        transport.add_hook(cassette.replay_hook, host=zvm_address, order=90, name='cassette')
+        logger.info(f"Replaying HTTP traffic from {path} ({len(cassette.interactions)} requests)")
+    else:
+        raise ValueError(f"{ENV_VAR} must be record:PATH, replay:PATH or replay-timed:PATH, not {setting!r}")
+    _cassettes[host] = (setting, cassette)
+    disabled = [disable_token_cache(zvm_address), disable_token_refresh(zvm_address)]
+    if any(disabled):
+        logger.info(f"Token cache and token refresh are off for {zvm_address} while the cassette is active")
+    return cassette
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and compare HTTP cassettes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary = subparsers.add_parser("summary", help="Show the calls recorded in a cassette")
+    summary.add_argument("cassette")
+    diff = subparsers.add_parser("diff", help="Compare call counts of two cassettes")
+    diff.add_argument("before")
+    diff.add_argument("after")
+    diff.add_argument("--tolerance", type=int, default=0,
+                      help="Allowed extra calls per endpoint before it counts as a regression (default: 0)")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        cassette = Cassette.load(args.cassette)
+        for endpoint, count in sorted(cassette.call_counts().items(), key=lambda item: -item[1]):
+            print(f"{count:>7}  {endpoint}")
+        print(f"{len(cassette.interactions)} requests, {cassette.recorded_time():.2f}s recorded latency")
+        return 0
+
+    before = Cassette.load(args.before)
+    after = Cassette.load(args.after)
+    changes = diff_call_counts(before.call_counts(), after.call_counts())
+    regressions = 0
+    for endpoint, old, new in changes:
+        flag = ""
+        if new - old > args.tolerance:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{old:>7} -> {new:<7} {new - old:+7}  {endpoint}{flag}")
+    print(f"Total calls: {len(before.interactions)} -> {len(after.interactions)}")
+    if regressions:
+        print(f"{regressions} endpoint(s) make more calls than before")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
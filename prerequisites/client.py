@@ -0,0 +1,242 @@
+"""
+ZVMLClient factory shared by the lab scripts.
+
+create_client() builds a ZVMLClient and routes all of its HTTP traffic to the ZVM (API calls
+and the Keycloak login) through one shared, keep-alive connection pool. The SDK and Keycloak
+library otherwise open their own sessions with requests' default pool of 10 connections per
+host. When more workers than that share a client, the extra connections are thrown away after
+each call and every new one pays for a TCP connect and a full TLS handshake.
+
+Values not passed to create_client() are taken from prerequisites/config.py, including the
+optional PROXY and HTTP_POOL_MAXSIZE settings.
+
+Importing this module is cheap: requests, urllib3, Keycloak and the zvml SDK are only
+imported once a client is created, so scripts can parse arguments and print --help first.
+"""
+
+import atexit
+import logging
+import weakref
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from zvml import ZVMLClient
+
+DEFAULT_POOL_MAXSIZE = 32
+DEFAULT_RETRIES = 3
+
+logger = logging.getLogger(__name__)
+
+_adapters = {}
+_session_tokens = {}
+_connections = weakref.WeakKeyDictionary()
+# (host, feature) -> the object whose log_summary() runs at exit. Hooks are replaced per host,
+# so a second create_client() for a host replaces the entry instead of adding a summary.
+_summaries = {}
+
+
+class ConnectionSettings(NamedTuple):
+    """Address and credentials a client was created with, for requests made beside the SDK."""
+    zvm_address: str
+    client_id: str
+    client_secret: str
+    verify_certificate: bool
+
+
+def _load_config():
+    try:
+        from . import config
+        return config
+    except ImportError:
+        return None
+
+
+class PooledAdapter:
+    """
+    Transport hook sending a host's requests over one HTTPAdapter, whatever session they come from.
+    Connections are kept alive and reused, so established TLS sessions are reused as well.
+    """
+
+    def __init__(self, pool_maxsize: int = DEFAULT_POOL_MAXSIZE, proxies: Optional[Dict[str, str]] = None):
+        self.pool_maxsize = pool_maxsize
+        self.proxies = proxies or {}
+        from requests.adapters import HTTPAdapter
+        from .transport import original_send
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self._send = original_send
+
+    def hook(self, request, send, **kwargs):
+        if self.proxies and not kwargs.get('proxies'):
+            kwargs['proxies'] = self.proxies
+        return self._send(self.adapter, request, **kwargs)
+
+    def close(self) -> None:
+        self.adapter.close()
+
+
+def enable_connection_pool(zvm_address: str, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                           proxies: Optional[Dict[str, str]] = None) -> PooledAdapter:
+    """Send all requests for zvm_address through a shared keep-alive pool of pool_maxsize connections."""
+    from . import transport
+    pooled = PooledAdapter(pool_maxsize, proxies)
+    previous = _adapters.get(transport.normalize_host(zvm_address))
+    transport.add_hook(pooled.hook, host=zvm_address, order=95, name='connection_pool')
+    _adapters[transport.normalize_host(zvm_address)] = pooled
+    if previous:
+        previous.close()
+    return pooled
+
+
+class SessionToken:
+    """
+    Transport hook remembering the access token of a host's current session: the token of the
+    last successful login, or the one the last accepted API request carried (token refresh may
+    have replaced it). Requests made beside the SDK use it instead of logging in again.
+    """
+
+    def __init__(self):
+        self.access_token = None
+        from .transport import is_token_request
+        self._is_token_request = is_token_request
+
+    def hook(self, request, send, **kwargs):
+        response = send(request, **kwargs)
+        if self._is_token_request(request):
+            if response.status_code == 200:
+                try:
+                    self.access_token = response.json().get('access_token') or self.access_token
+                except ValueError:
+                    pass
+        elif response.status_code != 401:
+            authorization = request.headers.get('Authorization', '')
+            if authorization.startswith('Bearer '):
+                self.access_token = authorization[len('Bearer '):]
+        return response
+
+
+def enable_session_token(zvm_address: str) -> SessionToken:
+    """Track the access token used for zvm_address (see session_token())."""
+    from . import transport
+    tracker = SessionToken()
+    # Inside token refresh (50), so API requests carry the token they are actually sent with
+    transport.add_hook(tracker.hook, host=zvm_address, order=55, name='session_token')
+    _session_tokens[transport.normalize_host(zvm_address)] = tracker
+    return tracker
+
+
+def _log_summaries() -> None:
+    for reporter in list(_summaries.values()):
+        reporter.log_summary()
+
+
+def _summary_at_exit(zvm_address: str, feature: str, reporter) -> None:
+    """Log reporter's summary at exit, once per host and feature."""
+    from .transport import normalize_host
+    if not _summaries:
+        atexit.register(_log_summaries)
+    _summaries[(normalize_host(zvm_address), feature)] = reporter
+
+
+def create_client(zvm_address: str = None, client_id: str = None, client_secret: str = None,
+                  verify_certificate: bool = None, pool_maxsize: int = None,
+                  proxies: Optional[Dict[str, str]] = None, token_refresh: bool = False,
+                  max_concurrency: int = None, retries: int = None, cache_ttl: float = None,
+                  coalesce: bool = True) -> 'ZVMLClient':
+    """
+    Create a ZVMLClient with pooled connections.
+    Arguments left as None come from config.py. token_refresh renews the access token in the
+    background for long-running jobs; the on-disk token cache follows ZERTO_TOKEN_CACHE. Both
+    are off while a ZERTO_CASSETTE recording or replay is active.
+    max_concurrency puts an adaptive limit (at most that many) on concurrent requests, for
+    clients shared by parallel workers. retries is how often a request that is safe to repeat
+    is retried after a transient failure (0 disables retries and the circuit breaker).
+    With coalesce, identical GETs in flight at the same time are sent once; cache_ttl additionally
+    reuses successful GET responses for that many seconds (default 0: only concurrent GETs are
+    shared).
+    """
+    config = _load_config()
+    if config is None and None in (zvm_address, client_id, client_secret):
+        raise ValueError("ZVM address and credentials were not given and prerequisites/config.py was not found")
+    if zvm_address is None:
+        zvm_address = config.ZVM_HOST
+    if client_id is None:
+        client_id = config.CLIENT_ID
+    if client_secret is None:
+        client_secret = config.CLIENT_SECRET
+    if verify_certificate is None:
+        verify_certificate = getattr(config, 'ZVM_SSL_VERIFY', True)
+    if pool_maxsize is None:
+        pool_maxsize = getattr(config, 'HTTP_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE)
+    if proxies is None:
+        proxies = getattr(config, 'PROXY', None)
+    if retries is None:
+        retries = getattr(config, 'HTTP_RETRIES', DEFAULT_RETRIES)
+    if cache_ttl is None:
+        cache_ttl = getattr(config, 'HTTP_CACHE_TTL', 0)
+
+    import urllib3
+    from zvml import ZVMLClient
+    from .cassette import enable_cassette
+    from .coalesce import enable_coalescing
+    from .instrumentation import enable_instrumentation
+    from .limiter import enable_adaptive_limit
+    from .retry import enable_retries
+    from .token_cache import enable_token_cache
+    from .token_refresh import enable_token_refresh
+
+    if not verify_certificate:
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    enable_connection_pool(zvm_address, pool_maxsize, proxies)
+    enable_session_token(zvm_address)
+    # Per-endpoint call statistics if ZERTO_HTTP_STATS is set
+    enable_instrumentation(zvm_address)
+    # Record or replay the HTTP traffic if ZERTO_CASSETTE is set
+    cassette = enable_cassette(zvm_address)
+    if retries:
+        # Ride out transient 5xx responses and connection resets instead of aborting the run
+        retry_policy = enable_retries(zvm_address, max_attempts=retries + 1)
+        _summary_at_exit(zvm_address, 'retry', retry_policy)
+    if coalesce:
+        # Workers asking for the same sites or VM at once share one GET
+        coalescer = enable_coalescing(zvm_address, cache_ttl)
+        _summary_at_exit(zvm_address, 'coalescing', coalescer)
+    if max_concurrency:
+        # Back off when the ZVM answers 429/503 or slows down, ramp up again while it keeps up
+        limiter = enable_adaptive_limit(zvm_address, max_concurrency)
+        _summary_at_exit(zvm_address, 'limiter', limiter)
+    if cassette is not None:
+        # The login has to be recorded, and a replayed token must not reach the cache
+        token_refresh = False
+    else:
+        # Reuse a cached Keycloak token if ZERTO_TOKEN_CACHE is set
+        enable_token_cache(zvm_address)
+    if token_refresh:
+        # Renew the access token on a background thread before it expires mid-run
+        refresher = enable_token_refresh(zvm_address)
+        _summary_at_exit(zvm_address, 'token_refresh', refresher)
+
+    logger.debug(f"Creating ZVMLClient for {zvm_address} (pool size {pool_maxsize}, proxy {'on' if proxies else 'off'})")
+    client = ZVMLClient(
+        zvm_address=zvm_address,
+        client_id=client_id,
+        client_secret=client_secret,
+        verify_certificate=verify_certificate
+    )
+    _connections[client] = ConnectionSettings(zvm_address, client_id, client_secret, verify_certificate)
+    return client
+
+
+def session_token(client: 'ZVMLClient') -> Optional[str]:
+    """The access token client's requests currently use, None if none has been seen yet."""
+    from .transport import normalize_host
+    tracker = _session_tokens.get(normalize_host(connection_settings(client).zvm_address))
+    return tracker.access_token if tracker else None
+
+
+def connection_settings(client: 'ZVMLClient') -> ConnectionSettings:
+    """The address and credentials create_client() used for client."""
+    try:
+        return _connections[client]
+    except (KeyError, TypeError):
+        raise ValueError("Client was not created with create_client()") from None
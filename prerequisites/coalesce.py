@@ -0,0 +1,131 @@
+"""
+Single-flight coalescing of identical GET requests to the ZVM.
+
+When parallel workers ask for the same thing at the same moment (the site list, the local site,
+one VM by identifier), only the first request goes to the ZVM. The others wait for it and get
+their own copy of its response. With a ttl, successful responses are also reused for that many
+seconds after they arrive. Any other request to the ZVM (POST, PUT, DELETE) may change what a
+GET returns, so it clears the reused responses, and GETs sent before it are not joined by
+later callers either.
+
+Requests are only shared between callers that send the same Authorization header, so clients
+with different credentials on one ZVM never see each other's responses. Streaming requests are
+never coalesced.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from . import transport
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A GET in progress and, once it is done, its outcome."""
+
+    __slots__ = ('done', 'result', 'error', 'completed_at', 'joinable')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.completed_at = 0.0
+        # Cleared when a write is sent while the GET is in flight; its response may be outdated
+        self.joinable = True
+
+
+class RequestCoalescer:
+    """Transport hook sharing one in-flight GET (and optionally its response for ttl seconds)."""
+
+    def __init__(self, ttl: float = 0.0):
+        self.ttl = ttl
+        self.leaders = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self._flights = {}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request) -> Tuple[str, str, str]:
+        # Only a hash of the bearer token is kept, not the token itself
+        authorization = hashlib.sha256(request.headers.get('Authorization', '').encode('utf-8')).hexdigest()
+        return request.url, request.headers.get('Accept', ''), authorization
+
+    def _copy(self, request, result: Tuple[int, bytes, Dict[str, str]]):
+        status_code, content, headers = result
+        return transport.make_response(request, status_code, content, headers)
+
+    def hook(self, request, send, **kwargs):
+        if request.method != 'GET' or kwargs.get('stream'):
+            if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+                self.invalidate()
+            return send(request, **kwargs)
+
+        key = self.key(request)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.time() - cached.completed_at < self.ttl:
+                self.cache_hits += 1
+                return self._copy(request, cached.result)
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.result is None:
+                # The leader was interrupted (e.g. KeyboardInterrupt) before it got a response
+                return send(request, **kwargs)
+            return self._copy(request, flight.result)
+
+        try:
+            response = send(request, **kwargs)
+            flight.result = (response.status_code, response.content, dict(response.headers))
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.completed_at = time.time()
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                if self.ttl and flight.joinable and flight.result is not None and 200 <= flight.result[0] < 300:
+                    self._cache[key] = flight
+            flight.done.set()
+
+    def invalidate(self) -> None:
+        """Drop all reused responses and let no new caller join a GET already in flight."""
+        with self._lock:
+            self._cache.clear()
+            for flight in self._flights.values():
+                flight.joinable = False
+            self._flights.clear()
+
+    def stats(self) -> Dict:
+        return {'sent': self.leaders, 'coalesced': self.coalesced, 'cache_hits': self.cache_hits}
+
+    def log_summary(self) -> None:
+        if self.coalesced or self.cache_hits:
+            logger.info(
+                f"Request coalescing: {self.leaders} GETs sent, {self.coalesced} shared an in-flight GET, "
+                f"{self.cache_hits} served from the {self.ttl:g}s cache"
+            )
+
+
+def enable_coalescing(zvm_address: str, ttl: Optional[float] = 0.0) -> RequestCoalescer:
+    """Coalesce identical concurrent GETs to zvm_address, reusing responses for ttl seconds."""
+    coalescer = RequestCoalescer(ttl or 0.0)
+    transport.add_hook(coalescer.hook, host=zvm_address, order=30, name='coalescing')
+    return coalescer
@@ -25,6 +25,17 @@ CLIENT_SECRET = "your-secret-here"  # ← REPLACE: Your Keycloak client secret
 #     "https": "https://proxy.example.com:8080"
 # }
 
+# Optional: Maximum number of kept-alive connections to the ZVM (default: 32)
+# Raise it if you run more parallel workers than this against one client
+# HTTP_POOL_MAXSIZE = 32
+
+# Optional: How often to retry a request after a transient failure (default: 3, 0 disables)
+# HTTP_RETRIES = 3
+
+# Optional: Seconds to reuse successful GET responses, e.g. site lists (default: 0, off)
+# Identical GETs in flight at the same time are always sent only once
+# HTTP_CACHE_TTL = 0
+
 # ========================================
 # KEYCLOAK SETUP INSTRUCTIONS:
 # ========================================
@@ -0,0 +1,139 @@
+"""
+Concurrent resource discovery for virtualization sites.
+
+The per-site resource calls of the SDK (VMs, datastores, hosts, folders, networks) do not
+depend on each other, but called one after the other each one waits for the previous
+round trip - over a WAN link to a peer site that adds up to seconds per site.
+discover_resources() sends all of them at once on a thread pool and returns one
+SiteInventory per site, with the time each resource type took:
+
+    inventory = discover_resources(client, {
+        local_site_identifier: ['vms'],
+        peer_site_identifier: ['datastores', 'hosts', 'folders', 'networks']
+    })
+    peer = inventory[peer_site_identifier]
+    peer.datastores, peer.timings['datastores']
+
+discover_all_sites() does the same for every peer site the ZVM knows about (plus the local
+site), with at most max_workers calls in flight, for hub sites paired with many DR sites.
+
+All calls share the client, so they use its connection pool and, if enabled, its adaptive
+concurrency limit (see client.py).
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from .inventory import from_api_list
+
+if TYPE_CHECKING:
+    from zvml import ZVMLClient
+
+RESOURCE_TYPES = ('vms', 'datastores', 'hosts', 'folders', 'networks')
+PEER_RESOURCE_TYPES = ('datastores', 'hosts', 'folders', 'networks')
+DEFAULT_MAX_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+
+class SiteInventory(NamedTuple):
+    """
+    Resources discovered on one site, as API dicts or inventory.py models; resource types that
+    were not requested are None.
+    """
+    site_identifier: str
+    site_name: Optional[str] = None
+    is_local: bool = False
+    vms: Optional[List] = None
+    datastores: Optional[List] = None
+    hosts: Optional[List] = None
+    folders: Optional[List] = None
+    networks: Optional[List] = None
+    # Seconds each resource type took to fetch; None unless built by discover_resources()
+    timings: Optional[Dict[str, float]] = None
+
+
+def fetch_resource(client: 'ZVMLClient', site_identifier: str, resource_type: str) -> List[Dict]:
+    """One resource list of a site, e.g. fetch_resource(client, site, 'hosts')."""
+    if resource_type not in RESOURCE_TYPES:
+        raise ValueError(f"Unknown resource type {resource_type!r}, expected one of {', '.join(RESOURCE_TYPES)}")
+    method = getattr(client.virtualization_sites, f"get_virtualization_site_{resource_type}")
+    return method(site_identifier=site_identifier)
+
+
+def _timed_fetch(client: 'ZVMLClient', site_identifier: str, resource_type: str, models: bool):
+    started = time.perf_counter()
+    result = fetch_resource(client, site_identifier, resource_type)
+    if models:
+        result = from_api_list(resource_type, result)
+    return result, time.perf_counter() - started
+
+
+def discover_resources(client: 'ZVMLClient', plan: Mapping[str, Iterable[str]],
+                       max_workers: int = None, models: bool = False) -> Dict[str, SiteInventory]:
+    """
+    Fetch the resource types plan[site] for every site in plan concurrently.
+    max_workers bounds the number of calls in flight (default: all of them at once).
+    With models, the resources are returned as the compact classes of inventory.py.
+    If a call fails, the calls not yet started are cancelled and its exception is raised
+    once the running ones have finished.
+    """
+    jobs = [(site, resource_type) for site, resource_types in plan.items() for resource_type in resource_types]
+    if not jobs:
+        return {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs), thread_name_prefix='discovery') as executor:
+        futures = [(site, resource_type, executor.submit(_timed_fetch, client, site, resource_type, models))
+                   for site, resource_type in jobs]
+        fields = {site: {'timings': {}} for site in plan}
+        try:
+            for site, resource_type, future in futures:
+                fields[site][resource_type], fields[site]['timings'][resource_type] = future.result()
+        except Exception:
+            for _, _, future in futures:
+                future.cancel()
+            raise
+
+    logger.debug(f"Discovered {len(jobs)} resource lists on {len(plan)} site(s) "
+                 f"in {time.perf_counter() - started:.2f}s")
+    return {site: SiteInventory(site_identifier=site, **values) for site, values in fields.items()}
+
+
+def peer_sites(sites: List[Dict], local_site_identifier: str) -> List[Dict]:
+    """All sites except the local one, in the order the ZVM returned them."""
+    return [site for site in sites if site.get('SiteIdentifier') != local_site_identifier]
+
+
+def discover_all_sites(client: 'ZVMLClient', resource_types: Iterable[str] = PEER_RESOURCE_TYPES,
+                       local_resource_types: Iterable[str] = ('vms',),
+                       max_workers: int = DEFAULT_MAX_WORKERS, models: bool = False) -> Dict[str, SiteInventory]:
+    """
+    Discover resource_types on every peer site and local_resource_types on the local site
+    (skipped if empty), with at most max_workers calls in flight. models is passed on to
+    discover_resources().
+    Returns the inventories keyed by site identifier, the local site first.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sites_future = executor.submit(client.virtualization_sites.get_virtualization_sites)
+        local_future = executor.submit(client.localsite.get_local_site)
+        sites, local_site = sites_future.result(), local_future.result()
+    local_site_identifier = local_site.get('SiteIdentifier')
+    peers = peer_sites(sites, local_site_identifier)
+
+    plan = {}
+    if local_resource_types:
+        plan[local_site_identifier] = tuple(local_resource_types)
+    for site in peers:
+        plan[site['SiteIdentifier']] = tuple(resource_types)
+    started = time.perf_counter()
+    inventory = discover_resources(client, plan, max_workers, models)
+    logger.info(f"Discovered {len(peers)} peer site(s) in {time.perf_counter() - started:.2f}s")
+
+    names = {site.get('SiteIdentifier'): site.get('VirtualizationSiteName') for site in sites}
+    names.setdefault(local_site_identifier, local_site.get('SiteName'))
+    return {
+        site: found._replace(site_name=names.get(site), is_local=site == local_site_identifier)
+        for site, found in inventory.items()
+    }
@@ -0,0 +1,244 @@
+"""
+Per-endpoint HTTP statistics for ZVMLClient.
+
+Instrumentation hooks into the transport (see transport.py) and records every call made to a
+host: call and error counts per HTTP method and endpoint, latency percentiles (p50/p95/p99),
+response sizes, and how many calls needed more than one attempt on the wire (retries) or were
+answered locally without reaching the network (token cache, coalescing, cassette replay).
+
+Endpoints are grouped by path template: path segments containing digits (identifiers) become
+{id} and query strings keep only their parameter names, so 500 calls of
+GET /v1/vms?vmIdentifier=... show up as one row with 500 calls - the N+1 pattern to look for.
+
+Enable it for the lab scripts with the ZERTO_HTTP_STATS environment variable:
+    ZERTO_HTTP_STATS=1               print a summary table to stderr at exit
+    ZERTO_HTTP_STATS=stats.json      also write the numbers as JSON to stats.json
+"""
+
+import atexit
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from . import transport
+
+ENV_VAR = "ZERTO_HTTP_STATS"
+
+_VERSION_SEGMENT = re.compile(r'^v\d+$')
+
+
+def endpoint_template(url: str) -> str:
+    """Group a URL by endpoint: identifiers become {id}, query values are dropped."""
+    parsed = urlparse(url)
+    segments = [
+        '{id}' if any(c.isdigit() for c in segment) and not _VERSION_SEGMENT.match(segment) else segment
+        for segment in parsed.path.split('/')
+    ]
+    template = '/'.join(segments)
+    if parsed.query:
+        template += '?' + '&'.join(sorted({key for key, _ in parse_qsl(parsed.query, keep_blank_values=True)}))
+    return template
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class EndpointStats:
+    """Counters and latency samples for one (method, endpoint) pair."""
+
+    __slots__ = ('calls', 'errors', 'retries', 'local', 'bytes', 'latencies')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.local = 0
+        self.bytes = 0
+        self.latencies = []
+
+    def to_dict(self) -> Dict:
+        latencies = sorted(self.latencies)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'local': self.local,
+            'bytes': self.bytes,
+            'total_s': sum(latencies),
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000
+        }
+
+
+class _Call:
+    """One logical call while it is in progress; inner hooks count its attempts."""
+
+    __slots__ = ('attempts',)
+
+    def __init__(self):
+        self.attempts = 0
+
+
+class Instrumentation:
+    """Collects per-endpoint statistics for the requests sent to one host (or all hosts)."""
+
+    def __init__(self):
+        self.stats = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._hooks = []
+
+    def _endpoint(self, request) -> EndpointStats:
+        key = (request.method, endpoint_template(request.url))
+        stats = self.stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self.stats.setdefault(key, EndpointStats())
+        return stats
+
+    def _record(self, request, response, started: float, attempts: int, kwargs: Dict) -> None:
+        elapsed = time.perf_counter() - started
+        size = 0
+        if response is not None:
+            if kwargs.get('stream'):
+                size = int(response.headers.get('Content-Length') or 0)
+            else:
+                # Session.send reads the body right after this anyway
+                size = len(response.content or b'')
+        stats = self._endpoint(request)
+        with self._lock:
+            stats.calls += 1
+            stats.latencies.append(elapsed)
+            stats.bytes += size
+            stats.retries += max(0, attempts - 1)
+            stats.local += attempts == 0
+            stats.errors += response is None or response.status_code >= 400
+
+    def call_hook(self, request, send, **kwargs):
+        """Outermost hook: times the logical call, including retries and body download."""
+        call = _Call()
+        outer = getattr(self._local, 'call', None)
+        self._local.call = call
+        started = time.perf_counter()
+        response = None
+        try:
+            response = send(request, **kwargs)
+            return response
+        finally:
+            self._local.call = outer
+            self._record(request, response, started, call.attempts, kwargs)
+
+    def attempt_hook(self, request, send, **kwargs):
+        """Innermost hook: counts requests that actually go to the network."""
+        call = getattr(self._local, 'call', None)
+        if call is not None:
+            call.attempts += 1
+            return send(request, **kwargs)
+        # Not inside a call seen by call_hook, e.g. the background token refresh
+        started = time.perf_counter()
+        response = None
+        try:
+            response = send(request, **kwargs)
+            return response
+        finally:
+            self._record(request, response, started, 1, kwargs)
+
+    def attach(self, host: Optional[str] = None) -> 'Instrumentation':
+        """Start recording requests to host (any host if None)."""
+        self._hooks = [
+            transport.add_hook(self.call_hook, host=host, order=10, name='instrumentation'),
+            transport.add_hook(self.attempt_hook, host=host, order=94, name='instrumentation_attempts')
+        ]
+        return self
+
+    def detach(self) -> None:
+        for hook in self._hooks:
+            transport.remove_hook(hook)
+        self._hooks = []
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {}
+            self.started = time.time()
+
+    def snapshot(self) -> List[Tuple[str, str, Dict]]:
+        """(method, endpoint, numbers) for every endpoint, slowest total first."""
+        with self._lock:
+            items = [(method, endpoint, stats.to_dict()) for (method, endpoint), stats in self.stats.items()]
+        return sorted(items, key=lambda item: -item[2]['total_s'])
+
+    def to_dict(self) -> Dict:
+        endpoints = [dict(method=method, endpoint=endpoint, **numbers) for method, endpoint, numbers in self.snapshot()]
+        return {
+            'started': self.started,
+            'duration_s': time.time() - self.started,
+            'calls': sum(e['calls'] for e in endpoints),
+            'endpoints': endpoints
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary_table(self) -> str:
+        rows = self.snapshot()
+        width = max([len('Endpoint')] + [len(f"{m} {e}") for m, e, _ in rows])
+        lines = [
+            f"{'Endpoint':<{width}} {'Calls':>6} {'Err':>4} {'Retry':>5} {'Local':>5} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Total s':>8} {'KB':>9}",
+        ]
+        lines.append('-' * len(lines[0]))
+        for method, endpoint, n in rows:
+            lines.append(
+                f"{method + ' ' + endpoint:<{width}} {n['calls']:>6} {n['errors']:>4} {n['retries']:>5} {n['local']:>5} "
+                f"{n['p50_ms']:>8.1f} {n['p95_ms']:>8.1f} {n['p99_ms']:>8.1f} {n['total_s']:>8.2f} {n['bytes'] / 1024:>9.1f}"
+            )
+        total_calls = sum(n['calls'] for _, _, n in rows)
+        total_time = sum(n['total_s'] for _, _, n in rows)
+        lines.append(f"{total_calls} calls to {len(rows)} endpoints, {total_time:.2f}s in HTTP calls")
+        return '\n'.join(lines)
+
+    def report(self, json_path: Optional[str] = None) -> None:
+        if not self.stats:
+            return
+        print("\nHTTP calls:\n" + self.summary_table(), file=sys.stderr)
+        if json_path:
+            self.write_json(json_path)
+            print(f"HTTP call statistics written to {json_path}", file=sys.stderr)
+
+
+_instrumentation = {}
+
+
+def enable_instrumentation(host: Optional[str] = None, setting: Optional[str] = None) -> Optional[Instrumentation]:
+    """
+    Record HTTP statistics for host according to setting (default: ZERTO_HTTP_STATS) and
+    report them at exit. Returns None if statistics are not enabled.
+    """
+    if setting is None:
+        setting = os.environ.get(ENV_VAR, '')
+    setting = setting.strip()
+    if setting.lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    key = transport.normalize_host(host) if host else None
+    if key in _instrumentation:
+        return _instrumentation[key]
+    json_path = None if setting.lower() in ('1', 'true', 'yes', 'on', 'table') else setting
+    instrumentation = Instrumentation().attach(host)
+    _instrumentation[key] = instrumentation
+    atexit.register(instrumentation.report, json_path)
+    return instrumentation
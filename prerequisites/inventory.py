@@ -0,0 +1,118 @@
+"""
+Compact models for discovered site resources.
+
+The SDK returns resources as JSON dicts. A dict per VM costs a hash table on top of its
+values, which adds up with 100k VMs across sites. The classes below keep only the fields the
+labs use (identifiers, names and capacity) in __slots__ attributes, with no per-object
+dict. Convert with from_api() and back with to_api(). API fields not listed in FIELDS are
+dropped, so keep the dicts where the full API document is needed (e.g. VPG settings).
+
+    vms = from_api_list('vms', client.virtualization_sites.get_virtualization_site_vms(site_identifier=site))
+    vms[0].identifier, vms[0].name
+
+benchmarks/bench_inventory_memory.py compares the memory use with plain dicts.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class Resource:
+    """Base class: FIELDS lists (attribute, API key) pairs, the first two being identifier and name."""
+
+    __slots__ = ('identifier', 'name')
+    FIELDS: Tuple[Tuple[str, str], ...] = ()
+
+    def __init__(self, identifier: str, name: Optional[str] = None):
+        self.identifier = identifier
+        self.name = name
+
+    @classmethod
+    def from_api(cls, data: Dict) -> 'Resource':
+        return cls(*[data.get(key) for _, key in cls.FIELDS])
+
+    def to_api(self) -> Dict:
+        """The API dict for this resource; fields that are None are left out."""
+        values = ((key, getattr(self, attribute)) for attribute, key in self.FIELDS)
+        return {key: value for key, value in values if value is not None}
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, attribute) == getattr(other, attribute) for attribute, _ in self.FIELDS)
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.identifier))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.identifier!r}, {self.name!r})"
+
+
+class VM(Resource):
+    """A VM; storage sizes are only present in /v1/vms results."""
+    __slots__ = ('provisioned_mb', 'used_mb')
+    FIELDS = (('identifier', 'VmIdentifier'), ('name', 'VmName'),
+              ('provisioned_mb', 'ProvisionedStorageInMB'), ('used_mb', 'UsedStorageInMB'))
+
+    def __init__(self, identifier: str, name: Optional[str] = None, provisioned_mb: Optional[int] = None,
+                 used_mb: Optional[int] = None):
+        self.identifier = identifier
+        self.name = name
+        self.provisioned_mb = provisioned_mb
+        self.used_mb = used_mb
+
+
+class Datastore(Resource):
+    """A datastore; to_api() reports the capacity at the top level."""
+    __slots__ = ('capacity_bytes', 'free_bytes')
+    FIELDS = (('identifier', 'DatastoreIdentifier'), ('name', 'DatastoreName'),
+              ('capacity_bytes', 'CapacityInBytes'), ('free_bytes', 'FreeInBytes'))
+
+    def __init__(self, identifier: str, name: Optional[str] = None, capacity_bytes: Optional[int] = None,
+                 free_bytes: Optional[int] = None):
+        self.identifier = identifier
+        self.name = name
+        self.capacity_bytes = capacity_bytes
+        self.free_bytes = free_bytes
+
+    @classmethod
+    def from_api(cls, data: Dict) -> 'Datastore':
+        # Capacity is reported under Stats.Usage.Datastore by /v1/datastores
+        usage = ((data.get('Stats') or {}).get('Usage') or {}).get('Datastore') or {}
+        return cls(data.get('DatastoreIdentifier'), data.get('DatastoreName'),
+                   data.get('CapacityInBytes', usage.get('CapacityInBytes')),
+                   data.get('FreeInBytes', usage.get('FreeInBytes')))
+
+
+class Host(Resource):
+    __slots__ = ()
+    FIELDS = (('identifier', 'HostIdentifier'), ('name', 'VirtualizationHostName'))
+
+
+class Folder(Resource):
+    __slots__ = ()
+    FIELDS = (('identifier', 'FolderIdentifier'), ('name', 'FolderName'))
+
+
+class Network(Resource):
+    __slots__ = ()
+    FIELDS = (('identifier', 'NetworkIdentifier'), ('name', 'VirtualizationNetworkName'))
+
+
+# Resource type names as used by discovery.py
+MODELS = {
+    'vms': VM,
+    'datastores': Datastore,
+    'hosts': Host,
+    'folders': Folder,
+    'networks': Network
+}
+
+
+def from_api_list(resource_type: str, items: Iterable[Dict]) -> List[Resource]:
+    """Models for a list of API dicts of resource_type ('vms', 'hosts', ...)."""
+    from_api = MODELS[resource_type].from_api
+    return [from_api(item) for item in items]
+
+
+def to_api_list(resources: Iterable[Resource]) -> List[Dict]:
+    return [resource.to_api() for resource in resources]
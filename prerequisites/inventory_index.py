@@ -0,0 +1,220 @@
+"""
+Name -> identifier indexes over discovered inventory.
+
+Scripts address VPGs, VMs, hosts, datastores, folders and networks by name, while the API wants
+identifiers. Listing a resource type and scanning it for every name turns N lookups into N
+list calls (or N scans). NameIndex lists once and answers name -> identifier and
+identifier -> object lookups from dicts:
+
+    vpgs = NameIndex.from_api(client.vpgs.list_vpgs(), 'VpgIdentifier', 'VpgName')
+    vpg_identifier = vpgs.identifier('Finance-VPG')
+    vpg = vpgs.get(vpg_identifier)
+
+Names are not unique in vCenter (two VMs called "web01" in different folders), so a name can map
+to several identifiers. identifier() and find() raise AmbiguousNameError for such a name instead
+of silently picking one; identifiers() returns all of them, and duplicates() lists them all.
+
+InventoryIndex builds these indexes on first use, per resource type and site, and keeps them
+for the session. invalidate() drops them after changes (e.g. a VPG was created or deleted), and
+max_age drops them automatically once they are older than that many seconds.
+"""
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .discovery import RESOURCE_TYPES, fetch_resource
+from .inventory import MODELS, Resource, from_api_list
+
+if TYPE_CHECKING:
+    from zvml import ZVMLClient
+
+# (identifier key, name key) of the API dicts of each resource type
+API_KEYS = {resource_type: (model.FIELDS[0][1], model.FIELDS[1][1]) for resource_type, model in MODELS.items()}
+API_KEYS['vpgs'] = ('VpgIdentifier', 'VpgName')
+
+
+class AmbiguousNameError(LookupError):
+    """A name that more than one object of the same type has."""
+
+    def __init__(self, resource_type: str, name: str, identifiers: List[str]):
+        super().__init__(f"{len(identifiers)} {resource_type} are named {name!r}: {', '.join(identifiers)}")
+        self.resource_type = resource_type
+        self.name = name
+        self.identifiers = identifiers
+
+
+class NameIndex:
+    """name -> identifier(s) and identifier -> object for one list of objects."""
+
+    def __init__(self, items: Iterable[Any], identifier: Callable[[Any], str], name: Callable[[Any], str],
+                 resource_type: str = 'objects'):
+        self.resource_type = resource_type
+        self._identifier = identifier
+        self._name = name
+        self.by_identifier = {}
+        # A name maps to its identifier, or to a list of identifiers if it is not unique
+        self._by_name = {}
+        self.built_at = time.time()
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def from_api(cls, items, identifier_key: str, name_key: str, resource_type: str = 'objects') -> 'NameIndex':
+        """Index API dicts; a single dict (as some list calls return for one match) is accepted too."""
+        if isinstance(items, dict):
+            items = [items]
+        return cls(items or [], lambda item: item.get(identifier_key), lambda item: item.get(name_key), resource_type)
+
+    @classmethod
+    def from_models(cls, items: Iterable[Resource], resource_type: str = 'objects') -> 'NameIndex':
+        """Index inventory.py models."""
+        return cls(items, lambda item: item.identifier, lambda item: item.name, resource_type)
+
+    def add(self, item: Any) -> None:
+        """Add or replace one object."""
+        identifier = self._identifier(item)
+        if identifier in self.by_identifier:
+            self.remove(identifier)
+        self.by_identifier[identifier] = item
+        name = self._name(item)
+        existing = self._by_name.get(name)
+        if existing is None:
+            self._by_name[name] = identifier
+        elif isinstance(existing, list):
+            existing.append(identifier)
+        else:
+            self._by_name[name] = [existing, identifier]
+
+    def remove(self, identifier: str) -> None:
+        """Remove one object; unknown identifiers are ignored."""
+        item = self.by_identifier.pop(identifier, None)
+        if item is None:
+            return
+        name = self._name(item)
+        existing = self._by_name.get(name)
+        if isinstance(existing, list):
+            existing.remove(identifier)
+            if len(existing) == 1:
+                self._by_name[name] = existing[0]
+        else:
+            del self._by_name[name]
+
+    def get(self, identifier: str, default: Any = None) -> Any:
+        return self.by_identifier.get(identifier, default)
+
+    def identifiers(self, name: str) -> List[str]:
+        """All identifiers of objects named name (empty if there are none)."""
+        found = self._by_name.get(name)
+        if found is None:
+            return []
+        return list(found) if isinstance(found, list) else [found]
+
+    def identifier(self, name: str) -> str:
+        """The identifier of the one object named name; KeyError if none, AmbiguousNameError if several."""
+        found = self._by_name.get(name)
+        if found is None:
+            raise KeyError(f"No {self.resource_type} named {name!r}")
+        if isinstance(found, list):
+            raise AmbiguousNameError(self.resource_type, name, list(found))
+        return found
+
+    def find(self, name: str, default: Any = None) -> Any:
+        """The one object named name, default if there is none; AmbiguousNameError if several."""
+        try:
+            return self.by_identifier[self.identifier(name)]
+        except KeyError:
+            return default
+
+    def duplicates(self) -> Dict[str, List[str]]:
+        """Every name shared by several objects, with their identifiers."""
+        return {name: list(found) for name, found in self._by_name.items() if isinstance(found, list)}
+
+    def names(self) -> List[str]:
+        return list(self._by_name)
+
+    def __len__(self) -> int:
+        return len(self.by_identifier)
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self.by_identifier
+
+
+class InventoryIndex:
+    """
+    Per-session NameIndexes for the VPGs and the per-site resources of a client, built on first
+    use. With models, site resources are indexed as inventory.py models instead of API dicts.
+    """
+
+    def __init__(self, client: 'ZVMLClient', max_age: Optional[float] = None, models: bool = False):
+        self.client = client
+        self.max_age = max_age
+        self.models = models
+        self.builds = 0
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self._building = {}
+
+    def index(self, resource_type: str, site_identifier: str = None) -> NameIndex:
+        """The index of resource_type ('vpgs', or a site resource type with site_identifier)."""
+        key = (resource_type, None if resource_type == 'vpgs' else site_identifier)
+        if resource_type != 'vpgs':
+            if resource_type not in RESOURCE_TYPES:
+                raise ValueError(f"Unknown resource type {resource_type!r}")
+            if site_identifier is None:
+                raise ValueError(f"site_identifier is required for {resource_type}")
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and (self.max_age is None or time.time() - index.built_at < self.max_age):
+                return index
+            # One build per key at a time; other threads wait for it instead of listing again
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                index = self._indexes.get(key)
+                if index is not None and (self.max_age is None or time.time() - index.built_at < self.max_age):
+                    return index
+            index = self._build(*key)
+            with self._lock:
+                self._indexes[key] = index
+                self.builds += 1
+        return index
+
+    def _build(self, resource_type: str, site_identifier: Optional[str]) -> NameIndex:
+        if resource_type == 'vpgs':
+            return NameIndex.from_api(self.client.vpgs.list_vpgs(), *API_KEYS['vpgs'], resource_type='VPGs')
+        items = fetch_resource(self.client, site_identifier, resource_type)
+        if self.models:
+            return NameIndex.from_models(from_api_list(resource_type, items), resource_type)
+        return NameIndex.from_api(items, *API_KEYS[resource_type], resource_type=resource_type)
+
+    def vpgs(self) -> NameIndex:
+        return self.index('vpgs')
+
+    def vms(self, site_identifier: str) -> NameIndex:
+        return self.index('vms', site_identifier)
+
+    def hosts(self, site_identifier: str) -> NameIndex:
+        return self.index('hosts', site_identifier)
+
+    def datastores(self, site_identifier: str) -> NameIndex:
+        return self.index('datastores', site_identifier)
+
+    def folders(self, site_identifier: str) -> NameIndex:
+        return self.index('folders', site_identifier)
+
+    def networks(self, site_identifier: str) -> NameIndex:
+        return self.index('networks', site_identifier)
+
+    def invalidate(self, resource_type: str = None, site_identifier: str = None) -> None:
+        """Drop the indexes of resource_type and/or site_identifier (all of them if neither is given)."""
+        with self._lock:
+            for key in list(self._indexes):
+                if resource_type not in (None, key[0]) or site_identifier not in (None, key[1]):
+                    continue
+                del self._indexes[key]
+
+    def cached(self) -> List[Tuple[str, Optional[str]]]:
+        """(resource type, site identifier) of the indexes currently held."""
+        with self._lock:
+            return list(self._indexes)
@@ -0,0 +1,170 @@
+"""
+Adaptive (AIMD) concurrency limit for requests to the ZVM.
+
+Parallel workers sharing a client draw from one AIMDLimiter, which caps how many requests are
+in flight to the ZVM at once. The cap (the window) grows additively, by about one request per
+window's worth of healthy responses, and shrinks multiplicatively when the ZVM pushes back:
+on 429 or 503 responses, connection errors, or latency spikes. A spike is a response slower than
+spike_factor times the usual latency of its endpoint (and at least min_spike seconds slower),
+so slow endpoints such as settings exports do not count against fast ones. A Retry-After header
+on a 429/503 also holds back new requests until it has passed.
+
+The current window is exposed as AIMDLimiter.window, with history and counters in stats().
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from . import transport
+from .instrumentation import endpoint_template
+
+OVERLOAD_STATUS_CODES = (429, 503)
+
+logger = logging.getLogger(__name__)
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on concurrent requests.
+    After a decrease, further decreases are ignored for cooldown seconds so that one overload
+    episode, seen by many in-flight requests at once, only cuts the window once.
+    """
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32, decrease: float = 0.5,
+                 spike_factor: float = 3.0, min_spike: float = 0.25, cooldown: float = 1.0,
+                 ewma_alpha: float = 0.1):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.min_spike = min_spike
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self._window = float(max(min_limit, min(initial, max_limit)))
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._baselines = {}
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.wait_time = 0.0
+        self.lowest = self.highest = self._window
+        self.history = [(time.time(), self.window)]
+
+    @property
+    def window(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._window)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _record_window(self) -> None:
+        self.lowest = min(self.lowest, self._window)
+        self.highest = max(self.highest, self._window)
+        if self.window != self.history[-1][1]:
+            self.history.append((time.time(), self.window))
+            if len(self.history) > 1000:
+                del self.history[:500]
+
+    def acquire(self) -> bool:
+        """Wait for a free slot; returns whether the window was full, i.e. the request used all of it."""
+        started = time.perf_counter()
+        with self._condition:
+            while True:
+                pause = self._paused_until - time.time()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self._in_flight >= self.window:
+                    self._condition.wait()
+                else:
+                    break
+            self._in_flight += 1
+            saturated = self._in_flight >= self.window
+            self.wait_time += time.perf_counter() - started
+        return saturated
+
+    def release(self, saturated: bool, endpoint: str, latency: float, response=None) -> None:
+        """Return a slot and adjust the window from the outcome of the request."""
+        overloaded = response is None or response.status_code in OVERLOAD_STATUS_CODES
+        with self._condition:
+            self._in_flight -= 1
+            spike = False
+            if not overloaded:
+                baseline = self._baselines.get(endpoint)
+                if baseline is None:
+                    self._baselines[endpoint] = latency
+                elif latency > baseline * self.spike_factor and latency - baseline > self.min_spike:
+                    spike = True
+                else:
+                    self._baselines[endpoint] = baseline + self.ewma_alpha * (latency - baseline)
+            now = time.time()
+            if overloaded or spike:
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self._window = max(self.min_limit, self._window * self.decrease)
+                    self.decreases += 1
+                    reason = 'latency spike' if spike else (
+                        f'HTTP {response.status_code}' if response is not None else 'connection error')
+                    logger.info(f"Adaptive limiter: {reason} on {endpoint}, window down to {self.window}")
+                retry_after = self._retry_after(response)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+            elif saturated and self._window < self.max_limit:
+                # +1 per window of healthy responses, like TCP congestion avoidance
+                self._window = min(self.max_limit, self._window + 1.0 / self._window)
+                self.increases += 1
+            self._record_window()
+            self._condition.notify_all()
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        if response is None:
+            return None
+        try:
+            return min(float(response.headers.get('Retry-After', '')), 60.0)
+        except ValueError:
+            return None
+
+    def hook(self, request, send, **kwargs):
+        """Transport hook running each request inside a limiter slot."""
+        endpoint = f"{request.method} {endpoint_template(request.url)}"
+        saturated = self.acquire()
+        started = time.perf_counter()
+        response = None
+        try:
+            response = send(request, **kwargs)
+            return response
+        finally:
+            self.release(saturated, endpoint, time.perf_counter() - started, response)
+
+    def stats(self) -> Dict:
+        return {
+            'window': self.window,
+            'in_flight': self._in_flight,
+            'lowest': int(self.lowest),
+            'highest': int(self.highest),
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'wait_s': self.wait_time,
+            'history': list(self.history)
+        }
+
+    def log_summary(self) -> None:
+        stats = self.stats()
+        logger.info(
+            f"Adaptive limiter: window {stats['window']} (range {stats['lowest']}-{stats['highest']}), "
+            f"{stats['decreases']} decreases, {stats['wait_s']:.1f}s spent waiting for a slot"
+        )
+
+
+def enable_adaptive_limit(zvm_address: str, max_limit: int, **options) -> AIMDLimiter:
+    """Limit concurrent requests to zvm_address with an AIMD window of at most max_limit."""
+    options.setdefault('initial', min(4, max_limit))
+    limiter = AIMDLimiter(max_limit=max_limit, **options)
+    transport.add_hook(limiter.hook, host=zvm_address, order=40, name='limiter')
+    return limiter
@@ -0,0 +1,699 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a ZVM and its Keycloak token endpoint.
+
+Serves the REST endpoints the lab scripts use from a synthetic inventory of configurable
+size, with configurable per-request latency, so ZVMLClient can be pointed at it for offline
+benchmarking and throughput tests. Only the standard library is used.
+
+Covered endpoints:
+    POST /auth/realms/zerto/protocol/openid-connect/token
+    GET  /v1/localsite
+    GET  /v1/virtualizationsites
+    GET  /v1/virtualizationsites/{id}/vms|datastores|hosts|folders|networks|hostclusters|resourcepools
+    GET  /v1/vms, /v1/vms/{id}
+    GET  /v1/vpgs, /v1/vpgs/{id}
+    POST /v1/vpgs/{id}/FailoverTest, /v1/vpgs/{id}/FailoverTestStop
+    POST /v1/vpgSettings, GET|PUT|DELETE /v1/vpgSettings/{id}, POST /v1/vpgSettings/{id}/commit
+    POST /v1/vpgs/settings/export, GET /v1/vpgs/settings/exported,
+    POST /v1/vpgs/settings/read, POST /v1/vpgs/settings/import
+    GET  /v1/tasks, /v1/tasks/{id}
+
+CLI usage:
+    python prerequisites/mock_zvm.py --port 8443 --vms-per-site 5000 --vpgs 400 --latency-ms 50
+
+    Then use ZVM_HOST = "127.0.0.1:8443" and ZVM_SSL_VERIFY = False in config.py.
+
+pytest usage (the mock_zvm fixture is defined in tests/conftest.py):
+    def test_sites(mock_zvm):
+        client = ZVMLClient(zvm_address=mock_zvm.address, client_id="any",
+                            client_secret="any", verify_certificate=False)
+
+    The fixture can be parametrized indirectly with MockZVMServer keyword arguments, e.g.
+    @pytest.mark.parametrize("mock_zvm", [{"latency_ms": 100, "vpgs": 50}], indirect=True)
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+TOKEN_PATH = "/auth/realms/zerto/protocol/openid-connect/token"
+
+# Zerto task states as reported in task['Status']['State']
+TASK_STATE_IN_PROGRESS = 0
+TASK_STATE_COMPLETED = 6
+
+
+def utc_timestamp() -> str:
+    """Current UTC time in the format the ZVM uses for TimeStamp and task dates."""
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class Inventory:
+    """Synthetic ZVM inventory: one local site, its peer sites, their resources and VPGs.
+
+    VPGs protect VMs of the local site and replicate to the peer sites in turn. All
+    identifiers are deterministic for a given seed, so runs are reproducible.
+    """
+
+    def __init__(self, peer_sites: int = 1, vms_per_site: int = 50, datastores: int = 5,
+                 hosts: int = 3, folders: int = 5, networks: int = 5, vpgs: int = 10,
+                 vms_per_vpg: int = 5, nics_per_vm: int = 1, seed: int = 0):
+        rng = random.Random(seed)
+        self.local_site_identifier = self._identifier(rng, 'site')
+        self.sites = [{
+            'SiteIdentifier': self.local_site_identifier,
+            'VirtualizationSiteName': 'Local-Site'
+        }]
+        for index in range(peer_sites):
+            self.sites.append({
+                'SiteIdentifier': self._identifier(rng, 'site'),
+                'VirtualizationSiteName': f'Peer-Site-{index + 1:02d}'
+            })
+
+        self.resources = {}
+        for site in self.sites:
+            site_id = site['SiteIdentifier']
+            self.resources[site_id] = {
+                'vms': [
+                    {'VmIdentifier': f'{site_id}.vm-{n}', 'VmName': f"{site['VirtualizationSiteName']}-VM-{n:05d}"}
+                    for n in range(vms_per_site)
+                ],
+                'datastores': [
+                    {'DatastoreIdentifier': f'{site_id}.datastore-{n}', 'DatastoreName': f'Datastore-{n:03d}'}
+                    for n in range(datastores)
+                ],
+                'hosts': [
+                    {'HostIdentifier': f'{site_id}.host-{n}', 'VirtualizationHostName': f'esx-{n:03d}.lab.local'}
+                    for n in range(hosts)
+                ],
+                'folders': [
+                    {'FolderIdentifier': f'{site_id}.group-v{n}', 'FolderName': f'Folder-{n:03d}'}
+                    for n in range(folders)
+                ],
+                'networks': [
+                    {'NetworkIdentifier': f'{site_id}.network-{n}', 'VirtualizationNetworkName': f'VM Network {n}'}
+                    for n in range(networks)
+                ],
+                'hostclusters': [
+                    {'ClusterIdentifier': f'{site_id}.domain-c1', 'VirtualizationClusterName': 'Cluster-01'}
+                ],
+                'resourcepools': [
+                    {'ResourcePoolIdentifier': f'{site_id}.resgroup-1', 'ResourcepoolName': 'Resources'}
+                ]
+            }
+
+        # VPG identifier -> VPG settings document (the committed state)
+        self.vpg_settings = {}
+        local_vms = self.resources[self.local_site_identifier]['vms']
+        peers = self.sites[1:] or self.sites
+        vm_cursor = itertools.cycle(local_vms) if local_vms else None
+        for index in range(vpgs):
+            recovery_site_id = peers[index % len(peers)]['SiteIdentifier']
+            vpg_id = self._identifier(rng, 'vpg')
+            vms = [next(vm_cursor) for _ in range(vms_per_vpg)] if vm_cursor else []
+            self.vpg_settings[vpg_id] = self._settings_document(
+                vpg_id, f'VPG-{index + 1:04d}', recovery_site_id, vms, nics_per_vm
+            )
+
+    @staticmethod
+    def _identifier(rng: random.Random, prefix: str) -> str:
+        return f'{prefix}-{uuid.UUID(int=rng.getrandbits(128))}'
+
+    def _settings_document(self, vpg_id: str, name: str, recovery_site_id: str,
+                           vms: List[Dict], nics_per_vm: int) -> Dict:
+        recovery_network = self.resources[recovery_site_id]['networks'][0]['NetworkIdentifier'] \
+            if self.resources[recovery_site_id]['networks'] else None
+        return {
+            'VpgIdentifier': vpg_id,
+            'Basic': {
+                'Name': name,
+                'VpgType': 'Remote',
+                'RpoInSeconds': 300,
+                'JournalHistoryInHours': 24,
+                'Priority': 'Medium',
+                'UseWanCompression': True,
+                'ProtectedSiteIdentifier': self.local_site_identifier,
+                'RecoverySiteIdentifier': recovery_site_id
+            },
+            'Journal': {},
+            'Recovery': {},
+            'Networks': {
+                'Failover': {'Hypervisor': {'DefaultNetworkIdentifier': recovery_network}},
+                'FailoverTest': {'Hypervisor': {'DefaultNetworkIdentifier': recovery_network}}
+            },
+            'Vms': [
+                {
+                    'VmIdentifier': vm['VmIdentifier'],
+                    'Nics': [
+                        {
+                            'NicIdentifier': f'Network adapter {nic + 1}',
+                            'Failover': {'Hypervisor': {
+                                'NetworkIdentifier': recovery_network,
+                                'ShouldReplaceIpConfiguration': False,
+                                'IpConfig': None
+                            }},
+                            'FailoverTest': {'Hypervisor': {
+                                'NetworkIdentifier': recovery_network,
+                                'ShouldReplaceIpConfiguration': False,
+                                'IpConfig': None
+                            }}
+                        }
+                        for nic in range(nics_per_vm)
+                    ]
+                }
+                for vm in vms
+            ]
+        }
+
+    def site_name(self, site_id: str) -> Optional[str]:
+        return next((site['VirtualizationSiteName'] for site in self.sites if site['SiteIdentifier'] == site_id), None)
+
+    def vm_name(self, vm_id: str) -> Optional[str]:
+        site_id = vm_id.split('.vm-')[0]
+        for vm in self.resources.get(site_id, {}).get('vms', []):
+            if vm['VmIdentifier'] == vm_id:
+                return vm['VmName']
+        return None
+
+
+class MockZVMState:
+    """Mutable server state shared by all request handler threads."""
+
+    def __init__(self, inventory: Inventory, token_lifetime: int = 300, task_duration: float = 0.5,
+                 client_id: str = None, client_secret: str = None):
+        self.inventory = inventory
+        self.token_lifetime = token_lifetime
+        self.task_duration = task_duration
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.lock = threading.RLock()
+        self.tokens = {}
+        self.settings_sessions = {}
+        self.exports = {}
+        self.tasks = {}
+        self.request_counts = Counter()
+
+    # Tokens
+
+    def issue_token(self) -> Dict:
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = time.time() + self.token_lifetime
+        return {
+            'access_token': token,
+            'expires_in': self.token_lifetime,
+            'refresh_expires_in': self.token_lifetime * 6,
+            'refresh_token': uuid.uuid4().hex,
+            'token_type': 'Bearer',
+            'not-before-policy': 0,
+            'scope': 'profile email'
+        }
+
+    def token_valid(self, token: str) -> bool:
+        with self.lock:
+            expiry = self.tokens.get(token)
+        return expiry is not None and expiry > time.time()
+
+    # Tasks
+
+    def create_task(self, task_type: str, vpg_id: str = None, action=None) -> str:
+        """Create a task that completes after task_duration seconds and then runs action."""
+        task_id = f'task-{uuid.uuid4()}'
+        with self.lock:
+            self.tasks[task_id] = {
+                'TaskIdentifier': task_id,
+                'Type': task_type,
+                'Started': utc_timestamp(),
+                'Completed': None,
+                'CompleteAt': time.time() + self.task_duration,
+                'Action': action,
+                'RelatedEntities': {'Vpgs': [{'identifier': vpg_id}] if vpg_id else []}
+            }
+        return task_id
+
+    def task_view(self, task: Dict) -> Dict:
+        """Public representation of a task, completing it if its time has come."""
+        if task['Completed'] is None and time.time() >= task['CompleteAt']:
+            if task['Action']:
+                task['Action']()
+            task['Completed'] = utc_timestamp()
+        done = task['Completed'] is not None
+        return {
+            'TaskIdentifier': task['TaskIdentifier'],
+            'Type': task['Type'],
+            'Started': task['Started'],
+            'Completed': task['Completed'],
+            'Status': {
+                'State': TASK_STATE_COMPLETED if done else TASK_STATE_IN_PROGRESS,
+                'Progress': 100 if done else 50
+            },
+            'RelatedEntities': task['RelatedEntities']
+        }
+
+    # VPGs
+
+    def vpg_summary(self, vpg_id: str, settings: Dict) -> Dict:
+        basic = settings['Basic']
+        return {
+            'VpgIdentifier': vpg_id,
+            'VpgName': basic['Name'],
+            'Priority': basic.get('Priority'),
+            'VmsCount': len(settings['Vms']),
+            'ConfiguredRpoSeconds': basic.get('RpoInSeconds'),
+            'ProtectedSite': {'identifier': basic.get('ProtectedSiteIdentifier'), 'type': 'SiteApi'},
+            'RecoverySite': {'identifier': basic.get('RecoverySiteIdentifier'), 'type': 'SiteApi'},
+            'SourceSite': self.inventory.site_name(basic.get('ProtectedSiteIdentifier')),
+            'TargetSite': self.inventory.site_name(basic.get('RecoverySiteIdentifier')),
+            'Status': 1,
+            'SubStatus': 0
+        }
+
+    def vpg_items(self) -> List[Tuple[str, Dict]]:
+        """Snapshot of (VPG identifier, settings) pairs, safe against concurrent commits."""
+        with self.lock:
+            return list(self.inventory.vpg_settings.items())
+
+    def vpg_by_name(self, name: str) -> Optional[str]:
+        for vpg_id, settings in self.vpg_items():
+            if settings['Basic']['Name'] == name:
+                return vpg_id
+        return None
+
+
+class MockZVMHandler(BaseHTTPRequestHandler):
+    """Routes requests to the MockZVMServer state."""
+
+    protocol_version = 'HTTP/1.1'
+
+    ROUTES = [
+        ('POST', re.compile(r'^/auth/realms/[^/]+/protocol/openid-connect/token$'), 'token'),
+        ('GET', re.compile(r'^/v1/localsite$'), 'localsite'),
+        ('GET', re.compile(r'^/v1/virtualizationsites$'), 'sites'),
+        ('GET', re.compile(r'^/v1/virtualizationsites/(?P<site>[^/]+)/(?P<kind>vms|datastores|hosts|folders|networks|hostclusters|resourcepools)$'), 'site_resources'),
+        ('GET', re.compile(r'^/v1/vms$'), 'vms'),
+        ('GET', re.compile(r'^/v1/vms/(?P<vm>[^/]+)$'), 'vm'),
+        ('POST', re.compile(r'^/v1/vpgs/settings/export$'), 'export_settings'),
+        ('GET', re.compile(r'^/v1/vpgs/settings/exported$'), 'exported_settings'),
+        ('POST', re.compile(r'^/v1/vpgs/settings/read$'), 'read_settings'),
+        ('POST', re.compile(r'^/v1/vpgs/settings/import$'), 'import_settings'),
+        ('GET', re.compile(r'^/v1/vpgs$'), 'vpgs'),
+        ('GET', re.compile(r'^/v1/vpgs/(?P<vpg>[^/]+)$'), 'vpg'),
+        ('POST', re.compile(r'^/v1/vpgs/(?P<vpg>[^/]+)/(?P<action>FailoverTest|FailoverTestStop)$', re.IGNORECASE), 'vpg_action'),
+        ('POST', re.compile(r'^/v1/vpgSettings$', re.IGNORECASE), 'create_settings'),
+        ('GET', re.compile(r'^/v1/vpgSettings/(?P<settings>[^/]+)$', re.IGNORECASE), 'get_settings'),
+        ('PUT', re.compile(r'^/v1/vpgSettings/(?P<settings>[^/]+)$', re.IGNORECASE), 'put_settings'),
+        ('DELETE', re.compile(r'^/v1/vpgSettings/(?P<settings>[^/]+)$', re.IGNORECASE), 'delete_settings'),
+        ('POST', re.compile(r'^/v1/vpgSettings/(?P<settings>[^/]+)/commit$', re.IGNORECASE), 'commit_settings'),
+        ('GET', re.compile(r'^/v1/tasks$'), 'tasks'),
+        ('GET', re.compile(r'^/v1/tasks/(?P<task>[^/]+)$'), 'task'),
+    ]
+
+    @property
+    def state(self) -> MockZVMState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        logging.debug("mock_zvm: " + format, *args)
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    # Plumbing
+
+    def dispatch(self, method: str):
+        url = urlparse(self.path)
+        self.query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        latency = self.server.latency_ms + random.uniform(0, self.server.jitter_ms)
+        if latency:
+            time.sleep(latency / 1000.0)
+
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                with self.state.lock:
+                    self.state.request_counts[(method, name)] += 1
+                if name != 'token' and not self.authorized():
+                    return self.send_json(401, {'Message': 'Authorization has been denied for this request.'})
+                try:
+                    return getattr(self, f'handle_{name}')(**match.groupdict())
+                except KeyError as e:
+                    return self.send_json(404, {'Message': f'Not found: {e}'})
+        self.send_json(404, {'Message': f'No mock route for {method} {url.path}'})
+
+    def authorized(self) -> bool:
+        header = self.headers.get('Authorization', '')
+        if header.startswith('Bearer '):
+            return self.state.token_valid(header[len('Bearer '):])
+        # The SDK also sends the token in the x-zerto-session header on some calls
+        session = self.headers.get('x-zerto-session')
+        return bool(session) and self.state.token_valid(session)
+
+    def json_body(self):
+        return json.loads(self.body) if self.body else {}
+
+    def send_json(self, status: int, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # Keycloak
+
+    def handle_token(self):
+        form = {key: values[0] for key, values in parse_qs(self.body.decode('utf-8')).items()}
+        state = self.state
+        if form.get('grant_type') not in ('client_credentials', 'refresh_token', 'password'):
+            return self.send_json(400, {'error': 'unsupported_grant_type'})
+        if state.client_id and (form.get('client_id') != state.client_id or form.get('client_secret') != state.client_secret):
+            return self.send_json(401, {'error': 'unauthorized_client', 'error_description': 'Invalid client credentials'})
+        self.send_json(200, state.issue_token())
+
+    # Sites and resources
+
+    def handle_localsite(self):
+        inventory = self.state.inventory
+        self.send_json(200, {
+            'SiteIdentifier': inventory.local_site_identifier,
+            'SiteName': inventory.site_name(inventory.local_site_identifier),
+            'Version': '10.0.0',
+            'SiteType': 'VCenter',
+            'IpAddress': self.server.server_address[0]
+        })
+
+    def handle_sites(self):
+        self.send_json(200, self.state.inventory.sites)
+
+    def handle_site_resources(self, site: str, kind: str):
+        self.send_json(200, self.state.inventory.resources[site][kind])
+
+    # Protected VMs
+
+    def protected_vms(self) -> List[Dict]:
+        state = self.state
+        vms = []
+        for vpg_id, settings in state.vpg_items():
+            for vm in settings['Vms']:
+                vms.append({
+                    'VmIdentifier': vm['VmIdentifier'],
+                    'VmName': state.inventory.vm_name(vm['VmIdentifier']),
+                    'VpgIdentifier': vpg_id,
+                    'VpgName': settings['Basic']['Name']
+                })
+        return vms
+
+    def handle_vms(self):
+        vms = self.protected_vms()
+        for param, field in [('vmIdentifier', 'VmIdentifier'), ('vmName', 'VmName'), ('vpgName', 'VpgName')]:
+            if param in self.query:
+                vms = [vm for vm in vms if vm[field] == self.query[param]]
+        self.send_json(200, vms)
+
+    def handle_vm(self, vm: str):
+        match = next((entry for entry in self.protected_vms() if entry['VmIdentifier'] == vm), None)
+        if match is None:
+            raise KeyError(vm)
+        self.send_json(200, match)
+
+    # VPGs
+
+    def handle_vpgs(self):
+        state = self.state
+        vpgs = [state.vpg_summary(vpg_id, settings) for vpg_id, settings in state.vpg_items()]
+        if 'vpgName' in self.query:
+            vpgs = [vpg for vpg in vpgs if vpg['VpgName'] == self.query['vpgName']]
+        self.send_json(200, vpgs)
+
+    def handle_vpg(self, vpg: str):
+        self.send_json(200, self.state.vpg_summary(vpg, self.state.inventory.vpg_settings[vpg]))
+
+    def handle_vpg_action(self, vpg: str, action: str):
+        if vpg not in self.state.inventory.vpg_settings:
+            raise KeyError(vpg)
+        self.send_json(200, self.state.create_task(action, vpg))
+
+    # VPG settings
+
+    def handle_create_settings(self):
+        state = self.state
+        body = self.json_body()
+        vpg_id = body.get('VpgIdentifier')
+        if vpg_id:
+            document = copy.deepcopy(state.inventory.vpg_settings[vpg_id])
+        else:
+            document = {'VpgIdentifier': None, 'Basic': {}, 'Journal': {}, 'Recovery': {}, 'Networks': {}, 'Vms': []}
+        settings_id = str(uuid.uuid4())
+        with state.lock:
+            state.settings_sessions[settings_id] = document
+        self.send_json(200, settings_id)
+
+    def handle_get_settings(self, settings: str):
+        with self.state.lock:
+            document = self.state.settings_sessions[settings]
+        self.send_json(200, document)
+
+    def handle_put_settings(self, settings: str):
+        document = self.json_body()
+        with self.state.lock:
+            if settings not in self.state.settings_sessions:
+                raise KeyError(settings)
+            self.state.settings_sessions[settings] = document
+        self.send_json(200, document)
+
+    def handle_delete_settings(self, settings: str):
+        with self.state.lock:
+            del self.state.settings_sessions[settings]
+        self.send_json(200, None)
+
+    def handle_commit_settings(self, settings: str):
+        state = self.state
+        with state.lock:
+            document = state.settings_sessions.pop(settings)
+        vpg_id = document.get('VpgIdentifier') or f'vpg-{uuid.uuid4()}'
+        document['VpgIdentifier'] = vpg_id
+
+        def apply():
+            state.inventory.vpg_settings[vpg_id] = document
+
+        self.send_json(200, state.create_task('UpdateProtectionGroup', vpg_id, apply))
+
+    # Export / import of VPG settings
+
+    def selected_vpgs(self, names: Optional[List[str]]) -> List[Dict]:
+        vpgs = [settings for _, settings in self.state.vpg_items()]
+        if names:
+            wanted = set(names)
+            vpgs = [settings for settings in vpgs if settings['Basic']['Name'] in wanted]
+        return [copy.deepcopy(settings) for settings in vpgs]
+
+    def handle_export_settings(self):
+        state = self.state
+        names = self.json_body().get('VpgNames')
+        with state.lock:
+            timestamp = utc_timestamp()
+            while timestamp in state.exports:
+                time.sleep(0.001)
+                timestamp = utc_timestamp()
+            state.exports[timestamp] = self.selected_vpgs(names)
+        self.send_json(200, {'TimeStamp': timestamp})
+
+    def handle_exported_settings(self):
+        with self.state.lock:
+            timestamps = list(self.state.exports)
+        self.send_json(200, [{'TimeStamp': timestamp} for timestamp in timestamps])
+
+    def handle_read_settings(self):
+        body = self.json_body()
+        with self.state.lock:
+            vpgs = self.state.exports[body['TimeStamp']]
+        names = body.get('VpgNames')
+        if names:
+            wanted = set(names)
+            vpgs = [settings for settings in vpgs if settings['Basic']['Name'] in wanted]
+        self.send_json(200, {'ExportedVpgSettingsApi': vpgs})
+
+    def handle_import_settings(self):
+        state = self.state
+        imported = self.json_body().get('ExportedVpgSettingsApi') or []
+        tasks = []
+        for document in imported:
+            vpg_id = state.vpg_by_name(document['Basic']['Name']) or f'vpg-{uuid.uuid4()}'
+            document = dict(document, VpgIdentifier=vpg_id)
+            tasks.append(state.create_task(
+                'UpdateProtectionGroup', vpg_id,
+                lambda vpg_id=vpg_id, document=document: state.inventory.vpg_settings.__setitem__(vpg_id, document)
+            ))
+        self.send_json(200, [{'VpgName': document['Basic']['Name'], 'TaskIdentifier': task_id}
+                             for document, task_id in zip(imported, tasks)])
+
+    # Tasks
+
+    def handle_tasks(self):
+        state = self.state
+        with state.lock:
+            tasks = [state.task_view(task) for task in state.tasks.values()]
+        self.send_json(200, tasks)
+
+    def handle_task(self, task: str):
+        state = self.state
+        with state.lock:
+            view = state.task_view(state.tasks[task])
+        self.send_json(200, view)
+
+
+class MockZVMServer:
+    """Threaded HTTPS (or HTTP) server serving a synthetic ZVM.
+
+    Keyword arguments not consumed here are passed to Inventory. Use start()/stop() or
+    the instance as a context manager; `address` is the value for ZVMLClient's zvm_address.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, tls: bool = True,
+                 certfile: str = None, keyfile: str = None, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, token_lifetime: int = 300, task_duration: float = 0.5,
+                 client_id: str = None, client_secret: str = None, **inventory_options):
+        self.inventory = Inventory(**inventory_options)
+        self.state = MockZVMState(self.inventory, token_lifetime, task_duration, client_id, client_secret)
+        self.httpd = ThreadingHTTPServer((host, port), MockZVMHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.httpd.latency_ms = latency_ms
+        self.httpd.jitter_ms = jitter_ms
+        self.tls = tls
+        self.cert_dir = None
+        if tls:
+            if not certfile:
+                certfile, keyfile = self._self_signed_certificate()
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            # Handshakes run lazily in the handler threads instead of the accept loop
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True,
+                                                    do_handshake_on_connect=False)
+        self.thread = None
+
+    def _self_signed_certificate(self) -> Tuple[str, str]:
+        """Create a throwaway self-signed certificate with the openssl CLI."""
+        self.cert_dir = tempfile.mkdtemp(prefix='mock_zvm_')
+        certfile = os.path.join(self.cert_dir, 'cert.pem')
+        keyfile = os.path.join(self.cert_dir, 'key.pem')
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+             '-subj', '/CN=localhost', '-keyout', keyfile, '-out', certfile],
+            check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return certfile, keyfile
+
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'{host}:{port}'
+
+    @property
+    def base_url(self) -> str:
+        return f"{'https' if self.tls else 'http'}://{self.address}"
+
+    @property
+    def request_counts(self) -> Counter:
+        """Requests served so far, keyed by (HTTP method, route name)."""
+        return self.state.request_counts
+
+    def start(self) -> 'MockZVMServer':
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='mock-zvm', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.cert_dir:
+            shutil.rmtree(self.cert_dir, ignore_errors=True)
+
+    def __enter__(self) -> 'MockZVMServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock ZVM with a synthetic inventory")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8443, help="Port to listen on (default: 8443)")
+    parser.add_argument("--no-tls", action="store_true", help="Serve plain HTTP instead of HTTPS")
+    parser.add_argument("--certfile", help="TLS certificate (default: generate a self-signed one)")
+    parser.add_argument("--keyfile", help="TLS private key for --certfile")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request in ms (default: 0)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency per request in ms (default: 0)")
+    parser.add_argument("--token-lifetime", type=int, default=300, help="Access token lifetime in seconds (default: 300)")
+    parser.add_argument("--task-duration", type=float, default=0.5, help="Seconds until tasks complete (default: 0.5)")
+    parser.add_argument("--client-id", help="Only accept this client ID (default: accept any)")
+    parser.add_argument("--client-secret", help="Client secret required with --client-id")
+    parser.add_argument("--peer-sites", type=int, default=1, help="Number of peer sites (default: 1)")
+    parser.add_argument("--vms-per-site", type=int, default=50, help="VMs per site (default: 50)")
+    parser.add_argument("--datastores", type=int, default=5, help="Datastores per site (default: 5)")
+    parser.add_argument("--hosts", type=int, default=3, help="Hosts per site (default: 3)")
+    parser.add_argument("--folders", type=int, default=5, help="Folders per site (default: 5)")
+    parser.add_argument("--networks", type=int, default=5, help="Networks per site (default: 5)")
+    parser.add_argument("--vpgs", type=int, default=10, help="Number of VPGs (default: 10)")
+    parser.add_argument("--vms-per-vpg", type=int, default=5, help="VMs per VPG (default: 5)")
+    parser.add_argument("--nics-per-vm", type=int, default=1, help="NICs per protected VM (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic identifiers (default: 0)")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    server = MockZVMServer(
+        host=args.host, port=args.port, tls=not args.no_tls, certfile=args.certfile, keyfile=args.keyfile,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, token_lifetime=args.token_lifetime,
+        task_duration=args.task_duration, client_id=args.client_id, client_secret=args.client_secret,
+        peer_sites=args.peer_sites, vms_per_site=args.vms_per_site, datastores=args.datastores,
+        hosts=args.hosts, folders=args.folders, networks=args.networks, vpgs=args.vpgs,
+        vms_per_vpg=args.vms_per_vpg, nics_per_vm=args.nics_per_vm, seed=args.seed
+    )
+    logging.info(f"Mock ZVM listening on {server.base_url} "
+                 f"({len(server.inventory.sites)} sites, {len(server.inventory.vpg_settings)} VPGs)")
+    logging.info(f'Set ZVM_HOST = "{server.address}" and ZVM_SSL_VERIFY = False in config.py')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
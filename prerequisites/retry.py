@@ -0,0 +1,226 @@
+"""
+Automatic retries and a circuit breaker for requests to the ZVM.
+
+RetryPolicy is a transport hook that repeats a request after a transient failure, with
+exponential backoff and full jitter (a random wait between 0 and base * 2^attempt, capped), or
+the server's Retry-After if that is longer. Transient failures are connection errors, timeouts
+and 429/502/503/504 responses. A 500 from the ZVM usually reports an application error (bad
+settings, unknown VPG), so it is not retried by default.
+
+Only requests that are safe to repeat are retried:
+- GET, HEAD, OPTIONS, PUT and DELETE, which are idempotent;
+- POSTs to endpoints that only read state (token requests, settings export/read); commits,
+  failover actions and new settings sessions (a repeat would leave a stray session) are never
+  repeated;
+- any request that failed to connect, since it never reached the ZVM.
+
+CircuitBreaker stops the retries from piling up when the ZVM is down: after
+failure_threshold consecutive transient failures it opens and requests fail immediately with
+CircuitOpenError for reset_timeout seconds; then a single trial request decides whether it
+closes again. A 429 is retried but does not count as a failure, since the ZVM is up and only
+asking for less load. Neither does an exception that is not a connection error or timeout (a
+cassette miss, KeyboardInterrupt, a bug): it says nothing about the ZVM, so it only hands the
+half-open trial on to the next request.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+import urllib3
+
+from . import transport
+from .instrumentation import endpoint_template
+
+RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+SAFE_POST_PATHS = [
+    re.compile(r'/protocol/openid-connect/token$'),
+    re.compile(r'^/v1/vpgs/settings/(export|read)$', re.IGNORECASE),
+]
+# Transient responses that still show the ZVM is up, so they do not trip the circuit breaker
+BREAKER_IGNORED_STATUS_CODES = frozenset([429])
+
+logger = logging.getLogger(__name__)
+
+
+def not_sent(error: Exception) -> bool:
+    """Whether a requests exception means the connection failed before the request went out."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """The circuit breaker is open: the ZVM failed repeatedly and is not being called."""
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures, half-open after reset_timeout, closed on success."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self, description: str) -> None:
+        """Raise CircuitOpenError unless the request may go out."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.time() - self._opened_at >= self.reset_timeout:
+                # Let exactly one trial request through
+                self.state = self.HALF_OPEN
+                return
+            retry_in = max(0.0, self.reset_timeout - (time.time() - self._opened_at))
+        raise CircuitOpenError(
+            f"ZVM unavailable after {self.failures} consecutive failures, not sending {description} "
+            f"(circuit breaker retries in {retry_in:.0f}s)"
+        )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit breaker closed, ZVM is responding again")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def release_trial(self) -> None:
+        """Settle a request whose outcome says nothing about the ZVM, without counting it."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                # The next request becomes the trial
+                self.state = self.OPEN
+                self._opened_at = time.time() - self.reset_timeout
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                if self.state == self.CLOSED:
+                    self.opened += 1
+                    logger.error(f"Circuit breaker open after {self.failures} consecutive failures, "
+                                 f"pausing requests for {self.reset_timeout:.0f}s")
+                self.state = self.OPEN
+                self._opened_at = time.time()
+
+
+class RetryPolicy:
+    """Transport hook retrying safe requests on transient failures."""
+
+    def __init__(self, max_attempts: int = 4, backoff_base: float = 0.5, backoff_cap: float = 20.0,
+                 retry_status_codes=RETRY_STATUS_CODES, breaker: Optional[CircuitBreaker] = None):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.breaker = breaker
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+
+    @staticmethod
+    def can_repeat(request) -> bool:
+        """Whether sending request twice has the same effect as sending it once."""
+        if request.body is not None and not isinstance(request.body, (bytes, str)):
+            return False
+        if request.method in RETRY_METHODS:
+            return True
+        if request.method == 'POST':
+            path = urlparse(request.url).path
+            return any(pattern.search(path) for pattern in SAFE_POST_PATHS)
+        return False
+
+    def backoff(self, attempt: int, response=None) -> float:
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        if response is not None:
+            try:
+                delay = max(delay, min(float(response.headers.get('Retry-After', '')), self.backoff_cap))
+            except ValueError:
+                pass
+        return delay
+
+    def hook(self, request, send, **kwargs):
+        description = f"{request.method} {endpoint_template(request.url)}"
+        repeatable = self.can_repeat(request)
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.breaker:
+                self.breaker.before_request(description)
+            response, error = None, None
+            try:
+                response = send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except BaseException:
+                # Not a ZVM failure, but a half-open trial still has to finish
+                if self.breaker:
+                    self.breaker.release_trial()
+                raise
+
+            transient = error is not None or response.status_code in self.retry_status_codes
+            if self.breaker:
+                if transient and (error is not None or response.status_code not in BREAKER_IGNORED_STATUS_CODES):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+            if not transient:
+                if attempt > 1:
+                    self.recovered += 1
+                return response
+
+            # A failed connect never reached the ZVM, so any request can be sent again
+            retry = repeatable or (error is not None and not_sent(error))
+            if not retry or attempt >= self.max_attempts:
+                if attempt > 1:
+                    self.exhausted += 1
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self.backoff(attempt - 1, response)
+            reason = f"HTTP {response.status_code}" if response is not None else type(error).__name__
+            logger.warning(f"{description} failed ({reason}), retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{self.max_attempts})")
+            if response is not None and response.raw is not None:
+                response.close()
+            self.retries += 1
+            time.sleep(delay)
+
+    def stats(self) -> Dict:
+        return {
+            'retries': self.retries,
+            'recovered': self.recovered,
+            'exhausted': self.exhausted,
+            'breaker_state': self.breaker.state if self.breaker else None,
+            'breaker_opened': self.breaker.opened if self.breaker else 0
+        }
+
+    def log_summary(self) -> None:
+        stats = self.stats()
+        if stats['retries'] or stats['breaker_opened']:
+            logger.info(
+                f"Retries: {stats['retries']} retries, {stats['recovered']} requests recovered, "
+                f"{stats['exhausted']} gave up; circuit breaker opened {stats['breaker_opened']} times"
+            )
+
+
+def enable_retries(zvm_address: str, max_attempts: int = 4, failure_threshold: int = 5,
+                   reset_timeout: float = 30.0, **options) -> RetryPolicy:
+    """Retry transient failures of requests to zvm_address, behind a circuit breaker."""
+    policy = RetryPolicy(max_attempts, breaker=CircuitBreaker(failure_threshold, reset_timeout), **options)
+    transport.add_hook(policy.hook, host=zvm_address, order=20, name='retry')
+    return policy
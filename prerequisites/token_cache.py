@@ -0,0 +1,220 @@
+"""
+Persistent Keycloak token cache for ZVMLClient.
+
+Every script run normally starts with a client-credentials request to Keycloak. With the
+cache enabled, the access token from that request is saved to disk and handed back to the
+next run as long as it has more than `margin` seconds left, so back-to-back runs (cron jobs,
+automation) skip authentication.
+
+The cache is opt-in through the ZERTO_TOKEN_CACHE environment variable:
+    ZERTO_TOKEN_CACHE=1            use ~/.cache/zerto-labs/tokens.json
+    ZERTO_TOKEN_CACHE=/some/path   use the given file
+Unset, empty or "0" leaves the cache off.
+
+Entries are keyed by ZVM host and client ID and also record a fingerprint of the client
+secret, so a cached token is only reused for the credentials that obtained it. The cache
+directory is created 0700 and the file 0600; a cache file readable by other users is ignored.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote_plus
+
+from . import transport
+
+ENV_VAR = "ZERTO_TOKEN_CACHE"
+DEFAULT_PATH = Path.home() / ".cache" / "zerto-labs" / "tokens.json"
+DEFAULT_MARGIN = 60
+
+logger = logging.getLogger(__name__)
+
+
+def secret_fingerprint(client_secret: str) -> str:
+    return hashlib.sha256(client_secret.encode('utf-8')).hexdigest()[:16]
+
+
+def parse_token_request(request) -> Dict[str, str]:
+    """Return the grant_type, client_id and client_secret of a token request."""
+    body = request.body or ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    form = {key: values[0] for key, values in parse_qs(body).items()}
+    authorization = request.headers.get('Authorization', '')
+    if authorization.lower().startswith('basic '):
+        try:
+            user, _, password = base64.b64decode(authorization[6:]).decode('utf-8').partition(':')
+            form.setdefault('client_id', unquote_plus(user))
+            form.setdefault('client_secret', unquote_plus(password))
+        except ValueError:
+            pass
+    return form
+
+
+class TokenCache:
+    """Token responses on disk, keyed by "host|client_id"."""
+
+    def __init__(self, path: Path = DEFAULT_PATH, margin: int = DEFAULT_MARGIN):
+        self.path = Path(path).expanduser()
+        self.margin = margin
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(host: str, client_id: str) -> str:
+        return f"{transport.normalize_host(host)}|{client_id}"
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            mode = self.path.stat().st_mode
+        except FileNotFoundError:
+            return {}
+        if mode & (stat.S_IRWXG | stat.S_IRWXO):
+            logger.warning(f"Ignoring token cache {self.path}: it is accessible by other users (chmod 600 to fix)")
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable token cache {self.path}: {e}")
+            return {}
+
+    def _save(self, entries: Dict[str, Dict]) -> None:
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # mkstemp creates the file 0600; os.replace keeps concurrent readers from seeing partial writes
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.path.parent), prefix='.tokens-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, host: str, client_id: str, client_secret: str) -> Optional[Dict]:
+        """Return a token response with expires_in set to its remaining lifetime, or None."""
+        with self._lock:
+            entry = self._load().get(self.key(host, client_id))
+        if not entry or entry.get('secret') != secret_fingerprint(client_secret):
+            return None
+        remaining = entry['expires_at'] - time.time()
+        if remaining <= self.margin:
+            return None
+        token = dict(entry['token'])
+        token['expires_in'] = int(remaining)
+        if 'refresh_expires_at' in entry:
+            token['refresh_expires_in'] = max(0, int(entry['refresh_expires_at'] - time.time()))
+        return token
+
+    def put(self, host: str, client_id: str, client_secret: str, token: Dict, obtained_at: float) -> None:
+        entry = {
+            'token': token,
+            'secret': secret_fingerprint(client_secret),
+            'expires_at': obtained_at + float(token.get('expires_in', 0))
+        }
+        if token.get('refresh_expires_in'):
+            entry['refresh_expires_at'] = obtained_at + float(token['refresh_expires_in'])
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            entries = {key: value for key, value in entries.items() if value.get('expires_at', 0) > now}
+            entries[self.key(host, client_id)] = entry
+            self._save(entries)
+
+    def invalidate(self, host: str, client_id: str) -> None:
+        with self._lock:
+            entries = self._load()
+            if entries.pop(self.key(host, client_id), None) is not None:
+                self._save(entries)
+
+    def hook(self, host: str):
+        """Transport hook answering client-credentials token requests for host from the cache."""
+        issued = {}
+
+        def token_cache_hook(request, send, **kwargs):
+            if not transport.is_token_request(request):
+                response = send(request, **kwargs)
+                # A rejected cached token (revoked, ZVM restarted) must not be handed out again
+                if response.status_code == 401 and issued:
+                    bearer = request.headers.get('Authorization', '')[len('Bearer '):]
+                    client_id = issued.get(bearer)
+                    if client_id:
+                        logger.info("Cached access token was rejected, removing it from the token cache")
+                        self.invalidate(host, client_id)
+                return response
+
+            form = parse_token_request(request)
+            client_id = form.get('client_id')
+            client_secret = form.get('client_secret', '')
+            if not client_id:
+                return send(request, **kwargs)
+
+            no_cache = 'no-cache' in request.headers.get('Cache-Control', '')
+            if form.get('grant_type') == 'client_credentials' and not no_cache:
+                token = self.get(host, client_id, client_secret)
+                if token:
+                    self.hits += 1
+                    issued[token.get('access_token')] = client_id
+                    logger.info(f"Using cached access token for {client_id}@{host} ({token['expires_in']}s left)")
+                    return transport.make_json_response(request, token)
+                self.misses += 1
+
+            obtained_at = time.time()
+            response = send(request, **kwargs)
+            if response.status_code == 200:
+                try:
+                    token = response.json()
+                    if token.get('access_token') and token.get('expires_in'):
+                        self.put(host, client_id, client_secret, token, obtained_at)
+                        issued[token['access_token']] = client_id
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not update token cache {self.path}: {e}")
+            return response
+
+        return token_cache_hook
+
+
+def get_cache_path(setting: Optional[str] = None) -> Optional[Path]:
+    """Resolve a ZERTO_TOKEN_CACHE style setting to a cache file path (None when disabled)."""
+    if setting is None:
+        setting = os.environ.get(ENV_VAR, '')
+    setting = setting.strip()
+    if setting.lower() in ('', '0', 'false', 'no', 'off'):
+        return None
+    if setting.lower() in ('1', 'true', 'yes', 'on'):
+        return DEFAULT_PATH
+    return Path(setting).expanduser()
+
+
+def enable_token_cache(zvm_address: str, path: Optional[str] = None,
+                       margin: int = DEFAULT_MARGIN) -> Optional[TokenCache]:
+    """
+    Serve Keycloak tokens for zvm_address from the on-disk cache.
+    Call before creating the ZVMLClient. Returns None if the cache is not enabled.
+    """
+    cache_path = get_cache_path(path)
+    if cache_path is None:
+        return None
+    cache = TokenCache(cache_path, margin)
+    transport.add_hook(cache.hook(zvm_address), host=zvm_address, order=60, name='token_cache')
+    logger.debug(f"Token cache enabled for {zvm_address}: {cache_path}")
+    return cache
+
+
+def disable_token_cache(zvm_address: str) -> bool:
+    """Stop serving tokens for zvm_address from the cache; returns whether it was enabled."""
+    host = transport.normalize_host(zvm_address)
+    hooks = [hook for hook in transport.get_hooks() if hook.name == 'token_cache' and hook.host == host]
+    for hook in hooks:
+        transport.remove_hook(hook)
+    return bool(hooks)
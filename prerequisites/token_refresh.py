@@ -0,0 +1,222 @@
+"""
+Background refresh of the Keycloak access token for long-running jobs.
+
+Without it, the token is only renewed when a request finds it expired, so that request (and
+every worker waiting behind it) stalls on the login round trip or fails with 401. The
+TokenRefresher below sees the client-credentials login the SDK performs at startup, then
+repeats it on a background thread ahead of expiry. API requests to the ZVM pick up the current
+token when they are sent, so workers never wait for a refresh, and later token requests from
+the SDK are answered with the token already held.
+
+Each refresh's latency is recorded; stats() and log_summary() report them.
+
+There is one refresher per ZVM host: enabling refresh again for a host (e.g. a second
+create_client() call) stops the previous refresher's thread and replaces its hook.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+import requests
+
+from . import transport
+from .token_cache import parse_token_request
+
+logger = logging.getLogger(__name__)
+
+# normalized host -> (TokenRefresher, its transport hook)
+_refreshers = {}
+_refreshers_lock = threading.Lock()
+
+
+class Token(NamedTuple):
+    access_token: str
+    expires_at: float
+    lifetime: float
+    payload: Dict
+
+    def remaining(self) -> float:
+        return self.expires_at - time.time()
+
+
+class TokenRefresher:
+    """
+    Keeps a current access token for one ZVM host.
+    The token is refreshed max(min_lead, lead_ratio * lifetime) seconds before it expires;
+    failed refreshes are retried every retry_interval seconds, doubling up to a minute.
+    """
+
+    def __init__(self, host: str, lead_ratio: float = 0.25, min_lead: float = 30, retry_interval: float = 5):
+        self.host = host
+        self.lead_ratio = lead_ratio
+        self.min_lead = min_lead
+        self.retry_interval = retry_interval
+        self.refresh_latencies = []
+        self.failures = 0
+        self._token = None
+        self._template = None
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def token(self) -> Optional[Token]:
+        return self._token
+
+    def _store(self, payload: Dict) -> None:
+        lifetime = float(payload['expires_in'])
+        self._token = Token(payload['access_token'], time.time() + lifetime, lifetime, payload)
+        self._wakeup.set()
+
+    def refresh_at(self, token: Token) -> float:
+        return token.expires_at - max(self.min_lead, token.lifetime * self.lead_ratio)
+
+    def hook(self, request, send, **kwargs):
+        """Transport hook: serve token requests from memory and stamp API requests with the current token."""
+        if transport.is_token_request(request):
+            return self._handle_token_request(request, send, **kwargs)
+
+        current = self._token
+        if current is not None:
+            self._set_token(request, current)
+        response = send(request, **kwargs)
+        if response.status_code == 401 and current is not None and self.refresh(stale=current):
+            # Token was revoked early; retry once with the new one
+            self._set_token(request, self._token)
+            response = send(request, **kwargs)
+        return response
+
+    @staticmethod
+    def _set_token(request, token: Token) -> None:
+        if request.headers.get('Authorization', '').startswith('Bearer '):
+            request.headers['Authorization'] = f"Bearer {token.access_token}"
+        if 'x-zerto-session' in request.headers:
+            request.headers['x-zerto-session'] = token.access_token
+
+    def _handle_token_request(self, request, send, **kwargs):
+        if parse_token_request(request).get('grant_type') != 'client_credentials':
+            return send(request, **kwargs)
+        current = self._token
+        if current is not None and current.remaining() > self.min_lead:
+            payload = dict(current.payload, expires_in=int(current.remaining()))
+            return transport.make_json_response(request, payload)
+
+        response = send(request, **kwargs)
+        if response.status_code == 200:
+            payload = response.json()
+            if payload.get('access_token') and payload.get('expires_in'):
+                # Keep the login request so the background thread can repeat it
+                self._template = (request.copy(), dict(kwargs), send)
+                self._store(payload)
+                self.start()
+        return response
+
+    def refresh(self, stale: Token = None) -> bool:
+        """
+        Obtain a new token now. If stale is given and the token has already been replaced
+        since, the newer token is kept instead of logging in again.
+        """
+        with self._refresh_lock:
+            if stale is not None and self._token is not stale:
+                return True
+            if self._template is None:
+                return False
+            template, kwargs, send = self._template
+            request = template.copy()
+            # Ask the on-disk token cache (if enabled) for a fresh login, not the token we hold
+            request.headers['Cache-Control'] = 'no-cache'
+
+            started = time.perf_counter()
+            try:
+                response = send(request, **kwargs)
+                response.raise_for_status()
+                payload = response.json()
+            except (requests.RequestException, ValueError) as e:
+                self.failures += 1
+                logger.warning(f"Access token refresh failed: {e}")
+                return False
+            latency = time.perf_counter() - started
+            self.refresh_latencies.append(latency)
+            self._store(payload)
+        logger.info(f"Access token refreshed in {latency * 1000:.0f} ms, valid for {payload['expires_in']}s")
+        return True
+
+    def _run(self) -> None:
+        retry = self.retry_interval
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            current = self._token
+            delay = self.refresh_at(current) - time.time()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                continue
+            if self.refresh(stale=current):
+                retry = self.retry_interval
+            else:
+                self._stopped.wait(retry)
+                retry = min(retry * 2, 60)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='token-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop the background thread; wait up to timeout seconds for it to exit if given."""
+        self._stopped.set()
+        self._wakeup.set()
+        if timeout is not None and self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        latencies = self.refresh_latencies
+        return {
+            'refreshes': len(latencies),
+            'failures': self.failures,
+            'last_ms': latencies[-1] * 1000 if latencies else None,
+            'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else None,
+            'max_ms': max(latencies) * 1000 if latencies else None
+        }
+
+    def log_summary(self) -> None:
+        stats = self.stats()
+        if not stats['refreshes'] and not stats['failures']:
+            return
+        if stats['refreshes']:
+            logger.info(
+                f"Token refresh: {stats['refreshes']} refreshes, {stats['failures']} failures, "
+                f"latency mean {stats['mean_ms']:.0f} ms, max {stats['max_ms']:.0f} ms"
+            )
+        else:
+            logger.info(f"Token refresh: {stats['failures']} failures, no successful refresh")
+
+
+def enable_token_refresh(zvm_address: str, **options) -> TokenRefresher:
+    """
+    Keep the access token for zvm_address fresh in the background.
+    Call before creating the ZVMLClient; options are passed to TokenRefresher.
+    A refresher already running for zvm_address is stopped and replaced.
+    """
+    refresher = TokenRefresher(zvm_address, **options)
+    with _refreshers_lock:
+        hook = transport.add_hook(refresher.hook, host=zvm_address, order=50, name='token_refresh')
+        previous = _refreshers.get(transport.normalize_host(zvm_address))
+        _refreshers[transport.normalize_host(zvm_address)] = (refresher, hook)
+    if previous:
+        previous[0].stop()
+    return refresher
+
+
+def disable_token_refresh(zvm_address: str) -> Optional[TokenRefresher]:
+    """Stop the refresher of zvm_address and remove its hook; returns it, or None if there was none."""
+    with _refreshers_lock:
+        entry = _refreshers.pop(transport.normalize_host(zvm_address), None)
+    if entry is None:
+        return None
+    refresher, hook = entry
+    transport.remove_hook(hook)
+    refresher.stop()
+    return refresher
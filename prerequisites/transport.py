@@ -0,0 +1,128 @@
+"""
+HTTP transport hooks for ZVMLClient.
+
+The Zerto SDK and its Keycloak login talk HTTP through the requests library, so every call
+ends up in requests.adapters.HTTPAdapter.send. install() wraps that method once; hooks added
+with add_hook() then see each outgoing PreparedRequest for the host they are registered for
+and can answer it, change it, or observe its response, without changes to the SDK itself.
+
+A hook is a callable hook(request, send, **kwargs) -> requests.Response, where send(request,
+**kwargs) passes the request on to the next hook and finally to the network. Hooks run in
+ascending `order`; lower orders wrap higher ones.
+"""
+
+import itertools
+import json
+import threading
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+TOKEN_PATH_SUFFIX = "/protocol/openid-connect/token"
+# Token endpoint of the Keycloak realm the ZVM uses
+TOKEN_PATH = "/auth/realms/zerto" + TOKEN_PATH_SUFFIX
+
+_lock = threading.Lock()
+_hooks = []
+_sequence = itertools.count()
+_original_send = None
+
+
+class Hook:
+    """A registered hook and the host it applies to (None for all hosts)."""
+
+    def __init__(self, func: Callable, host: Optional[str], order: int, name: Optional[str]):
+        self.func = func
+        self.host = normalize_host(host) if host else None
+        self.order = order
+        self.name = name
+        self.sequence = next(_sequence)
+
+    def matches(self, request: requests.PreparedRequest) -> bool:
+        return self.host is None or normalize_host(request.url) == self.host
+
+
+def normalize_host(value: str) -> str:
+    """Return host[:port] for a URL or address, lower-cased and without the default HTTPS port."""
+    if '//' not in value:
+        value = f'https://{value}'
+    netloc = urlparse(value).netloc.lower()
+    if netloc.endswith(':443'):
+        netloc = netloc[:-len(':443')]
+    return netloc
+
+
+def is_token_request(request: requests.PreparedRequest) -> bool:
+    """True for requests to a Keycloak OpenID Connect token endpoint."""
+    return request.method == 'POST' and urlparse(request.url).path.endswith(TOKEN_PATH_SUFFIX)
+
+
+def _dispatch(adapter: HTTPAdapter, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+    hooks = [hook for hook in _hooks if hook.matches(request)]
+
+    def call(index: int, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if index == len(hooks):
+            return _original_send(adapter, request, **kwargs)
+        return hooks[index].func(request, lambda request, **kwargs: call(index + 1, request, **kwargs), **kwargs)
+
+    return call(0, request, **kwargs)
+
+
+def install() -> None:
+    """Route HTTPAdapter.send through the hook chain (idempotent)."""
+    global _original_send
+    with _lock:
+        if _original_send is None:
+            _original_send = HTTPAdapter.send
+            HTTPAdapter.send = _dispatch
+
+
+def original_send(adapter: HTTPAdapter, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+    """Send through adapter directly, bypassing the hook chain."""
+    return (_original_send or HTTPAdapter.send)(adapter, request, **kwargs)
+
+
+def add_hook(func: Callable, host: str = None, order: int = 50, name: str = None) -> Hook:
+    """Register a hook, replacing an earlier hook with the same name and host."""
+    install()
+    hook = Hook(func, host, order, name)
+    global _hooks
+    with _lock:
+        hooks = [h for h in _hooks if not (name and h.name == name and h.host == hook.host)]
+        hooks.append(hook)
+        # Copy-on-write so in-flight requests keep the list they started with
+        _hooks = sorted(hooks, key=lambda h: (h.order, h.sequence))
+    return hook
+
+
+def remove_hook(hook: Hook) -> None:
+    global _hooks
+    with _lock:
+        _hooks = [h for h in _hooks if h is not hook]
+
+
+def get_hooks() -> List[Hook]:
+    return list(_hooks)
+
+
+def make_response(request: requests.PreparedRequest, status_code: int = 200, content: bytes = b'',
+                  headers: Dict[str, str] = None, reason: str = None) -> requests.Response:
+    """Build a Response for a request that a hook answers without going to the network."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.url = request.url
+    response.request = request
+    response.reason = reason or ('OK' if status_code < 400 else 'Error')
+    response.encoding = 'utf-8'
+    return response
+
+
+def make_json_response(request: requests.PreparedRequest, payload, status_code: int = 200) -> requests.Response:
+    return make_response(
+        request, status_code, json.dumps(payload).encode('utf-8'), {'Content-Type': 'application/json'}
+    )
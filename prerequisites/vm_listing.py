@@ -0,0 +1,141 @@
+"""
+Incremental VM listing for very large sites.
+
+client.virtualization_sites.get_virtualization_site_vms() returns a site's whole VM list as
+one JSON array, so tens of thousands of VM dicts are in memory before the first one can be
+looked at. The ZVM API has no paging for this endpoint, so iter_site_vms() requests the same
+list with a streaming response and parses the array as it arrives, yielding one VM at a time:
+
+    for vm in iter_site_vms(client, site_identifier):
+        if vm['VmName'].startswith('CRM-'):
+            ...
+
+Only the VM being yielded and the undecoded rest of the current network chunk are held in
+memory. Stopping early (break, or closing the generator) closes the connection without
+downloading the rest of the list. iter_site_vm_pages() yields lists of page_size VMs instead.
+
+The request is sent with the address and certificate setting the client was created with
+(see create_client()) and the access token of the client's current session, through the same
+transport hooks and connection pool as the SDK's requests. It only logs in itself if the
+client has not used a token yet, or if the token is rejected.
+"""
+
+import codecs
+import itertools
+import json
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List
+
+from .client import connection_settings, session_token
+
+if TYPE_CHECKING:
+    from zvml import ZVMLClient
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_TIMEOUT = 60
+
+_WHITESPACE = ' \t\r\n'
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator:
+    """Yield the elements of a UTF-8 encoded top-level JSON array given in chunks of any size."""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    state = 'start'  # 'start' -> 'first' -> 'separator' <-> 'value'
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer = buffer[position:] + text_decoder.decode(b'' if final else chunk, final=final)
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            if state == 'start':
+                if buffer[position] != '[':
+                    raise ValueError(f"Expected a JSON array, got {buffer[position:position + 40]!r}")
+                state = 'first'
+                position += 1
+            elif state in ('first', 'value'):
+                if state == 'first' and buffer[position] == ']':
+                    return
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break  # value continues in the next chunk
+                if not final and (end == len(buffer) or buffer[end] not in _DELIMITERS):
+                    break  # a number could continue in the next chunk
+                position = end
+                state = 'separator'
+                yield value
+            else:
+                if buffer[position] == ']':
+                    return
+                if buffer[position] != ',':
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got {buffer[position:position + 40]!r}")
+                state = 'value'
+                position += 1
+    raise ValueError("JSON array ended before its closing ']'")
+
+
+def _log_in(settings, timeout: float) -> str:
+    import requests
+    from .transport import TOKEN_PATH
+    response = requests.post(
+        f"https://{settings.zvm_address}{TOKEN_PATH}",
+        data={
+            'grant_type': 'client_credentials',
+            'client_id': settings.client_id,
+            'client_secret': settings.client_secret
+        },
+        verify=settings.verify_certificate,
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()['access_token']
+
+
+def iter_site_vms(client: 'ZVMLClient', site_identifier: str, chunk_size: int = CHUNK_SIZE,
+                  timeout: float = DEFAULT_TIMEOUT) -> Iterator[Dict]:
+    """Yield the VMs of a site one at a time while the list is downloaded."""
+    import requests
+    settings = connection_settings(client)
+    token = session_token(client)
+
+    def get(token: str):
+        return requests.get(
+            f"https://{settings.zvm_address}/v1/virtualizationsites/{site_identifier}/vms",
+            headers={'Authorization': f"Bearer {token}", 'Accept': 'application/json'},
+            verify=settings.verify_certificate,
+            timeout=timeout,
+            stream=True
+        )
+
+    response = get(token or _log_in(settings, timeout))
+    if response.status_code == 401 and token:
+        # The session token expired since the SDK last used it
+        response.close()
+        response = get(_log_in(settings, timeout))
+    try:
+        response.raise_for_status()
+        yield from iter_json_array(response.iter_content(chunk_size))
+    finally:
+        response.close()
+
+
+def iter_site_vm_pages(client: 'ZVMLClient', site_identifier: str, page_size: int = 1000,
+                       **options) -> Iterator[List[Dict]]:
+    """Yield the VMs of a site in lists of up to page_size while the list is downloaded."""
+    vms = iter_site_vms(client, site_identifier, **options)
+    try:
+        while True:
+            page = list(itertools.islice(vms, page_size))
+            if not page:
+                return
+            yield page
+    finally:
+        vms.close()
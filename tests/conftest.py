@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from prerequisites import transport
+from prerequisites.mock_zvm import MockZVMServer
+
+
+@pytest.fixture
+def mock_zvm(request):
+    """A running MockZVMServer; parametrize indirectly to pass constructor options."""
+    options = getattr(request, 'param', None) or {}
+    with MockZVMServer(**options) as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def isolated_hooks():
+    """Remove the transport hooks a test added, so they do not leak into the next test."""
+    before = set(map(id, transport.get_hooks()))
+    yield
+    for hook in transport.get_hooks():
+        if id(hook) not in before:
+            transport.remove_hook(hook)
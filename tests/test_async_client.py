@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from prerequisites.async_client import AsyncZVMLClient
+
+
+class FakeVpgs:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def list_vpgs(self, vpg_name=None):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self._lock:
+            self.running -= 1
+        return [{'VpgName': vpg_name, 'Thread': threading.current_thread().name}]
+
+
+class FakeClient:
+    def __init__(self):
+        self.vpgs = FakeVpgs()
+
+
+def test_calls_run_off_the_loop_with_a_cap():
+    client = FakeClient()
+
+    async def main():
+        async with AsyncZVMLClient(client, max_concurrency=3) as zvm:
+            return await asyncio.gather(*[zvm.vpgs.list_vpgs(vpg_name=f'vpg{i}') for i in range(9)])
+
+    results = asyncio.run(main())
+    assert [result[0]['VpgName'] for result in results] == [f'vpg{i}' for i in range(9)]
+    assert all(result[0]['Thread'].startswith('zvml-async') for result in results)
+    assert client.vpgs.peak == 3
+
+
+def test_wrapped_methods_keep_their_name():
+    zvm = AsyncZVMLClient(FakeClient())
+    try:
+        assert zvm.vpgs.list_vpgs.__name__ == 'list_vpgs'
+        assert zvm.vpgs.list_vpgs is zvm.vpgs.list_vpgs
+    finally:
+        zvm.close()
+
+
+def test_max_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        AsyncZVMLClient(FakeClient(), max_concurrency=0)
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+import requests
+
+from prerequisites import transport
+from prerequisites.cassette import Cassette, CassetteMiss, enable_cassette
+from prerequisites.retry import enable_retries
+from prerequisites.token_cache import enable_token_cache
+from prerequisites.token_refresh import enable_token_refresh
+
+TOKEN_PATH = "/auth/realms/zerto/protocol/openid-connect/token"
+
+
+def call_zvm(base_url):
+    """Log in and read the local site, the way the SDK starts a session."""
+    token = requests.post(f"{base_url}{TOKEN_PATH}", verify=False, data={
+        'grant_type': 'client_credentials', 'client_id': 'any', 'client_secret': 'any'
+    }).json()
+    headers = {'Authorization': f"Bearer {token['access_token']}"}
+    site = requests.get(f"{base_url}/v1/localsite", headers=headers, verify=False).json()
+    vpgs = requests.get(f"{base_url}/v1/vpgs", headers=headers, verify=False).json()
+    return token, site, vpgs
+
+
+@pytest.mark.parametrize("mock_zvm", [{"tls": False, "vpgs": 3}], indirect=True)
+def test_record_replay_round_trip(mock_zvm, tmp_path):
+    path = str(tmp_path / 'run.cassette')
+    cassette = enable_cassette(mock_zvm.address, f'record:{path}')
+    token, site, vpgs = call_zvm(mock_zvm.base_url)
+    cassette.save()
+    assert [i['path'] for i in cassette.interactions] == [TOKEN_PATH, '/v1/localsite', '/v1/vpgs']
+    # Tokens are never written to the cassette
+    assert json.loads(cassette.interactions[0]['body'])['access_token'] == 'cassette-access_token'
+
+    served = sum(mock_zvm.request_counts.values())
+    replay = enable_cassette(mock_zvm.address, f'replay:{path}')
+    _, replayed_site, replayed_vpgs = call_zvm(mock_zvm.base_url)
+    assert (replayed_site, replayed_vpgs) == (site, vpgs)
+    assert sum(mock_zvm.request_counts.values()) == served
+    assert replay.misses == 0
+
+    with pytest.raises(CassetteMiss):
+        requests.get(f"{mock_zvm.base_url}/v1/tasks", verify=False)
+    assert replay.misses == 1
+
+
+def test_repeated_requests_replay_in_order(tmp_path):
+    cassette = Cassette(str(tmp_path / 'tasks.cassette'), [
+        {'method': 'GET', 'path': '/v1/tasks/t1', 'body_key': '', 'status': 200,
+         'content_type': 'application/json', 'body': json.dumps({'State': state}), 'encoding': 'utf-8',
+         'elapsed': 0.1}
+        for state in ('running', 'done')
+    ])
+    cassette.save()
+    replay = enable_cassette('zvm.example', f"replay:{cassette.path}")
+    states = [requests.get('https://zvm.example/v1/tasks/t1').json()['State'] for _ in range(3)]
+    # The last answer repeats once the recorded ones are used up
+    assert states == ['running', 'done', 'done']
+    assert replay.misses == 0
+
+
+@pytest.mark.parametrize("mock_zvm", [{"tls": False}], indirect=True)
+def test_token_cache_and_refresh_off_while_recording(mock_zvm, tmp_path):
+    enable_token_cache(mock_zvm.address, str(tmp_path / 'tokens.json'))
+    refresher = enable_token_refresh(mock_zvm.address)
+    cassette = enable_cassette(mock_zvm.address, f"record:{tmp_path / 'run.cassette'}")
+    assert [hook.name for hook in transport.get_hooks() if hook.host == mock_zvm.address] == ['cassette']
+    assert refresher._stopped.is_set()
+
+    call_zvm(mock_zvm.base_url)
+    call_zvm(mock_zvm.base_url)
+    assert [i['path'] for i in cassette.interactions].count(TOKEN_PATH) == 2
+    assert not (tmp_path / 'tokens.json').exists()
+
+
+def test_miss_is_not_retried(tmp_path):
+    cassette = Cassette(str(tmp_path / 'empty.cassette'))
+    cassette.save()
+    policy = enable_retries('zvm.example', max_attempts=3)
+    enable_cassette('zvm.example', f"replay:{cassette.path}")
+    with pytest.raises(CassetteMiss):
+        requests.get('https://zvm.example/v1/vpgs')
+    assert policy.retries == 0
+
+
+@pytest.mark.parametrize("mock_zvm", [{"tls": False}], indirect=True)
+def test_one_recording_per_host(mock_zvm, tmp_path):
+    setting = f"record:{tmp_path / 'run.cassette'}"
+    first = enable_cassette(mock_zvm.address, setting)
+    call_zvm(mock_zvm.base_url)
+    # A second client for the same ZVM keeps appending to the same recording
+    assert enable_cassette(mock_zvm.address, setting) is first
+    call_zvm(mock_zvm.base_url)
+    assert len(first.interactions) == 6
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from prerequisites import transport
+from prerequisites.coalesce import RequestCoalescer, enable_coalescing
+
+
+def prepare(method, path='/v1/virtualizationsites'):
+    return requests.Request(method, f'https://zvm.example{path}').prepare()
+
+
+class SlowSend:
+    """send() that answers after release() is called, counting the requests that reach it."""
+
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.released = threading.Event()
+
+    def __call__(self, request, **kwargs):
+        self.calls += 1
+        if request.method == 'GET':
+            self.started.set()
+            self.released.wait(5)
+        return transport.make_response(request, 200, f'answer {self.calls}'.encode())
+
+
+def get_in_thread(coalescer, send, results):
+    thread = threading.Thread(target=lambda: results.append(coalescer.hook(prepare('GET'), send).content))
+    thread.start()
+    return thread
+
+
+def test_concurrent_gets_share_one_request():
+    coalescer = RequestCoalescer()
+    send = SlowSend()
+    results = []
+    threads = [get_in_thread(coalescer, send, results) for _ in range(8)]
+    send.started.wait(5)
+    time.sleep(0.05)
+    send.released.set()
+    for thread in threads:
+        thread.join(5)
+    assert send.calls == 1
+    assert results == [b'answer 1'] * 8
+    assert coalescer.stats() == {'sent': 1, 'coalesced': 7, 'cache_hits': 0}
+
+
+def test_get_after_write_does_not_join_earlier_get():
+    coalescer = RequestCoalescer(ttl=60)
+    send = SlowSend()
+    results = []
+    first = get_in_thread(coalescer, send, results)
+    send.started.wait(5)
+    coalescer.hook(prepare('PUT', '/v1/vpgSettings/abc'), send)
+    second = get_in_thread(coalescer, send, results)
+    send.released.set()
+    first.join(5)
+    second.join(5)
+    # GET, PUT and a second GET all went out
+    assert send.calls == 3
+    assert coalescer.stats()['coalesced'] == 0
+    # The GET that overlapped the write is not reused from the cache either
+    assert coalescer.hook(prepare('GET'), send).content == sorted(results)[-1]
+    assert coalescer.stats()['cache_hits'] == 1
+
+
+def test_ttl_cache_only_keeps_success():
+    coalescer = RequestCoalescer(ttl=60)
+    statuses = iter([503, 200, 200])
+    send = lambda request, **kwargs: transport.make_response(request, next(statuses))
+    assert coalescer.hook(prepare('GET'), send).status_code == 503
+    assert coalescer.hook(prepare('GET'), send).status_code == 200
+    assert coalescer.hook(prepare('GET'), send).status_code == 200
+    assert coalescer.stats()['cache_hits'] == 1
+
+
+@pytest.mark.parametrize("mock_zvm", [{"tls": False, "latency_ms": 100}], indirect=True)
+def test_against_mock_zvm(mock_zvm):
+    enable_coalescing(mock_zvm.address)
+    url = f"{mock_zvm.base_url}/v1/localsite"
+    statuses = []
+    threads = [threading.Thread(target=lambda: statuses.append(requests.get(url).status_code)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert statuses == [401] * 6
+    assert mock_zvm.request_counts[('GET', 'localsite')] == 1
+
+
+def test_different_credentials_are_not_shared():
+    coalescer = RequestCoalescer(ttl=60)
+    calls = []
+
+    def send(request, **kwargs):
+        calls.append(request.headers['Authorization'])
+        return transport.make_response(request, 200, request.headers['Authorization'].encode())
+
+    def get(token):
+        request = requests.Request('GET', 'https://zvm.example/v1/vpgs',
+                                   headers={'Authorization': f'Bearer {token}'}).prepare()
+        return coalescer.hook(request, send).content
+
+    assert get('read-only') == b'Bearer read-only'
+    assert get('admin') == b'Bearer admin'
+    assert get('read-only') == b'Bearer read-only'
+    assert calls == ['Bearer read-only', 'Bearer admin']
+
+
+def test_follower_sends_itself_when_leader_is_interrupted():
+    coalescer = RequestCoalescer(ttl=60)
+    send = SlowSend()
+
+    def interrupted(request, **kwargs):
+        send.started.set()
+        send.released.wait(5)
+        raise KeyboardInterrupt
+
+    leader_errors = []
+
+    def lead():
+        try:
+            coalescer.hook(prepare('GET'), interrupted)
+        except KeyboardInterrupt as e:
+            leader_errors.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    send.started.wait(5)
+    results = []
+    follower = threading.Thread(target=lambda: results.append(coalescer.hook(prepare('GET'), send).status_code))
+    follower.start()
+    time.sleep(0.05)
+    send.released.set()
+    leader.join(5)
+    follower.join(5)
+    assert len(leader_errors) == 1
+    assert results == [200]
+    assert coalescer.stats()['coalesced'] == 1
@@ -0,0 +1,66 @@
+import pytest
+
+from prerequisites.inventory import from_api_list
+from prerequisites.inventory_index import API_KEYS, AmbiguousNameError, NameIndex
+
+VMS = [
+    {'VmIdentifier': 'vm-1', 'VmName': 'web01'},
+    {'VmIdentifier': 'vm-2', 'VmName': 'db01'},
+    {'VmIdentifier': 'vm-3', 'VmName': 'web01'},
+]
+
+
+@pytest.fixture
+def index():
+    return NameIndex.from_api(VMS, *API_KEYS['vms'], resource_type='VMs')
+
+
+def test_unique_name(index):
+    assert index.identifier('db01') == 'vm-2'
+    assert index.find('db01') is VMS[1]
+    assert index.get('vm-2') is VMS[1]
+
+
+def test_ambiguous_name(index):
+    with pytest.raises(AmbiguousNameError) as raised:
+        index.identifier('web01')
+    assert raised.value.identifiers == ['vm-1', 'vm-3']
+    assert raised.value.name == 'web01'
+    with pytest.raises(AmbiguousNameError):
+        index.find('web01')
+    assert index.identifiers('web01') == ['vm-1', 'vm-3']
+    assert index.duplicates() == {'web01': ['vm-1', 'vm-3']}
+
+
+def test_ambiguous_name_is_a_lookup_error(index):
+    with pytest.raises(LookupError):
+        index.identifier('web01')
+
+
+def test_unknown_name(index):
+    with pytest.raises(KeyError):
+        index.identifier('app01')
+    assert index.find('app01') is None
+    assert index.identifiers('app01') == []
+
+
+def test_remove_resolves_ambiguity(index):
+    index.remove('vm-1')
+    assert index.identifier('web01') == 'vm-3'
+    assert index.duplicates() == {}
+    index.remove('vm-3')
+    assert 'web01' not in index.names()
+    assert len(index) == 1
+
+
+def test_rename_replaces_entry(index):
+    index.add({'VmIdentifier': 'vm-3', 'VmName': 'web02'})
+    assert index.identifier('web01') == 'vm-1'
+    assert index.identifier('web02') == 'vm-3'
+    assert len(index) == 3
+
+
+def test_models():
+    index = NameIndex.from_models(from_api_list('vms', VMS), 'VMs')
+    assert index.identifiers('web01') == ['vm-1', 'vm-3']
+    assert index.find('db01').identifier == 'vm-2'
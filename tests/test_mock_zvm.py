@@ -0,0 +1,32 @@
+import pytest
+import requests
+
+pytestmark = pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+
+TOKEN_PATH = "/auth/realms/zerto/protocol/openid-connect/token"
+
+
+def test_requires_token(mock_zvm):
+    response = requests.get(f"{mock_zvm.base_url}/v1/localsite", verify=False)
+    assert response.status_code == 401
+
+    token = requests.post(f"{mock_zvm.base_url}{TOKEN_PATH}", verify=False, data={
+        'grant_type': 'client_credentials', 'client_id': 'any', 'client_secret': 'any'
+    }).json()['access_token']
+    response = requests.get(f"{mock_zvm.base_url}/v1/localsite", verify=False,
+                            headers={'Authorization': f"Bearer {token}"})
+    assert response.json()['SiteIdentifier'] == mock_zvm.inventory.local_site_identifier
+    assert mock_zvm.request_counts[('GET', 'localsite')] == 2
+
+
+@pytest.mark.parametrize("mock_zvm", [{"tls": False, "peer_sites": 3, "vms_per_site": 7}], indirect=True)
+def test_inventory_options(mock_zvm):
+    token = requests.post(f"{mock_zvm.base_url}{TOKEN_PATH}", data={
+        'grant_type': 'client_credentials', 'client_id': 'any', 'client_secret': 'any'
+    }).json()['access_token']
+    headers = {'Authorization': f"Bearer {token}"}
+    sites = requests.get(f"{mock_zvm.base_url}/v1/virtualizationsites", headers=headers).json()
+    assert len(sites) == 4
+    vms = requests.get(f"{mock_zvm.base_url}/v1/virtualizationsites/{sites[0]['SiteIdentifier']}/vms",
+                       headers=headers).json()
+    assert len(vms) == 7
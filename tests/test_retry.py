@@ -0,0 +1,181 @@
+import pytest
+import requests
+
+from prerequisites import retry, transport
+from prerequisites.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+def prepare(method, path, body=None):
+    return requests.Request(method, f'https://zvm.example{path}', data=body).prepare()
+
+
+class FakeSend:
+    """send() for RetryPolicy.hook answering with the given status codes (or raising exceptions)."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self, request, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes[min(self.calls, len(self.outcomes)) - 1]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return transport.make_response(request, outcome)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the circuit breaker."""
+    now = [1000.0]
+    monkeypatch.setattr(retry.time, 'time', lambda: now[0])
+    return now
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('GET /v1/vpgs')
+
+
+def test_breaker_half_open_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.before_request('GET /v1/vpgs')
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only the one trial request goes out
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('GET /v1/vpgs')
+
+    # A failed trial opens the breaker again for another reset_timeout
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock[0] += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request('GET /v1/vpgs')
+    clock[0] += 1
+    breaker.before_request('GET /v1/vpgs')
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.opened == 1
+
+
+@pytest.mark.parametrize('method, path, repeatable', [
+    ('GET', '/v1/vpgs', True),
+    ('HEAD', '/v1/vpgs', True),
+    ('OPTIONS', '/v1/vpgs', True),
+    ('PUT', '/v1/vpgSettings/abc', True),
+    ('DELETE', '/v1/vpgSettings/abc', True),
+    ('POST', '/auth/realms/zerto/protocol/openid-connect/token', True),
+    ('POST', '/v1/vpgs/settings/export', True),
+    ('POST', '/v1/vpgs/settings/read', True),
+    ('POST', '/v1/vpgSettings', False),
+    ('POST', '/v1/vpgSettings/abc/commit', False),
+    ('POST', '/v1/vpgs/abc/FailoverTest', False),
+    ('POST', '/v1/vpgs/settings/import', False),
+    ('PATCH', '/v1/vpgSettings/abc', False),
+])
+def test_can_repeat(method, path, repeatable):
+    assert RetryPolicy.can_repeat(prepare(method, path)) is repeatable
+
+
+def test_streamed_body_is_not_repeatable():
+    request = prepare('PUT', '/v1/vpgSettings/abc')
+    request.body = iter([b'{}'])
+    assert not RetryPolicy.can_repeat(request)
+
+
+@pytest.mark.parametrize('method, path, sends', [
+    ('GET', '/v1/vpgs', 3),
+    ('POST', '/v1/vpgs/settings/export', 3),
+    ('POST', '/v1/vpgSettings/abc/commit', 1),
+])
+def test_transient_status_retried_for_safe_requests(method, path, sends):
+    policy = RetryPolicy(max_attempts=3, backoff_base=0)
+    send = FakeSend(503, 503, 200)
+    response = policy.hook(prepare(method, path), send)
+    assert send.calls == sends
+    assert response.status_code == (200 if sends == 3 else 503)
+
+
+def test_application_errors_not_retried():
+    policy = RetryPolicy(max_attempts=3, backoff_base=0)
+    send = FakeSend(500, 200)
+    assert policy.hook(prepare('GET', '/v1/vpgs'), send).status_code == 500
+    assert send.calls == 1
+
+
+def test_failed_connect_retried_for_any_request():
+    policy = RetryPolicy(max_attempts=3, backoff_base=0)
+    send = FakeSend(requests.exceptions.ConnectTimeout(), 200)
+    assert policy.hook(prepare('POST', '/v1/vpgSettings/abc/commit'), send).status_code == 200
+    assert send.calls == 2
+
+
+def test_read_timeout_not_retried_for_unsafe_request():
+    policy = RetryPolicy(max_attempts=3, backoff_base=0)
+    send = FakeSend(requests.exceptions.ReadTimeout(), 200)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        policy.hook(prepare('POST', '/v1/vpgSettings/abc/commit'), send)
+    assert send.calls == 1
+
+
+def test_gives_up_after_max_attempts():
+    policy = RetryPolicy(max_attempts=4, backoff_base=0)
+    send = FakeSend(502)
+    assert policy.hook(prepare('GET', '/v1/vpgs'), send).status_code == 502
+    assert send.calls == 4
+    assert policy.stats()['exhausted'] == 1
+
+
+def test_new_settings_session_only_retried_when_not_sent():
+    policy = RetryPolicy(max_attempts=3, backoff_base=0)
+    send = FakeSend(requests.exceptions.ConnectTimeout(), 200)
+    assert policy.hook(prepare('POST', '/v1/vpgSettings'), send).status_code == 200
+    assert send.calls == 2
+
+    send = FakeSend(503, 200)
+    assert policy.hook(prepare('POST', '/v1/vpgSettings'), send).status_code == 503
+    assert send.calls == 1
+
+
+def test_429_does_not_trip_breaker():
+    breaker = CircuitBreaker(failure_threshold=2)
+    policy = RetryPolicy(max_attempts=5, backoff_base=0, breaker=breaker)
+    assert policy.hook(prepare('GET', '/v1/vpgs'), FakeSend(429, 429, 429, 200)).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_unrelated_exceptions_do_not_trip_breaker():
+    breaker = CircuitBreaker(failure_threshold=2)
+    policy = RetryPolicy(max_attempts=3, backoff_base=0, breaker=breaker)
+    for error in (KeyError('bug'), KeyboardInterrupt(), KeyError('bug')):
+        with pytest.raises(type(error)):
+            policy.hook(prepare('GET', '/v1/vpgs'), FakeSend(error))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_unexpected_exception_settles_half_open_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    policy = RetryPolicy(max_attempts=3, backoff_base=0, breaker=breaker)
+    breaker.record_failure()
+    clock[0] += 30
+    with pytest.raises(KeyError):
+        policy.hook(prepare('GET', '/v1/vpgs'), FakeSend(KeyError('bug')))
+    assert breaker.failures == 1
+    # The next request is the trial, without waiting another reset_timeout
+    assert policy.hook(prepare('GET', '/v1/vpgs'), FakeSend(200)).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,57 @@
+import os
+import stat
+import time
+
+import pytest
+
+from prerequisites.token_cache import TokenCache, get_cache_path
+
+TOKEN = {'access_token': 'abc', 'expires_in': 300, 'token_type': 'Bearer'}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TokenCache(tmp_path / 'cache' / 'tokens.json')
+
+
+def mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_file_and_directory_permissions(cache):
+    cache.put('zvm.example', 'zerto-api', 'secret', TOKEN, time.time())
+    assert mode(cache.path) == 0o600
+    assert mode(cache.path.parent) == 0o700
+    # Rewriting keeps the file private
+    cache.put('zvm.example', 'other', 'secret', TOKEN, time.time())
+    assert mode(cache.path) == 0o600
+
+
+def test_file_readable_by_others_is_ignored(cache):
+    cache.put('zvm.example', 'zerto-api', 'secret', TOKEN, time.time())
+    assert cache.get('zvm.example', 'zerto-api', 'secret')['access_token'] == 'abc'
+    os.chmod(cache.path, 0o644)
+    assert cache.get('zvm.example', 'zerto-api', 'secret') is None
+
+
+def test_entry_bound_to_secret_and_host(cache):
+    cache.put('ZVM.example:443', 'zerto-api', 'secret', TOKEN, time.time())
+    assert cache.get('zvm.example', 'zerto-api', 'secret') is not None
+    assert cache.get('zvm.example', 'zerto-api', 'other-secret') is None
+    assert cache.get('zvm2.example', 'zerto-api', 'secret') is None
+
+
+def test_expiring_token_not_reused(cache):
+    cache.put('zvm.example', 'zerto-api', 'secret', TOKEN, time.time() - 250)
+    assert cache.get('zvm.example', 'zerto-api', 'secret') is None
+
+
+def test_remaining_lifetime_reported(cache):
+    cache.put('zvm.example', 'zerto-api', 'secret', TOKEN, time.time() - 100)
+    assert 195 <= cache.get('zvm.example', 'zerto-api', 'secret')['expires_in'] <= 200
+
+
+@pytest.mark.parametrize('setting, enabled', [('', False), ('0', False), ('off', False), ('1', True),
+                                              ('/tmp/tokens.json', True)])
+def test_cache_path_setting(setting, enabled):
+    assert (get_cache_path(setting) is not None) is enabled
@@ -0,0 +1,50 @@
+import pytest
+import requests
+
+from prerequisites import transport
+from prerequisites.token_refresh import disable_token_refresh, enable_token_refresh
+
+TOKEN_PATH = "/auth/realms/zerto/protocol/openid-connect/token"
+
+
+def log_in(base_url):
+    return requests.post(f"{base_url}{TOKEN_PATH}", data={
+        'grant_type': 'client_credentials', 'client_id': 'any', 'client_secret': 'any'
+    }).json()['access_token']
+
+
+def refresh_hooks():
+    return [hook for hook in transport.get_hooks() if hook.name == 'token_refresh']
+
+
+@pytest.mark.parametrize("mock_zvm", [{"tls": False}], indirect=True)
+def test_second_enable_replaces_refresher(mock_zvm):
+    first = enable_token_refresh(mock_zvm.address)
+    token = log_in(mock_zvm.base_url)
+    assert first.token.access_token == token
+    assert first._thread.is_alive()
+
+    second = enable_token_refresh(mock_zvm.address)
+    first._thread.join(5)
+    assert not first._thread.is_alive()
+    assert [hook.func for hook in refresh_hooks()] == [second.hook]
+
+    # The new refresher picks up the next login
+    log_in(mock_zvm.base_url)
+    assert second.token is not None
+    assert disable_token_refresh(mock_zvm.address) is second
+    second._thread.join(5)
+    assert not second._thread.is_alive()
+    assert refresh_hooks() == []
+    assert disable_token_refresh(mock_zvm.address) is None
+
+
+@pytest.mark.parametrize("mock_zvm", [{"tls": False}], indirect=True)
+def test_token_requests_answered_from_memory(mock_zvm):
+    refresher = enable_token_refresh(mock_zvm.address)
+    try:
+        assert log_in(mock_zvm.base_url) == log_in(mock_zvm.base_url)
+        assert mock_zvm.request_counts[('POST', 'token')] == 1
+    finally:
+        disable_token_refresh(mock_zvm.address)
+    assert refresher._stopped.is_set()
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+import requests
+
+from prerequisites import client as client_module
+from prerequisites.client import ConnectionSettings, enable_session_token
+from prerequisites.transport import TOKEN_PATH
+from prerequisites.vm_listing import iter_json_array, iter_site_vm_pages, iter_site_vms
+
+pytestmark = pytest.mark.filterwarnings("ignore::urllib3.exceptions.InsecureRequestWarning")
+
+ITEMS = [
+    {'VmIdentifier': 'vm-1', 'VmName': 'web01', 'UsedStorageInMB': 1024},
+    {'VmIdentifier': 'vm-2', 'VmName': 'Zürich-db', 'Tags': ['a', 'b,]'], 'Nested': {'x': [1, 2]}},
+    -2.5e3,
+    12345,
+    'plain "string" with ] and ,',
+    None,
+    True,
+    [],
+    {},
+]
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('layout', [
+    {'separators': (',', ':')},
+    {'indent': 2},
+])
+def test_every_chunk_size(layout):
+    data = json.dumps(ITEMS, ensure_ascii=False, **layout).encode('utf-8')
+    for size in range(1, len(data) + 1):
+        assert list(iter_json_array(chunked(data, size))) == ITEMS, size
+
+
+def test_split_at_every_position():
+    # Covers numbers, escapes and multi-byte characters cut in two
+    data = json.dumps(ITEMS, ensure_ascii=False).encode('utf-8')
+    for split in range(len(data) + 1):
+        assert list(iter_json_array([data[:split], data[split:]])) == ITEMS, split
+
+
+@pytest.mark.parametrize('data', [b'[]', b'  [ ]  ', b'[\r\n]'])
+def test_empty_array(data):
+    assert list(iter_json_array(chunked(data, 1))) == []
+
+
+def test_stops_at_closing_bracket():
+    # Whatever follows the array is never read
+    chunks = iter([b'[1,', b'2]', b'garbage'])
+    assert list(iter_json_array(chunks)) == [1, 2]
+    assert next(chunks) == b'garbage'
+
+
+@pytest.mark.parametrize('data', [b'{"a": 1}', b'[1 2]', b'[1, 2', b'[{"a": 1}'])
+def test_invalid_input(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunked(data, 3)))
+
+
+class FakeClient:
+    """Stands in for a ZVMLClient made by create_client()."""
+
+
+@pytest.fixture
+def zvm_client(mock_zvm, monkeypatch):
+    client = FakeClient()
+    settings = ConnectionSettings(mock_zvm.address, 'any', 'any', False)
+    monkeypatch.setitem(client_module._connections, client, settings)
+    client.tracker = enable_session_token(mock_zvm.address)
+    return client
+
+
+def sdk_login(mock_zvm):
+    requests.post(f"{mock_zvm.base_url}{TOKEN_PATH}", verify=False, data={
+        'grant_type': 'client_credentials', 'client_id': 'any', 'client_secret': 'any'
+    })
+
+
+def local_site(mock_zvm):
+    return mock_zvm.inventory.local_site_identifier
+
+
+@pytest.mark.parametrize("mock_zvm", [{"vms_per_site": 250}], indirect=True)
+def test_uses_the_session_token(mock_zvm, zvm_client):
+    sdk_login(mock_zvm)
+    vms = list(iter_site_vms(zvm_client, local_site(mock_zvm), chunk_size=512))
+    assert len(vms) == 250
+    assert len({vm['VmIdentifier'] for vm in vms}) == 250
+    # Only the SDK logged in
+    assert mock_zvm.request_counts[('POST', 'token')] == 1
+
+
+@pytest.mark.parametrize("mock_zvm", [{"vms_per_site": 25}], indirect=True)
+def test_logs_in_without_a_session_token(mock_zvm, zvm_client):
+    pages = list(iter_site_vm_pages(zvm_client, local_site(mock_zvm), page_size=10))
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert mock_zvm.request_counts[('POST', 'token')] == 1
+    assert zvm_client.tracker.access_token is not None
+
+
+@pytest.mark.parametrize("mock_zvm", [{"vms_per_site": 5}], indirect=True)
+def test_rejected_session_token_is_replaced(mock_zvm, zvm_client):
+    zvm_client.tracker.access_token = 'expired'
+    assert len(list(iter_site_vms(zvm_client, local_site(mock_zvm)))) == 5
+    assert mock_zvm.request_counts[('GET', 'site_resources')] == 2
+    assert mock_zvm.request_counts[('POST', 'token')] == 1